@@ -0,0 +1,121 @@
+"""
+Syntax highlighting cost of the old whole-buffer regexes against the lexer engine.
+
+Generates a synthetic Python file of 10k, 50k and 200k lines and measures:
+
+  * legacy -- the former TextEditor.highlight_syntax: one finditer per regex over
+    the whole content and one tag_add per match with a "1.0+Nc" index
+  * lexer  -- lexers.PYTHON_LEXER run line by line with the state carried over,
+    followed by one batched tag_add per tag
+
+Each mode reports the time spent scanning and the time spent applying tags. Run
+from the repository root; --no-tk measures the scanning only and needs no display:
+
+    python benchmarks/bench_highlight.py [--no-tk] [--legacy-max 50000]
+"""
+import argparse
+import os
+import re
+import sys
+import time
+import tkinter as tk
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lexers import PYTHON_LEXER
+
+SIZES = [10_000, 50_000, 200_000]
+TAGS = ("keyword", "string", "comment", "function", "number")
+
+SAMPLE = '''class Widget{n}(Base):
+    """Docstring of widget {n},
+    spanning two lines."""
+    def render_{n}(self, value=0x{n:x}, scale=1.5):
+        # Scale the value and format it
+        if value > {n} and not self.hidden:
+            return "widget %d" % (value * scale)
+        return 'none'
+
+'''
+
+def synthetic_source(lines):
+    """Returns Python source with about the given number of lines."""
+    block_lines = SAMPLE.count("\n")
+    return "".join(SAMPLE.format(n=n) for n in range(lines // block_lines + 1))
+
+def legacy_scan(content):
+    """The matches of the former implementation, as (tag, start offset, end offset)."""
+    patterns = {
+        "keyword": [r'\b(and|as|assert|break|class|continue|def|del|elif|else|except|finally|for|from|global|if|import|in|is|lambda|nonlocal|not|or|pass|raise|return|try|while|with|yield)\b'],
+        "string": [r'"[^"\\]*(?:\\.[^"\\]*)*"', r"'[^'\\]*(?:\\.[^'\\]*)*'"],
+        "comment": [r'#.*'],
+        "function": [r'\bdef\s+([a-zA-Z_][a-zA-Z0-9_]*)\b', r'\bclass\s+([a-zA-Z_][a-zA-Z0-9_]*)\b'],
+        "number": [r'\b\d+\b'],
+    }
+    matches = []
+    for tag, regexes in patterns.items():
+        for regex in regexes:
+            for match in re.finditer(regex, content):
+                matches.append((tag, match.start(), match.end()))
+    return matches
+
+def legacy_apply(text, matches):
+    for tag in TAGS:
+        text.tag_remove(tag, "1.0", "end")
+    for tag, start, end in matches:
+        text.tag_add(tag, f"1.0+{start}c", f"1.0+{end}c")
+
+def lexer_scan(content):
+    """The tag ranges of the lexer engine, grouped per tag as Tk indices."""
+    ranges = {tag: [] for tag in TAGS}
+    state = None
+    for line_number, line in enumerate(content.split("\n"), 1):
+        tokens, state = PYTHON_LEXER.tokenize(line, state)
+        for tag, start, end in tokens:
+            ranges[tag].extend((f"{line_number}.{start}", f"{line_number}.{end}"))
+    return ranges
+
+def lexer_apply(text, ranges):
+    for tag in TAGS:
+        text.tag_remove(tag, "1.0", "end")
+        if ranges[tag]:
+            text.tag_add(tag, *ranges[tag])
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--no-tk", action="store_true", help="only measure scanning, without a Text widget")
+    parser.add_argument("--legacy-max", type=int, default=50_000,
+                        help="largest file size to apply legacy tags to (it is very slow)")
+    args = parser.parse_args()
+
+    text = None
+    if not args.no_tk:
+        root = tk.Tk()
+        text = tk.Text(root)
+        text.pack()
+
+    print(f"{'lines':>8} {'mode':>7} {'scan':>10} {'tags':>10} {'total':>10}")
+    for size in SIZES:
+        content = synthetic_source(size)
+        if text is not None:
+            text.delete("1.0", "end")
+            text.insert("1.0", content)
+        modes = [("legacy", legacy_scan, legacy_apply), ("lexer", lexer_scan, lexer_apply)]
+        for mode, scan, apply in modes:
+            result, scan_seconds = timed(scan, content)
+            apply_seconds = 0.0
+            if text is not None and (mode != "legacy" or size <= args.legacy_max):
+                _, apply_seconds = timed(apply, text, result)
+                text.update()
+            elif text is not None:
+                apply_seconds = float("nan")
+            total = scan_seconds + apply_seconds
+            print(f"{size:>8} {mode:>7} {scan_seconds * 1000:>8.1f}ms {apply_seconds * 1000:>8.1f}ms {total * 1000:>8.1f}ms")
+
+if __name__ == "__main__":
+    main()
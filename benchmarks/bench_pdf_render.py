@@ -0,0 +1,129 @@
+"""
+Per-page PDF render latency of a pdftoppm process per page against the render service.
+
+Writes a synthetic text PDF (or uses the one given with --pdf) and renders every
+page once, in order, through:
+
+  * subprocess -- the former PDFViewer path: pdf2image.convert_from_path for a
+    single page, which forks pdftoppm and reparses the document for every page
+  * service/<backend> -- pdfrender.RenderService with the document kept open in
+    a worker process and the pixels returned through shared memory, for each
+    installed backend (pdfium, mupdf, poppler)
+
+Each mode reports the first page (including starting the render processes and
+opening the document) and the median, mean and 95th percentile of the others.
+Run from the repository root:
+
+    python benchmarks/bench_pdf_render.py [--pages 50] [--dpi 150] [--pdf file.pdf]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pdfrender import BACKEND_MODULES, RenderService
+
+LINES_PER_PAGE = 40
+
+def synthetic_pdf(path, pages):
+    """Writes a Letter-sized PDF of the given number of pages of Helvetica text."""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None,
+               b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for page_num in range(pages):
+        lines = [f"(Page {page_num + 1}, line {line + 1}: the quick brown fox jumps over the lazy dog) Tj T*"
+                 for line in range(LINES_PER_PAGE)]
+        stream = ("BT /F1 11 Tf 14 TL 54 740 Td " + " ".join(lines) + " ET").encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % len(objects))
+        kids.append(b"%d 0 R" % len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(kids), pages)
+
+    content = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(content))
+        content += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(content)
+    content += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    content += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    content += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    with open(path, "wb") as file:
+        file.write(content)
+
+def render_subprocess(path, page_num, dpi):
+    from pdf2image import convert_from_path
+    return convert_from_path(path, dpi=dpi, first_page=page_num + 1, last_page=page_num + 1)[0]
+
+def measure(render, path, pages, dpi):
+    """Renders every page and returns the seconds each one took."""
+    timings = []
+    for page_num in range(pages):
+        start = time.perf_counter()
+        render(path, page_num, dpi)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+def page_count(path):
+    service = RenderService(processes=1)
+    try:
+        return service.document_info(path).page_count
+    finally:
+        service.close()
+
+def installed(module):
+    try:
+        __import__(module)
+        return True
+    except ImportError:
+        return False
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, default=50, help="pages of the synthetic PDF")
+    parser.add_argument("--dpi", type=int, default=150, help="resolution to render at")
+    parser.add_argument("--pdf", help="render this PDF instead of a synthetic one")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        path = args.pdf
+        if path is None:
+            path = os.path.join(folder, "synthetic.pdf")
+            synthetic_pdf(path, args.pages)
+
+        modes = []
+        if installed("pdf2image"):
+            modes.append(("subprocess", None))
+        modes.extend((f"service/{backend}", backend) for backend, module in BACKEND_MODULES.items()
+                     if installed(module))
+        if not modes:
+            sys.exit("No PDF backend is installed (pdf2image, pypdfium2 or PyMuPDF)")
+
+        pages = args.pages if args.pdf is None else page_count(path)
+        print(f"{'mode':>16} {'first':>10} {'median':>10} {'mean':>10} {'p95':>10}")
+        for mode, backend in modes:
+            if backend is None:
+                timings = measure(render_subprocess, path, pages, args.dpi)
+            else:
+                service = RenderService(backend, processes=1)
+                try:
+                    # The first page pays for starting the process and opening the document
+                    start = time.perf_counter()
+                    service.document_info(path)
+                    opened = time.perf_counter() - start
+                    timings = measure(service.render, path, pages, args.dpi)
+                    timings[0] += opened
+                finally:
+                    service.close()
+            rest = sorted(timings[1:]) or timings
+            p95 = rest[min(len(rest) - 1, int(len(rest) * 0.95))]
+            print(f"{mode:>16} {timings[0] * 1000:>8.1f}ms {statistics.median(rest) * 1000:>8.1f}ms "
+                  f"{statistics.mean(rest) * 1000:>8.1f}ms {p95 * 1000:>8.1f}ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Expand latency of FileTreeView for very large synthetic folders.
+
+Feeds 10k, 100k and 1M synthetic entries into a tree node the same way the
+background scanner does and measures, for the unpaged ("all") and the paged
+insertion modes:
+
+  * first page  -- time until the rows the user sees have been inserted
+  * longest stall -- the longest single time slice spent inserting rows,
+    i.e. the worst delay before the UI processes input again
+
+Run from the repository root (needs a display):
+
+    python benchmarks/bench_tree_expand.py [--unpaged-max 100000]
+"""
+import argparse
+import os
+import sys
+import time
+import tkinter as tk
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import TREE_PAGE_THRESHOLD
+from dirscan import Entry
+from treeview import FileTreeView, NodeListing
+
+SIZES = [10_000, 100_000, 1_000_000]
+BATCH_SIZE = 500
+
+def synthetic_entries(count):
+    """Returns count fake entries, one folder for every ten files."""
+    return [Entry(f"entry_{i:07d}", f"/synthetic/entry_{i:07d}", i % 10 == 0, 0, 0) for i in range(count)]
+
+def measure(root, count, entries, page_threshold):
+    """Expands a synthetic node and returns (first page seconds, longest stall seconds)."""
+    frame = tk.Frame(root)
+    view = FileTreeView(frame, lambda path: None, page_threshold=page_threshold)
+    stalls = []
+    insert_pending = view.insert_pending
+
+    def timed_insert_pending():
+        start = time.perf_counter()
+        insert_pending()
+        stalls.append(time.perf_counter() - start)
+    view.insert_pending = timed_insert_pending
+
+    node = view.tree.insert("", "end", text="synthetic")
+    listing = NodeListing(page_threshold)
+    view.listings[node] = listing
+    target = min(count, page_threshold)
+
+    start = time.perf_counter()
+    for i in range(0, count, BATCH_SIZE):
+        view.insert_entries(node, entries[i:i + BATCH_SIZE])
+        root.update()
+    while listing.inserted < target or view.insert_job is not None:
+        root.update()
+    first_page = time.perf_counter() - start
+
+    view.close()
+    frame.destroy()
+    return first_page, max(stalls, default=0.0)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--unpaged-max", type=int, default=100_000,
+                        help="largest folder to benchmark without paging (default: 100000)")
+    args = parser.parse_args()
+
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        print(f"A display is required to run this benchmark: {e}")
+        return 1
+    root.geometry("400x600")
+
+    print(f"{'entries':>10} {'mode':>6} {'first page':>12} {'longest stall':>14}")
+    for count in SIZES:
+        entries = synthetic_entries(count)
+        modes = [("paged", TREE_PAGE_THRESHOLD)]
+        if count <= args.unpaged_max:
+            modes.insert(0, ("all", sys.maxsize))
+        for mode, threshold in modes:
+            first_page, stall = measure(root, count, entries, threshold)
+            print(f"{count:>10,} {mode:>6} {first_page * 1000:>10.1f}ms {stall * 1000:>12.1f}ms")
+    root.destroy()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,3 +1,4 @@
+import os
 from tkinter import ttk
 
 def configure_styles():
@@ -16,4 +17,96 @@ def configure_styles():
                      [('Treeitem.indicator', {'side': 'left', 'sticky': ''}),
                       ('Treeitem.image', {'side': 'left', 'sticky': ''}),
                       ('Treeitem.text', {'side': 'left', 'sticky': ''})]})])
-    style.configure("Treeview", rowheight=22)  # Increase row height for better visibility
\ No newline at end of file
+    style.configure("Treeview", rowheight=22)  # Increase row height for better visibility
+
+# File tree paging: folders with more than TREE_PAGE_THRESHOLD entries only show that many
+# rows at first, further pages of TREE_PAGE_SIZE rows are loaded through a "Show more" node
+TREE_PAGE_THRESHOLD = 2000
+TREE_PAGE_SIZE = 2000
+# Seconds spent inserting tree rows before yielding back to the event loop
+TREE_INSERT_BUDGET = 0.015
+
+# Total number of entries kept across all cached directory listings
+DIR_CACHE_MAX_ENTRIES = 200000
+
+# Per-user folder for indexes and caches that persist between sessions
+APP_DATA_DIR = os.path.join(os.path.expanduser("~"), ".pylinq")
+
+def app_data_path(*parts):
+    """Returns a path inside APP_DATA_DIR, creating the parent folders as needed."""
+    path = os.path.join(APP_DATA_DIR, *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
+
+# File search index: where it is stored and which folders are crawled into it
+FILE_INDEX_NAME = "file_index.sqlite3"
+FILE_INDEX_ROOTS = [os.path.expanduser("~")]
+# Maximum number of hits a single search streams into the results pane
+SEARCH_MAX_RESULTS = 5000
+# Document text index: where it is stored, and how many PDF or DOCX files a worker
+# process extracts per batch
+DOC_INDEX_NAME = "doc_index.sqlite3"
+DOC_INDEX_BATCH = 8
+
+# Target for the cold time from process start to the first window being mapped, as
+# reported by `python main.py --profile-startup`. Viewer backends (Pillow, PyPDF2,
+# pdf2image, python-docx) are imported on first use and do not count against it.
+STARTUP_TARGET_SECONDS = 0.5
+
+# Folder size column: worker threads walking subtrees, the most folders walked per
+# computed size, and how many per-folder records are cached between walks
+DIR_SIZE_WORKERS = 4
+DIR_SIZE_MAX_DIRS = 100000
+DIR_SIZE_CACHE_MAX_ENTRIES = 500000
+
+# Text files of at least LARGE_FILE_THRESHOLD bytes open read-only in large-file mode: the
+# file is memory-mapped and only a window of LARGE_FILE_WINDOW_LINES lines around the view
+# is loaded into the editor. The line index keeps one checkpoint per LARGE_FILE_INDEX_BLOCK
+# bytes, and no more than LARGE_FILE_WINDOW_MAX_BYTES are decoded into a window.
+LARGE_FILE_THRESHOLD = 32 * 1024 * 1024
+LARGE_FILE_WINDOW_LINES = 2000
+LARGE_FILE_INDEX_BLOCK = 64 * 1024
+LARGE_FILE_WINDOW_MAX_BYTES = 8 * 1024 * 1024
+
+# Bytes read from the start of a file to pick its encoding or tell that it is binary
+TEXT_SNIFF_BYTES = 8 * 1024
+
+# Following a growing file: how often it is checked for new bytes, the most lines kept in
+# the editor (the oldest are dropped beyond that), and how far behind the end of the file
+# the reader may fall before it skips ahead to the last TAIL_MAX_BACKLOG bytes
+TAIL_POLL_INTERVAL = 0.25
+TAIL_MAX_LINES = 10000
+TAIL_MAX_BACKLOG = 4 * 1024 * 1024
+
+# Rendered PDF pages: pages are rasterized at the DPI that fits the canvas at the current
+# zoom, within PDF_MIN_DPI..PDF_MAX_DPI, or at PDF_RENDER_DPI when their size is unknown. A
+# resize renders again once the canvas has kept its size for PDF_RESIZE_DELAY_MS. Then the
+# memory budget of the in-memory page cache, and the folder and size budget of its
+# on-disk tier (0 disables it)
+PDF_RENDER_DPI = 200
+PDF_MIN_DPI = 18
+PDF_MAX_DPI = 600
+PDF_RESIZE_DELAY_MS = 150
+PDF_CACHE_MAX_BYTES = 256 * 1024 * 1024
+PDF_DISK_CACHE_NAME = "pdf_pages"
+PDF_DISK_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+# PDF pages are rendered by PDF_RENDER_WORKERS render processes, fed by as many threads,
+# which also render the PDF_PREFETCH_RADIUS pages on either side of the current page ahead
+# of time. Each process keeps its PDF_OPEN_DOCUMENTS most recent documents open. The
+# backend is "pdfium" (pypdfium2), "mupdf" (PyMuPDF), "poppler" (pdf2image), or "auto"
+# for the first of them that is installed
+PDF_RENDER_WORKERS = 2
+PDF_PREFETCH_RADIUS = 2
+PDF_OPEN_DOCUMENTS = 4
+PDF_RENDER_BACKEND = "auto"
+
+# PDF thumbnail sidebar: thumbnail width in pixels, pages rendered per batch, worker
+# processes, delay after opening a document before thumbnails are rendered (so the page
+# itself renders first), and the folder and size budget of the thumbnail disk cache
+PDF_THUMB_WIDTH = 120
+PDF_THUMB_BATCH = 8
+PDF_THUMB_WORKERS = 2
+PDF_THUMB_START_DELAY_MS = 500
+PDF_THUMB_CACHE_NAME = "pdf_thumbs"
+PDF_THUMB_CACHE_MAX_BYTES = 256 * 1024 * 1024
@@ -0,0 +1,174 @@
+import concurrent.futures
+import functools
+import mmap
+import os
+import re
+import threading
+
+from config import SEARCH_MAX_RESULTS
+
+# Folders that never hold anything worth searching
+SKIPPED_DIRS = {".git", ".hg", ".svn", "__pycache__"}
+# Files are sent to the worker processes in batches of this many files or bytes
+BATCH_FILES = 64
+BATCH_BYTES = 32 * 1024 * 1024
+# Files up to this size are read in one go, larger ones are memory-mapped
+MMAP_THRESHOLD = 1024 * 1024
+SNIFF_BYTES = 8192
+SNIPPET_LENGTH = 200
+
+@functools.lru_cache(maxsize=8)
+def compile_pattern(pattern, regex, match_case, whole_word):
+    """Compiles the search options into a bytes regex. Cached per worker process."""
+    source = pattern if regex else re.escape(pattern)
+    if whole_word:
+        source = rf"\b(?:{source})\b"
+    flags = re.MULTILINE | (0 if match_case else re.IGNORECASE)
+    return re.compile(source.encode("utf-8"), flags)
+
+def is_binary(head):
+    """Sniffs the first bytes of a file: a NUL byte means it is not text."""
+    return b"\0" in head
+
+def search_file(path, regex, max_matches):
+    """Returns the (path, line, column, snippet) matches in one file, skipping binary files."""
+    matches = []
+    try:
+        with open(path, "rb") as file:
+            head = file.read(SNIFF_BYTES)
+            if not head or is_binary(head):
+                return matches
+            size = os.fstat(file.fileno()).st_size
+            if size <= MMAP_THRESHOLD:
+                data = head + file.read()
+            else:
+                data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                line = 1
+                counted_to = 0
+                for match in regex.finditer(data):
+                    start = match.start()
+                    line += data.count(b"\n", counted_to, start) if isinstance(data, bytes) else \
+                        data[counted_to:start].count(b"\n")
+                    counted_to = start
+                    line_start = data.rfind(b"\n", 0, start) + 1
+                    line_end = data.find(b"\n", start)
+                    if line_end < 0:
+                        line_end = len(data)
+                    column = len(data[line_start:start].decode("utf-8", "replace"))
+                    snippet = data[line_start:min(line_end, line_start + SNIPPET_LENGTH * 4)]
+                    snippet = snippet.decode("utf-8", "replace").strip()[:SNIPPET_LENGTH]
+                    matches.append((path, line, column, snippet))
+                    if len(matches) >= max_matches:
+                        break
+            finally:
+                if isinstance(data, mmap.mmap):
+                    data.close()
+    except (OSError, ValueError):
+        pass  # Unreadable, vanished or empty-for-mmap files are skipped
+    return matches
+
+def search_batch(paths, pattern, regex, match_case, whole_word, max_matches):
+    """Worker process entry point: searches a batch of files."""
+    compiled = compile_pattern(pattern, regex, match_case, whole_word)
+    matches = []
+    for path in paths:
+        matches.extend(search_file(path, compiled, max_matches - len(matches)))
+        if len(matches) >= max_matches:
+            break
+    return matches
+
+class ContentSearch(threading.Thread):
+    """
+    Searches the contents of every file below a folder, like grep.
+
+    The folder is walked on this thread and the files are fanned out in batches to
+    a process pool, so throughput scales with the number of cores. Matches are
+    posted to the main thread as (path, line, column, snippet) lists as soon as a
+    batch completes. The search stops once max_results matches were found or it is
+    cancelled.
+    """
+    def __init__(self, dispatcher, root_path, pattern, on_results, on_done, regex=False,
+                 match_case=False, whole_word=False, max_results=SEARCH_MAX_RESULTS, workers=None):
+        super().__init__(name="content-search", daemon=True)
+        self.dispatcher = dispatcher
+        self.root_path = root_path
+        self.pattern = pattern
+        self.options = (regex, match_case, whole_word)
+        self.on_results = on_results
+        self.on_done = on_done
+        self.max_results = max_results
+        self.workers = workers or os.cpu_count() or 1
+        self.found = 0
+        self.files_searched = 0
+        self.cancel_event = threading.Event()
+
+    def start(self):
+        # Fail early on invalid regular expressions instead of in every worker
+        compile_pattern(self.pattern, *self.options)
+        super().start()
+        return self
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def deliver(self, callback, *args):
+        """Runs on the main thread, drops results of a cancelled search."""
+        if not self.cancel_event.is_set():
+            callback(*args)
+
+    def iter_batches(self):
+        """Walks the folder and yields batches of file paths."""
+        batch = []
+        batch_bytes = 0
+        for dirpath, dirnames, filenames in os.walk(self.root_path):
+            if self.cancel_event.is_set():
+                return
+            dirnames[:] = [name for name in dirnames if name not in SKIPPED_DIRS]
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                try:
+                    batch_bytes += os.path.getsize(path)
+                except OSError:
+                    continue
+                batch.append(path)
+                if len(batch) >= BATCH_FILES or batch_bytes >= BATCH_BYTES:
+                    yield batch
+                    batch = []
+                    batch_bytes = 0
+        if batch:
+            yield batch
+
+    def run(self):
+        error = None
+        executor = concurrent.futures.ProcessPoolExecutor(max_workers=self.workers)
+        try:
+            pending = set()
+            batches = self.iter_batches()
+            exhausted = False
+            while not self.cancel_event.is_set():
+                # Keep every worker busy without walking far ahead of them
+                while not exhausted and len(pending) < self.workers * 2:
+                    batch = next(batches, None)
+                    if batch is None:
+                        exhausted = True
+                        break
+                    pending.add(executor.submit(
+                        search_batch, batch, self.pattern, *self.options, self.max_results))
+                    self.files_searched += len(batch)
+                if not pending:
+                    break
+                done, pending = concurrent.futures.wait(
+                    pending, timeout=0.2, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    matches = future.result()[:self.max_results - self.found]
+                    if matches:
+                        self.found += len(matches)
+                        self.dispatcher.post(self.deliver, self.on_results, matches)
+                if self.found >= self.max_results:
+                    break
+        except Exception as e:
+            error = e
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+        self.dispatcher.post(self.deliver, self.on_done, self.found, self.files_searched, error)
@@ -0,0 +1,66 @@
+import os
+import threading
+from collections import OrderedDict
+
+from config import DIR_CACHE_MAX_ENTRIES
+
+class DirectoryCache:
+    """
+    An LRU cache of directory listings keyed by path.
+
+    Each listing is stored with the st_mtime_ns the directory had when it was read
+    and is only returned while the directory still has that mtime, so a folder is
+    read from disk again only after it has actually changed. The cache is bounded
+    by the total number of entries across all listings.
+    """
+    def __init__(self, max_entries=DIR_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.listings = OrderedDict()  # path -> (mtime_ns, entries)
+        self.total_entries = 0
+        self.lock = threading.Lock()
+
+    def get(self, path):
+        """Returns the cached entries for path, or None if missing or out of date."""
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except OSError:
+            self.invalidate(path)
+            return None
+        with self.lock:
+            cached = self.listings.get(path)
+            if cached is None:
+                return None
+            if cached[0] != mtime_ns:
+                self._remove(path)
+                return None
+            self.listings.move_to_end(path)
+            return cached[1]
+
+    def put(self, path, mtime_ns, entries):
+        """Stores the listing of path as read at the given directory mtime."""
+        entries = list(entries)
+        with self.lock:
+            self._remove(path)
+            if len(entries) > self.max_entries:
+                return
+            self.listings[path] = (mtime_ns, entries)
+            self.total_entries += len(entries)
+            # Evict the least recently used listings until we are within budget
+            while self.total_entries > self.max_entries:
+                self._remove(next(iter(self.listings)))
+
+    def invalidate(self, path):
+        """Drops the cached listing of path."""
+        with self.lock:
+            self._remove(path)
+
+    def clear(self):
+        """Drops all cached listings."""
+        with self.lock:
+            self.listings.clear()
+            self.total_entries = 0
+
+    def _remove(self, path):
+        cached = self.listings.pop(path, None)
+        if cached is not None:
+            self.total_entries -= len(cached[1])
@@ -0,0 +1,93 @@
+import os
+import threading
+import time
+from collections import namedtuple
+
+# A single directory entry as reported by the scanner
+Entry = namedtuple("Entry", ["name", "path", "is_dir", "size", "mtime_ns"])
+
+def make_entry(dir_entry):
+    """Builds an Entry from an os.DirEntry, tolerating entries that vanish while scanning."""
+    try:
+        is_dir = dir_entry.is_dir()
+    except OSError:
+        is_dir = False
+    try:
+        # Free on Windows; on POSIX this is the only stat per entry and runs off the UI thread
+        st = dir_entry.stat(follow_symlinks=False)
+        size, mtime_ns = st.st_size, st.st_mtime_ns
+    except OSError:
+        size, mtime_ns = 0, 0
+    return Entry(dir_entry.name, dir_entry.path, is_dir, size, mtime_ns)
+
+def entry_for_path(path):
+    """Builds an Entry for a single path, or returns None if it no longer exists."""
+    try:
+        st = os.lstat(path)
+    except OSError:
+        return None
+    is_dir = os.path.isdir(path)
+    return Entry(os.path.basename(path), path, is_dir, st.st_size, st.st_mtime_ns)
+
+class DirectoryScanner:
+    """
+    Enumerates a directory on a worker thread and streams the entries back in batches.
+
+    Uses os.scandir so the entry type comes from the cached DirEntry information
+    instead of a separate isdir() per entry. Batches are delivered on the Tk main
+    thread through the given dispatcher; once cancelled, no further callbacks run.
+    on_done receives the st_mtime_ns the directory had when the scan started.
+    """
+    def __init__(self, path, dispatcher, on_batch, on_done=None, on_error=None,
+                 batch_size=500, batch_interval=0.05):
+        self.path = path
+        self.dispatcher = dispatcher
+        self.on_batch = on_batch
+        self.on_done = on_done
+        self.on_error = on_error
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        self._cancel_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"scan:{path}", daemon=True)
+
+    def start(self):
+        """Starts the scan in the background."""
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        """Stops the scan. Pending batches are discarded."""
+        self._cancel_event.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    def _run(self):
+        """Worker thread body."""
+        batch = []
+        last_flush = time.monotonic()
+        try:
+            # Taken before listing, so a change made during the scan invalidates the result
+            mtime_ns = os.stat(self.path).st_mtime_ns
+            with os.scandir(self.path) as entries:
+                for entry in entries:
+                    if self.cancelled:
+                        return
+                    batch.append(make_entry(entry))
+                    now = time.monotonic()
+                    if len(batch) >= self.batch_size or now - last_flush >= self.batch_interval:
+                        self.dispatcher.post(self._deliver, self.on_batch, batch)
+                        batch = []
+                        last_flush = now
+        except OSError as e:
+            self.dispatcher.post(self._deliver, self.on_error, e)
+            return
+        if batch:
+            self.dispatcher.post(self._deliver, self.on_batch, batch)
+        self.dispatcher.post(self._deliver, self.on_done, mtime_ns)
+
+    def _deliver(self, callback, *args):
+        """Invokes a callback on the main thread unless the scan was cancelled."""
+        if callback and not self.cancelled:
+            callback(*args)
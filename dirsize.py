@@ -0,0 +1,167 @@
+import concurrent.futures
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from config import DIR_SIZE_CACHE_MAX_ENTRIES, DIR_SIZE_MAX_DIRS, DIR_SIZE_WORKERS
+
+class DirSizeCache:
+    """
+    Per-folder size information keyed by (st_dev, st_ino) and validated by st_mtime_ns.
+
+    A folder's mtime only changes when its direct entries change, so each record
+    holds the folder's own file bytes and its subfolders rather than a recursive
+    total: a rescan stats every folder but only lists the ones that changed, and
+    the walks of sibling, parent and child folders all reuse the same records.
+    """
+    def __init__(self, max_entries=DIR_SIZE_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.records = OrderedDict()  # (dev, ino) -> (mtime_ns, own_bytes, subdirs)
+        self.lock = threading.Lock()
+
+    def get(self, key, mtime_ns):
+        """Returns (own_bytes, subdirs) for an unchanged folder, or None."""
+        with self.lock:
+            record = self.records.get(key)
+            if record is None or record[0] != mtime_ns:
+                return None
+            self.records.move_to_end(key)
+            return record[1], record[2]
+
+    def put(self, key, mtime_ns, own_bytes, subdirs):
+        with self.lock:
+            self.records[key] = (mtime_ns, own_bytes, subdirs)
+            self.records.move_to_end(key)
+            while len(self.records) > self.max_entries:
+                self.records.popitem(last=False)
+
+class DirSizeCalculator:
+    """
+    Computes recursive folder sizes in the background.
+
+    Every folder of a subtree is a separate task on a small thread pool, so large
+    subtrees are walked in parallel. Partial totals are posted to the main thread
+    as on_update(path, total_bytes, done, capped) at most every update_interval
+    seconds per folder, and a final update follows when the walk is complete. Walks
+    stay on the folder's filesystem, do not follow symbolic links, and stop after
+    max_dirs folders, in which case the total is reported as capped.
+    """
+    def __init__(self, dispatcher, on_update, cache=None, workers=DIR_SIZE_WORKERS,
+                 max_dirs=DIR_SIZE_MAX_DIRS, update_interval=0.25):
+        self.dispatcher = dispatcher
+        self.on_update = on_update
+        self.cache = cache if cache is not None else DirSizeCache()
+        self.max_dirs = max_dirs
+        self.update_interval = update_interval
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix="dirsize")
+        self.lock = threading.Lock()
+        self.walks = {}  # path -> Walk
+        self.last_post = 0.0
+        self.dirty = set()
+
+    def add(self, paths):
+        """Starts computing the size of each folder that is not already being computed."""
+        for path in paths:
+            with self.lock:
+                if path in self.walks:
+                    continue
+                walk = self.walks[path] = Walk(path)
+                walk.pending = 1
+            self.executor.submit(self.visit, walk, path)
+
+    def cancel(self, paths):
+        """Stops computing the given folders."""
+        with self.lock:
+            for path in paths:
+                walk = self.walks.pop(path, None)
+                if walk:
+                    walk.cancelled = True
+
+    def cancel_all(self):
+        """Stops all walks. The cache is kept, so computing the sizes again is quick."""
+        with self.lock:
+            paths = list(self.walks)
+        self.cancel(paths)
+
+    def close(self):
+        """Stops all walks and the worker threads."""
+        self.cancel_all()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def visit(self, walk, path):
+        """Task body: adds the bytes of one folder and queues its subfolders."""
+        own_bytes, subdirs = 0, []
+        if not walk.cancelled:
+            own_bytes, subdirs = self.read_folder(walk, path)
+        with self.lock:
+            walk.total += own_bytes
+            walk.visited += 1
+            for subdir in subdirs:
+                if walk.cancelled:
+                    break
+                if walk.visited + walk.pending > self.max_dirs:
+                    walk.capped = True
+                    break
+                walk.pending += 1
+                self.executor.submit(self.visit, walk, subdir)
+            walk.pending -= 1
+            done = walk.pending == 0
+            if done and self.walks.get(walk.path) is walk:
+                del self.walks[walk.path]
+            if walk.cancelled:
+                return
+            self.dirty.add(walk)
+            now = time.monotonic()
+            if not done and now - self.last_post < self.update_interval:
+                return
+            self.last_post = now
+            updates = [(w.path, w.total, w.pending == 0, w.capped) for w in self.dirty if not w.cancelled]
+            self.dirty.clear()
+        for update in updates:
+            self.dispatcher.post(self.deliver, *update)
+
+    def read_folder(self, walk, path):
+        """Returns (own file bytes, subfolders) of a folder, from the cache if it is unchanged."""
+        try:
+            st = os.stat(path, follow_symlinks=False)
+        except OSError:
+            return 0, []
+        if walk.device is None:
+            walk.device = st.st_dev
+        elif st.st_dev != walk.device:
+            return 0, []  # A mount point, checked here as DirEntry.stat reports st_dev 0 on Windows
+        key = (st.st_dev, st.st_ino)
+        cached = self.cache.get(key, st.st_mtime_ns)
+        if cached is not None:
+            return cached
+        own_bytes, subdirs = 0, []
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.path)
+                        else:
+                            own_bytes += entry.stat(follow_symlinks=False).st_size
+                    except OSError:
+                        continue
+        except OSError:
+            pass
+        self.cache.put(key, st.st_mtime_ns, own_bytes, subdirs)
+        return own_bytes, subdirs
+
+    def deliver(self, path, total, done, capped):
+        """Runs on the main thread."""
+        self.on_update(path, total, done, capped)
+
+class Walk:
+    """The state of the size computation of one folder."""
+    def __init__(self, path):
+        self.path = path
+        self.device = None  # Set from the folder itself, subfolders on other devices are skipped
+        self.total = 0
+        self.visited = 0
+        self.pending = 0
+        self.capped = False
+        self.cancelled = False
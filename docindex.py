@@ -0,0 +1,299 @@
+import concurrent.futures
+import os
+import sqlite3
+import threading
+import time
+
+from config import app_data_path, DOC_INDEX_BATCH, DOC_INDEX_NAME, SEARCH_MAX_RESULTS
+from contentsearch import SKIPPED_DIRS
+from fsindex import build_match_query, subtree_bounds
+
+# Documents whose text is indexed, by extension
+DOCUMENT_EXTENSIONS = (".pdf", ".docx")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS passages (
+    id INTEGER PRIMARY KEY,
+    doc INTEGER NOT NULL,
+    location INTEGER NOT NULL,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS passages_doc ON passages(doc);
+CREATE VIRTUAL TABLE IF NOT EXISTS passages_fts USING fts5(
+    text, content='passages', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS passages_ai AFTER INSERT ON passages BEGIN
+    INSERT INTO passages_fts(rowid, text) VALUES (new.id, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS passages_ad AFTER DELETE ON passages BEGIN
+    INSERT INTO passages_fts(passages_fts, rowid, text) VALUES ('delete', old.id, old.text);
+END;
+"""
+
+def extract_passages(path):
+    """
+    Returns the text of a document as (location, text) pairs: one per page of a PDF,
+    counted from 0, or one per paragraph of a DOCX, by its index in the document.
+    """
+    passages = []
+    if path.lower().endswith(".pdf"):
+        from PyPDF2 import PdfReader
+        for page_num, page in enumerate(PdfReader(path).pages):
+            try:
+                text = (page.extract_text() or "").strip()
+            except Exception:
+                continue  # A page that cannot be parsed does not lose the rest of the document
+            if text:
+                passages.append((page_num, text))
+    else:
+        import docx
+        for index, paragraph in enumerate(docx.Document(path).paragraphs):
+            text = paragraph.text.strip()
+            if text:
+                passages.append((index, text))
+    return passages
+
+def extract_batch(files):
+    """Worker process entry point: extracts a batch of (path, size, mtime_ns) documents."""
+    results = []
+    for path, size, mtime_ns in files:
+        try:
+            passages = extract_passages(path)
+        except Exception as e:
+            # Recorded without text, so it is not extracted again until it changes
+            print(f"Error extracting text from {path}: {e}")
+            passages = []
+        results.append((path, size, mtime_ns, passages))
+    return results
+
+class DocumentIndex:
+    """
+    A persistent SQLite FTS5 index of the text of PDF and DOCX documents.
+
+    PDFs are indexed per page and DOCX files per paragraph, so a hit can open
+    the place it was found. The index is brought up to date for a folder tree by
+    a DocumentIndexer; searches run on their own thread and stream their hits
+    back in batches.
+    """
+    def __init__(self, dispatcher, db_path=None):
+        self.dispatcher = dispatcher
+        self.db_path = db_path or app_data_path(DOC_INDEX_NAME)
+        self.indexer = None
+        conn = self.connect()
+        try:
+            conn.executescript(SCHEMA)
+        finally:
+            conn.close()
+
+    def connect(self):
+        """Opens a connection. SQLite connections are per thread, so every worker opens its own."""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @property
+    def is_indexing(self):
+        return self.indexer is not None and self.indexer.is_alive()
+
+    def refresh(self, root_path, on_progress=None, on_done=None):
+        """
+        Starts indexing a folder tree in the background, stopping the indexing of another one.
+        If the tree is already being indexed, the running indexer reports to the new callbacks.
+        """
+        if self.is_indexing:
+            if self.indexer.root_path == root_path:
+                self.indexer.on_progress = on_progress
+                self.indexer.on_done = on_done
+                return self.indexer
+            self.indexer.cancel()
+        self.indexer = DocumentIndexer(self, root_path, on_progress, on_done)
+        self.indexer.start()
+        return self.indexer
+
+    def search(self, text, root_path, on_results, on_done, max_results=SEARCH_MAX_RESULTS):
+        """
+        Starts a search of the documents below root_path and returns it. Hits arrive,
+        best first, as lists of (path, location, snippet).
+        """
+        return DocumentQuery(self, text, root_path, on_results, on_done, max_results).start()
+
+    def close(self):
+        """Stops a running indexer."""
+        if self.indexer:
+            self.indexer.cancel()
+
+class DocumentIndexer(threading.Thread):
+    """
+    Brings the index up to date with the documents below a folder.
+
+    The folder is walked on this thread. Only documents whose size or mtime
+    differ from the indexed ones are extracted, in batches of DOC_INDEX_BATCH
+    spread over a process pool, so a rebuild scales with the number of cores.
+    The results are written here, on a single connection. Documents that are
+    no longer on disk are dropped once the walk completes.
+    """
+    def __init__(self, index, root_path, on_progress=None, on_done=None, workers=None):
+        super().__init__(name="doc-indexer", daemon=True)
+        self.index = index
+        self.root_path = root_path
+        self.on_progress = on_progress
+        self.on_done = on_done
+        self.workers = workers or os.cpu_count() or 1
+        self.checked = 0
+        self.extracted = 0
+        self.cancel_event = threading.Event()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def post(self, callback, *args):
+        if callback:
+            self.index.dispatcher.post(callback, *args)
+
+    def iter_batches(self, indexed, seen):
+        """Walks the folder and yields batches of the documents that changed."""
+        batch = []
+        for dirpath, dirnames, filenames in os.walk(self.root_path):
+            if self.cancel_event.is_set():
+                return
+            dirnames[:] = [name for name in dirnames if name not in SKIPPED_DIRS]
+            for name in filenames:
+                if not name.lower().endswith(DOCUMENT_EXTENSIONS):
+                    continue
+                path = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                seen.add(path)
+                self.checked += 1
+                row = indexed.get(path)
+                if row is None or row[1:] != (st.st_size, st.st_mtime_ns):
+                    batch.append((path, st.st_size, st.st_mtime_ns))
+                    if len(batch) >= DOC_INDEX_BATCH:
+                        yield batch
+                        batch = []
+        if batch:
+            yield batch
+
+    def run(self):
+        started = time.monotonic()
+        removed = 0
+        error = None
+        conn = self.index.connect()
+        executor = concurrent.futures.ProcessPoolExecutor(max_workers=self.workers)
+        try:
+            low, high = subtree_bounds(self.root_path)
+            indexed = {path: (doc_id, size, mtime_ns) for doc_id, path, size, mtime_ns in conn.execute(
+                "SELECT id, path, size, mtime_ns FROM docs WHERE path >= ? AND path < ?", (low, high))}
+            seen = set()
+            pending = set()
+            batches = self.iter_batches(indexed, seen)
+            exhausted = False
+            while not self.cancel_event.is_set():
+                # Keep every worker busy without walking far ahead of them
+                while not exhausted and len(pending) < self.workers * 2:
+                    batch = next(batches, None)
+                    if batch is None:
+                        exhausted = True
+                        break
+                    pending.add(executor.submit(extract_batch, batch))
+                if not pending:
+                    break
+                done, pending = concurrent.futures.wait(
+                    pending, timeout=0.2, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    for path, size, mtime_ns, passages in future.result():
+                        self.store(conn, indexed.get(path), path, size, mtime_ns, passages)
+                        self.extracted += 1
+                if done:
+                    conn.commit()
+                    self.post(self.on_progress, self.checked, self.extracted)
+            if not self.cancel_event.is_set():
+                for path, (doc_id, _size, _mtime_ns) in indexed.items():
+                    if path not in seen:
+                        self.remove(conn, doc_id)
+                        removed += 1
+            conn.commit()
+        except Exception as e:
+            error = e
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+            conn.close()
+        if not self.cancel_event.is_set():
+            self.post(self.on_done, self.checked, self.extracted, removed, time.monotonic() - started, error)
+
+    def store(self, conn, row, path, size, mtime_ns, passages):
+        """Replaces the indexed text of a document."""
+        if row is None:
+            doc_id = conn.execute("INSERT INTO docs (path, size, mtime_ns) VALUES (?, ?, ?)",
+                                  (path, size, mtime_ns)).lastrowid
+        else:
+            doc_id = row[0]
+            conn.execute("DELETE FROM passages WHERE doc = ?", (doc_id,))
+            conn.execute("UPDATE docs SET size = ?, mtime_ns = ? WHERE id = ?", (size, mtime_ns, doc_id))
+        conn.executemany("INSERT INTO passages (doc, location, text) VALUES (?, ?, ?)",
+                         [(doc_id, location, text) for location, text in passages])
+
+    def remove(self, conn, doc_id):
+        conn.execute("DELETE FROM passages WHERE doc = ?", (doc_id,))
+        conn.execute("DELETE FROM docs WHERE id = ?", (doc_id,))
+
+class DocumentQuery(threading.Thread):
+    """Runs one search against the document index and streams the hits back in batches."""
+    BATCH_SIZE = 200
+
+    def __init__(self, index, text, root_path, on_results, on_done, max_results):
+        super().__init__(name="doc-index-query", daemon=True)
+        self.index = index
+        self.text = text
+        self.root_path = root_path
+        self.on_results = on_results
+        self.on_done = on_done
+        self.max_results = max_results
+        self.cancel_event = threading.Event()
+
+    def start(self):
+        super().start()
+        return self
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def deliver(self, callback, *args):
+        """Runs on the main thread, drops results of a cancelled search."""
+        if not self.cancel_event.is_set():
+            callback(*args)
+
+    def run(self):
+        match = build_match_query(self.text, column="text")
+        if not match:
+            self.index.dispatcher.post(self.deliver, self.on_done, 0, None)
+            return
+        low, high = subtree_bounds(self.root_path)
+        sql = ("SELECT d.path, p.location, snippet(passages_fts, 0, '', '', '…', 16) FROM passages_fts "
+               "JOIN passages p ON p.id = passages_fts.rowid JOIN docs d ON d.id = p.doc "
+               "WHERE passages_fts MATCH ? AND d.path >= ? AND d.path < ? ORDER BY rank LIMIT ?")
+        count = 0
+        error = None
+        conn = self.index.connect()
+        try:
+            cursor = conn.execute(sql, (match, low, high, self.max_results))
+            while not self.cancel_event.is_set():
+                rows = cursor.fetchmany(self.BATCH_SIZE)
+                if not rows:
+                    break
+                count += len(rows)
+                self.index.dispatcher.post(self.deliver, self.on_results, rows)
+        except sqlite3.Error as e:
+            error = e
+        finally:
+            conn.close()
+        self.index.dispatcher.post(self.deliver, self.on_done, count, error)
@@ -29,10 +29,13 @@ class DocxViewer:
         
         # Make the text widget read-only
         self.text_widget.config(state=tk.DISABLED)
+        self.text_widget.tag_configure("found", background="#FFF2A8")
         
         # Initialize variables
         self.current_docx_path = None
         self.docx_document = None
+        # Index of each paragraph shown in the document -> its first line in the text widget
+        self.paragraph_lines = {}
 
     def open_docx(self, path):
         """Opens the DOCX document."""
@@ -59,10 +62,12 @@ class DocxViewer:
             
             # Clear existing content
             self.text_widget.delete(1.0, tk.END)
+            self.paragraph_lines = {}
             
             # Extract and display paragraphs
-            for para in self.docx_document.paragraphs:
+            for index, para in enumerate(self.docx_document.paragraphs):
                 if para.text:
+                    self.paragraph_lines[index] = int(self.text_widget.index("end-1c").split(".")[0])
                     # Apply basic formatting
                     if para.style.name.startswith('Heading'):
                         self.text_widget.insert(tk.END, para.text + "\n", "heading")
@@ -85,6 +90,16 @@ class DocxViewer:
         except Exception as e:
             messagebox.showerror("Error", f"Error displaying document: {str(e)}")
     
+    def goto_paragraph(self, index):
+        """Scrolls to a paragraph, by its index in the document, and highlights it."""
+        line = self.paragraph_lines.get(index)
+        if line is None:
+            return
+        length = len(self.docx_document.paragraphs[index].text)
+        self.text_widget.tag_remove("found", "1.0", tk.END)
+        self.text_widget.tag_add("found", f"{line}.0", f"{line}.0 + {length} chars")
+        self.text_widget.see(f"{line}.0")
+
     def close_docx(self):
         """Closes the DOCX document and resets the viewer."""
         # Enable editing to clear content
@@ -94,6 +109,7 @@ class DocxViewer:
         
         self.current_docx_path = None
         self.docx_document = None
+        self.paragraph_lines = {}
         
         # Hide the close button
         self.close_button.pack_forget()
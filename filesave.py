@@ -0,0 +1,119 @@
+import codecs
+import io
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+class FileSaver:
+    """
+    Writes a text snapshot to a file atomically on a worker thread.
+
+    The text is encoded chunk by chunk into a temporary file in the same folder,
+    with "\\n" turned into the given line ending. The temporary file gets the
+    permissions of the file it replaces, is flushed to disk with fsync and then
+    renamed over the target with os.replace, so a crash at any point leaves either
+    the old or the new file, never a truncated one. When no temporary file can be
+    created in the folder, an existing file is overwritten in place instead.
+    on_progress(chars_written, total_chars) and on_done(error) run on the main
+    thread; error is None on success.
+    """
+    def __init__(self, path, text, dispatcher, on_done, on_progress=None, encoding="utf-8",
+                 newline="\n", chunk_chars=1024 * 1024):
+        self.path = path
+        self.text = text
+        self.dispatcher = dispatcher
+        self.on_done = on_done
+        self.on_progress = on_progress
+        self.encoding = encoding
+        self.newline = newline
+        self.chunk_chars = chunk_chars
+        self.error = None
+        self._thread = threading.Thread(target=self._run, name=f"save:{path}", daemon=True)
+
+    def start(self):
+        """Starts writing in the background."""
+        self._thread.start()
+        return self
+
+    def join(self):
+        """Waits until the file is written. The result is in self.error."""
+        self._thread.join()
+
+    def is_alive(self):
+        return self._thread.is_alive()
+
+    def _run(self):
+        """Worker thread body."""
+        folder = os.path.dirname(os.path.abspath(self.path))
+        temp_path = None
+        try:
+            try:
+                fd, temp_path = tempfile.mkstemp(prefix=f".{os.path.basename(self.path)}.", suffix=".tmp",
+                                                 dir=folder)
+            except OSError:
+                # A writable file in a folder we cannot create files in is written in place
+                if not os.path.exists(self.path):
+                    raise
+                self.write_in_place()
+            else:
+                with os.fdopen(fd, "wb") as file:
+                    self.write(file)
+                    file.flush()
+                    os.fsync(file.fileno())
+                if os.path.exists(self.path):
+                    shutil.copymode(self.path, temp_path)
+                os.replace(temp_path, self.path)
+                self.sync_folder(folder)
+        except (OSError, UnicodeError) as e:
+            self.error = e
+            if temp_path is not None:
+                try:
+                    os.remove(temp_path)
+                except OSError:
+                    pass
+        self.dispatcher.post(self.on_done, self.error)
+
+    def write_in_place(self):
+        """
+        Overwrites the file directly. Not atomic: the text is encoded in memory first,
+        so at least an encoding error cannot leave the file truncated.
+        """
+        encoded = io.BytesIO()
+        self.write(encoded)
+        with open(self.path, "r+b") as file:
+            file.write(encoded.getbuffer())
+            file.truncate()
+            file.flush()
+            os.fsync(file.fileno())
+
+    def write(self, file):
+        """Encodes the text into an open binary file."""
+        encoder = codecs.getincrementalencoder(self.encoding)()
+        total = len(self.text)
+        last_post = time.monotonic()
+        for start in range(0, total, self.chunk_chars):
+            chunk = self.text[start:start + self.chunk_chars]
+            if self.newline != "\n":
+                chunk = chunk.replace("\n", self.newline)
+            file.write(encoder.encode(chunk))
+            now = time.monotonic()
+            if self.on_progress and now - last_post >= 0.1:
+                last_post = now
+                self.dispatcher.post(self.on_progress, min(total, start + self.chunk_chars), total)
+        file.write(encoder.encode("", final=True))
+
+    @staticmethod
+    def sync_folder(folder):
+        """Makes the rename durable where folders can be opened and fsynced."""
+        try:
+            fd = os.open(folder, os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
@@ -0,0 +1,146 @@
+import re
+import tkinter as tk
+from tkinter import ttk
+
+class FindDialog:
+    """
+    A non-modal Find and Replace window driving the FindEngine of a text editor.
+
+    The search is incremental: while the pattern is typed, the first match after
+    the position the cursor had when the window was opened is selected, the visible
+    matches are highlighted and the total is counted in the background.
+    """
+    def __init__(self, root, editor, replace=False, typing_delay_ms=150):
+        self.editor = editor
+        self.engine = editor.finder
+        self.engine.on_count = self.on_count
+        self.engine.on_status = self.set_status
+        self.typing_delay_ms = typing_delay_ms
+        self.query_job = None
+        self.anchor = editor.text_widget.index("insert")
+
+        self.window = tk.Toplevel(root)
+        self.window.title("Find and Replace")
+        self.window.resizable(True, False)
+        self.window.transient(root)
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+        self.window.bind("<Escape>", lambda e: self.close())
+
+        # Create the pattern and replacement fields
+        fields = ttk.Frame(self.window)
+        fields.pack(side="left", fill="both", expand=True, padx=5, pady=5)
+        fields.columnconfigure(1, weight=1)
+        ttk.Label(fields, text="Find:").grid(row=0, column=0, sticky="w")
+        self.find_var = tk.StringVar(value=self.engine.pattern)
+        self.find_entry = ttk.Entry(fields, textvariable=self.find_var, width=40)
+        self.find_entry.grid(row=0, column=1, sticky="ew", pady=2)
+        self.find_entry.bind("<Return>", lambda e: self.find_next())
+        self.find_entry.bind("<Shift-Return>", lambda e: self.find_next(backward=True))
+        ttk.Label(fields, text="Replace:").grid(row=1, column=0, sticky="w")
+        self.replace_var = tk.StringVar()
+        self.replace_entry = ttk.Entry(fields, textvariable=self.replace_var, width=40)
+        self.replace_entry.grid(row=1, column=1, sticky="ew", pady=2)
+        self.replace_entry.bind("<Return>", lambda e: self.replace())
+
+        # Create the option checkboxes
+        options = ttk.Frame(fields)
+        options.grid(row=2, column=0, columnspan=2, sticky="w")
+        self.option_vars = {}
+        for name, label in [("regex", "Regular expression"), ("match_case", "Match case"), ("whole_word", "Whole word")]:
+            self.option_vars[name] = tk.BooleanVar(value=self.engine.options.get(name, False))
+            ttk.Checkbutton(options, text=label, variable=self.option_vars[name],
+                            command=self.update_query).pack(side="left")
+
+        # Create the status line: messages on the left, the match count on the right
+        status = ttk.Frame(fields)
+        status.grid(row=3, column=0, columnspan=2, sticky="ew")
+        self.status_label = ttk.Label(status, text="")
+        self.status_label.pack(side="left")
+        self.count_label = ttk.Label(status, text="")
+        self.count_label.pack(side="right")
+
+        # Create the buttons
+        buttons = ttk.Frame(self.window)
+        buttons.pack(side="right", fill="y", padx=5, pady=5)
+        ttk.Button(buttons, text="Find Next", command=self.find_next).pack(fill="x")
+        ttk.Button(buttons, text="Find Previous", command=lambda: self.find_next(backward=True)).pack(fill="x")
+        ttk.Button(buttons, text="Replace", command=self.replace).pack(fill="x")
+        ttk.Button(buttons, text="Replace All", command=self.replace_all).pack(fill="x")
+        ttk.Button(buttons, text="Close", command=self.close).pack(fill="x")
+
+        self.find_var.trace_add("write", lambda *args: self.schedule_query())
+        self.show(replace)
+
+    def show(self, replace=False):
+        """Brings the window up with the pattern or the replacement field focused."""
+        if not self.window.winfo_viewable():
+            self.anchor = self.editor.text_widget.index("insert")
+            if self.find_var.get():
+                self.update_query()
+        self.window.deiconify()
+        self.window.lift()
+        entry = self.replace_entry if replace else self.find_entry
+        entry.focus_set()
+        entry.select_range(0, "end")
+
+    def exists(self):
+        try:
+            return bool(self.window.winfo_exists())
+        except tk.TclError:
+            return False
+
+    def schedule_query(self):
+        """Applies the pattern once typing pauses."""
+        if self.query_job is not None:
+            self.window.after_cancel(self.query_job)
+        self.query_job = self.window.after(self.typing_delay_ms, self.update_query)
+
+    def update_query(self):
+        """Hands the pattern and options to the engine and selects the first match from the anchor."""
+        self.query_job = None
+        options = {name: var.get() for name, var in self.option_vars.items()}
+        try:
+            self.engine.set_query(self.find_var.get(), **options)
+        except re.error as e:
+            self.engine.clear()
+            self.set_status(f"Invalid pattern: {e}")
+            return
+        self.set_status("")
+        if self.find_var.get():
+            self.engine.find_next(start=self.anchor)
+
+    def find_next(self, backward=False):
+        if self.query_job is not None:
+            self.window.after_cancel(self.query_job)
+            self.update_query()
+        self.set_status("")
+        self.engine.find_next(backward=backward)
+        self.anchor = self.editor.text_widget.index("insert")
+
+    def replace(self):
+        self.set_status("")
+        self.engine.replace_current(self.replace_var.get())
+        self.anchor = self.editor.text_widget.index("insert")
+
+    def replace_all(self):
+        self.engine.replace_all(self.replace_var.get())
+
+    def on_count(self, count):
+        if count is None:
+            self.count_label.configure(text="")
+        elif count == 0:
+            self.count_label.configure(text="No matches")
+        else:
+            self.count_label.configure(text=f"{count:,} match{'es' if count != 1 else ''}")
+
+    def set_status(self, message):
+        self.status_label.configure(text=message)
+
+    def close(self):
+        """Hides the window and removes the highlights. The pattern is kept for the next show()."""
+        if self.query_job is not None:
+            self.window.after_cancel(self.query_job)
+            self.query_job = None
+        self.engine.clear()
+        self.on_count(None)
+        self.window.withdraw()
@@ -0,0 +1,347 @@
+import functools
+import re
+import threading
+
+from largefile import LargeFileSearch
+from workers import dispatcher_for
+
+# Lines fetched from Tk per step when looking for the next match
+FIND_CHUNK_LINES = 2000
+
+@functools.lru_cache(maxsize=16)
+def compile_search(pattern, regex=False, match_case=True, whole_word=False):
+    """Compiles the find options into a regex. Raises re.error for an invalid pattern."""
+    source = pattern if regex else re.escape(pattern)
+    if whole_word:
+        source = rf"\b(?:{source})\b"
+    return re.compile(source, re.MULTILINE | (0 if match_case else re.IGNORECASE))
+
+class MatchCounter:
+    """Counts the non-empty matches of a regex in a text snapshot on a worker thread."""
+    def __init__(self, text, regex, dispatcher, on_done):
+        self.text = text
+        self.regex = regex
+        self.dispatcher = dispatcher
+        self.on_done = on_done
+        self._cancel_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="find-count", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        self._cancel_event.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    def _run(self):
+        """Worker thread body."""
+        count = 0
+        for match in self.regex.finditer(self.text):
+            if self.cancelled:
+                return
+            if match.end() > match.start():
+                count += 1
+        self.dispatcher.post(self._deliver, count)
+
+    def _deliver(self, count):
+        if not self.cancelled:
+            self.on_done(count)
+
+class FindEngine:
+    """
+    Find and replace for a TextEditor.
+
+    Patterns are compiled once per set of options into a Python regex, so literal
+    text, regular expressions, case and whole-word matching all go through the same
+    code. Looking for the next match reads the buffer from the cursor a chunk of
+    lines at a time and stops at the first hit. Matches are counted over a snapshot
+    of the whole buffer on a worker thread, but the highlight tag is only added to
+    the lines in view and redone as the view scrolls, so even 100k matches cost Tk
+    a handful of tag ranges. Replace All substitutes every match in one edit that
+    is undone in a single step. on_count(count) reports the number of matches, or
+    None when there is no pattern or no count, and on_status(message) the outcome
+    of finding and replacing.
+    """
+    TAG = "find_match"
+
+    def __init__(self, editor, on_count=None, on_status=None, count_delay_ms=300):
+        self.editor = editor
+        self.widget = editor.text_widget
+        self.proxy = editor.text_proxy
+        self.on_count = on_count
+        self.on_status = on_status
+        self.count_delay_ms = count_delay_ms
+        self.regex = None
+        self.pattern = ""
+        self.options = {}
+        self.highlight_job = None
+        self.count_job = None
+        self.counter = None
+        self.search = None
+        self.widget.tag_configure(self.TAG, background="#FFE58F")
+        self.widget.tag_raise("sel", self.TAG)
+        self.proxy.add_scroll_listener(self.schedule_highlight)
+        self.proxy.add_change_listener(self.on_change)
+        self.widget.bind("<Configure>", self.schedule_highlight, add="+")
+
+    def report(self, message):
+        if self.on_status:
+            self.on_status(message)
+
+    def set_query(self, pattern, regex=False, match_case=True, whole_word=False):
+        """Sets the pattern to find. Raises re.error for an invalid pattern."""
+        self.regex = compile_search(pattern, regex, match_case, whole_word) if pattern else None
+        self.pattern = pattern
+        self.options = dict(regex=regex, match_case=match_case, whole_word=whole_word)
+        self.schedule_highlight()
+        self.schedule_count(0)
+
+    def clear(self):
+        """Forgets the pattern and removes the highlights."""
+        self.regex = None
+        self.pattern = ""
+        if self.counter:
+            self.counter.cancel()
+            self.counter = None
+        if self.search:
+            self.search.cancel()
+            self.search = None
+            if self.editor.large_file is not None:
+                self.editor.set_status()
+        self.proxy.call("tag", "remove", self.TAG, "1.0", "end")
+
+    def on_change(self, start, removed, added):
+        if self.regex is not None:
+            self.schedule_count(self.count_delay_ms)
+
+    def schedule_highlight(self, event=None):
+        if self.highlight_job is None:
+            self.highlight_job = self.widget.after_idle(self.highlight_viewport)
+
+    def highlight_viewport(self):
+        """Tags the matches in the visible lines only."""
+        self.highlight_job = None
+        self.proxy.call("tag", "remove", self.TAG, "1.0", "end")
+        if self.regex is None:
+            return
+        first = int(self.proxy.call("index", "@0,0").split(".")[0])
+        last = int(self.proxy.call("index", f"@0,{self.widget.winfo_height()}").split(".")[0])
+        text = self.get_lines(first, last - first + 1)
+        ranges = []
+        for match in self.regex.finditer(text):
+            if match.end() > match.start():
+                ranges.extend((self.to_index(first, text, match.start()), self.to_index(first, text, match.end())))
+        if ranges:
+            self.proxy.call("tag", "add", self.TAG, *ranges)
+
+    def schedule_count(self, delay):
+        """Recounts the matches after delay, once however often this is called meanwhile."""
+        if self.count_job is not None:
+            self.widget.after_cancel(self.count_job)
+        self.count_job = self.widget.after(delay, self.count_matches)
+
+    def count_matches(self):
+        """Starts counting the matches of the whole buffer in the background."""
+        self.count_job = None
+        if self.counter:
+            self.counter.cancel()
+            self.counter = None
+        if self.regex is None or self.editor.large_file is not None:
+            # Large files are never loaded whole, matches are only found one at a time
+            self.on_counted(None)
+            return
+        text = self.proxy.call("get", "1.0", "end-1c")
+        self.counter = MatchCounter(text, self.regex, dispatcher_for(self.widget), self.on_counted).start()
+
+    def on_counted(self, count):
+        self.counter = None
+        if self.on_count:
+            self.on_count(count)
+
+    def last_line(self):
+        return int(self.proxy.call("index", "end-1c").split(".")[0])
+
+    def get_lines(self, first, count):
+        return self.proxy.call("get", f"{first}.0", f"{first + count - 1}.0 lineend")
+
+    @staticmethod
+    def to_index(first_line, text, offset):
+        """Converts an offset into text read from first_line into a Tk index."""
+        line = first_line + text.count("\n", 0, offset)
+        column = offset - (text.rfind("\n", 0, offset) + 1)
+        return f"{line}.{column}"
+
+    @staticmethod
+    def position(index):
+        line, column = index.split(".")
+        return int(line), int(column)
+
+    def find_next(self, backward=False, start=None):
+        """
+        Selects the next match after the selection or cursor, or after start if given,
+        wrapping around the end. In large-file mode the search runs in the background.
+        """
+        if self.regex is None:
+            return
+        if start is None:
+            if self.widget.tag_ranges("sel"):
+                start = self.widget.index("sel.first" if backward else "sel.last")
+            else:
+                start = self.widget.index("insert")
+        if self.editor.large_file is not None:
+            self.find_in_large_file(start, backward)
+            return
+        line, column = self.position(self.widget.index(start))
+        span = self.search_backward(line, column) if backward else self.search_forward(line, column)
+        if span is None:
+            self.report(f"Cannot find \"{self.pattern}\"")
+            return
+        self.select(*span)
+
+    def select(self, start, end):
+        self.widget.mark_set("insert", end)
+        self.widget.tag_remove("sel", "1.0", "end")
+        self.widget.tag_add("sel", start, end)
+        self.widget.see(start)
+
+    def search_forward(self, line, column):
+        """Returns the (start, end) indices of the first match after line.column, wrapping around."""
+        last_line = self.last_line()
+        for wrapped, (first, stop) in enumerate(((line, last_line), (1, line))):
+            chunk_line = first
+            while chunk_line <= stop:
+                count = min(FIND_CHUNK_LINES, stop - chunk_line + 1)
+                text = self.get_lines(chunk_line, count)
+                pos = column if chunk_line == line and not wrapped else 0
+                for match in self.regex.finditer(text, pos):
+                    if match.end() > match.start():
+                        return (self.to_index(chunk_line, text, match.start()),
+                                self.to_index(chunk_line, text, match.end()))
+                chunk_line += count
+        return None
+
+    def search_backward(self, line, column):
+        """Returns the (start, end) indices of the last match before line.column, wrapping around."""
+        last_line = self.last_line()
+        for wrapped, (first, stop) in enumerate(((line, 1), (last_line, line))):
+            chunk_last = first
+            while chunk_last >= stop:
+                chunk_line = max(stop, chunk_last - FIND_CHUNK_LINES + 1)
+                text = self.get_lines(chunk_line, chunk_last - chunk_line + 1)
+                limit = len(text)
+                if chunk_last == line and not wrapped:
+                    limit = text.rfind("\n") + 1 + column
+                last = None
+                for match in self.regex.finditer(text, 0, limit):
+                    if match.end() > match.start():
+                        last = match
+                if last:
+                    return (self.to_index(chunk_line, text, last.start()),
+                            self.to_index(chunk_line, text, last.end()))
+                chunk_last = chunk_line - 1
+        return None
+
+    def find_in_large_file(self, start, backward):
+        """Searches the whole large file on a worker thread, see LargeFileSearch."""
+        editor = self.editor
+        large_file = editor.large_file
+        line, column = self.position(self.widget.index(start))
+        prefix = self.widget.get(f"{line}.0", f"{line}.{column}").encode(large_file.encoding, errors="replace")
+        offset = (large_file.offset_of_line(editor.window_first + line - 1) or 0) + len(prefix)
+        pattern = self.pattern
+
+        def on_done(span):
+            self.search = None
+            editor.set_status()
+            if span is None:
+                self.report(f"Cannot find \"{pattern}\"")
+                return
+            match_line = large_file.line_at_offset(span[0])
+            line_start = large_file.offset_of_line(match_line)
+            match_column = len(large_file.data[line_start:span[0]].decode(large_file.encoding, errors="replace"))
+            length = len(large_file.data[span[0]:span[1]].decode(large_file.encoding, errors="replace"))
+            editor.goto_line(match_line, match_column, length, focus=False)
+            self.report("")
+
+        if self.search:
+            self.search.cancel()
+        self.search = LargeFileSearch(large_file, pattern, dispatcher_for(self.widget), on_done,
+                                      start=offset, backward=backward, **self.options).start()
+        editor.set_status(f"Searching for \"{pattern}\"…")
+        self.report("Searching…")
+
+    def expand(self, match, replacement):
+        """Returns the text replacing a match; group references only apply to regexes."""
+        return match.expand(replacement) if self.options.get("regex") else replacement
+
+    def replace_current(self, replacement):
+        """Replaces the selection if it is a match, then selects the next match."""
+        if self.regex is None:
+            return
+        if self.editor.large_file is not None:
+            self.report("Large files are read-only")
+            return
+        if self.widget.tag_ranges("sel"):
+            start, end = self.widget.index("sel.first"), self.widget.index("sel.last")
+            match = self.regex.fullmatch(self.widget.get(start, end))
+            if match:
+                try:
+                    text = self.expand(match, replacement)
+                except (re.error, IndexError) as e:
+                    self.report(f"Invalid replacement: {e}")
+                    return
+                self.widget.replace(start, end, text)
+                self.widget.mark_set("insert", f"{start}+{len(text)}c")
+                self.widget.tag_remove("sel", "1.0", "end")
+        self.find_next()
+
+    def replace_all(self, replacement):
+        """Replaces every match in one edit, undone as a single step. Returns the number replaced."""
+        if self.regex is None:
+            return 0
+        if self.editor.large_file is not None:
+            self.report("Large files are read-only")
+            return 0
+        text = self.proxy.call("get", "1.0", "end-1c")
+        replaced = []
+
+        def substitute(match):
+            if match.end() == match.start():
+                return ""
+            if not replaced:
+                replaced.append(match.start())
+            replaced.append(match.end())
+            return self.expand(match, replacement)
+        try:
+            new_text = self.regex.sub(substitute, text)
+        except (re.error, IndexError) as e:
+            self.report(f"Invalid replacement: {e}")
+            return 0
+        if not replaced:
+            self.report(f"Cannot find \"{self.pattern}\"")
+            return 0
+
+        # Only the lines from the first to the last match are replaced in the widget
+        region_start = text.rfind("\n", 0, replaced[0]) + 1
+        region_end = text.find("\n", replaced[-1])
+        if region_end < 0:
+            region_end = len(text)
+        new_region = new_text[region_start:len(new_text) - (len(text) - region_end)]
+        first_line = text.count("\n", 0, region_start) + 1
+        last_line = first_line + text.count("\n", region_start, region_end)
+
+        self.widget.configure(autoseparators=False)
+        try:
+            self.widget.edit_separator()
+            self.widget.replace(f"{first_line}.0", f"{last_line}.0 lineend", new_region)
+            self.widget.edit_separator()
+        finally:
+            self.widget.configure(autoseparators=True)
+        self.widget.mark_set("insert", f"{first_line}.0")
+        count = len(replaced) - 1
+        self.report(f"Replaced {count:,} match{'es' if count != 1 else ''}")
+        return count
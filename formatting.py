@@ -0,0 +1,6 @@
+def format_size(size):
+    """Formats a byte count for display, e.g. 1536 -> "1.5 KB"."""
+    for unit in ("bytes", "KB", "MB", "GB", "TB"):
+        if size < 1024 or unit == "TB":
+            return f"{size:,} {unit}" if unit == "bytes" else f"{size:.1f} {unit}"
+        size /= 1024
@@ -0,0 +1,244 @@
+import os
+import sqlite3
+import threading
+import time
+
+from config import app_data_path, FILE_INDEX_NAME, FILE_INDEX_ROOTS, SEARCH_MAX_RESULTS
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS dirs (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    parent TEXT NOT NULL,
+    name TEXT NOT NULL,
+    is_dir INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS files_parent ON files(parent);
+CREATE VIRTUAL TABLE IF NOT EXISTS files_fts USING fts5(
+    name, path, content='files', content_rowid='id', prefix='2 3'
+);
+CREATE TRIGGER IF NOT EXISTS files_ai AFTER INSERT ON files BEGIN
+    INSERT INTO files_fts(rowid, name, path) VALUES (new.id, new.name, new.path);
+END;
+CREATE TRIGGER IF NOT EXISTS files_ad AFTER DELETE ON files BEGIN
+    INSERT INTO files_fts(files_fts, rowid, name, path) VALUES ('delete', old.id, old.name, old.path);
+END;
+"""
+
+def build_match_query(text, column="name"):
+    """Turns free text into an FTS5 query matching every word as a prefix of a token in column."""
+    words = [word.replace('"', '""') for word in text.split()]
+    return " AND ".join(f'{column} : "{word}"*' for word in words)
+
+def subtree_bounds(path):
+    """Returns the (low, high) path range holding everything below path."""
+    prefix = path.rstrip(os.sep) + os.sep
+    return prefix, prefix[:-1] + chr(ord(os.sep) + 1)
+
+class FileIndex:
+    """
+    A persistent SQLite index of file and folder names, searchable through FTS5.
+
+    The index is filled and kept up to date by an IndexCrawler running in the
+    background; searches run on their own thread and stream their hits back in
+    batches, so a query over millions of files never walks the disk.
+    """
+    def __init__(self, dispatcher, db_path=None, roots=None):
+        self.dispatcher = dispatcher
+        self.db_path = db_path or app_data_path(FILE_INDEX_NAME)
+        self.roots = roots or FILE_INDEX_ROOTS
+        self.crawler = None
+        conn = self.connect()
+        try:
+            conn.executescript(SCHEMA)
+        finally:
+            conn.close()
+
+    def connect(self):
+        """Opens a connection. SQLite connections are per thread, so every worker opens its own."""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @property
+    def is_crawling(self):
+        return self.crawler is not None and self.crawler.is_alive()
+
+    def refresh(self, on_progress=None, on_done=None):
+        """
+        Starts bringing the index up to date in the background. If that is already
+        running, the running crawl reports to the new callbacks instead.
+        """
+        if self.is_crawling:
+            self.crawler.on_progress = on_progress
+            self.crawler.on_done = on_done
+        else:
+            self.crawler = IndexCrawler(self, on_progress, on_done)
+            self.crawler.start()
+        return self.crawler
+
+    def search(self, text, on_results, on_done, dirs_only=False, max_results=SEARCH_MAX_RESULTS):
+        """Starts a search and returns it. Hits arrive as lists of (path, name, is_dir, size, mtime_ns)."""
+        return IndexQuery(self, text, on_results, on_done, dirs_only, max_results).start()
+
+    def close(self):
+        """Stops a running crawl."""
+        if self.crawler:
+            self.crawler.cancel()
+
+class IndexCrawler(threading.Thread):
+    """
+    Brings the index up to date with the disk.
+
+    Every folder is stat'ed, but only folders whose mtime differs from the one
+    recorded in the index are listed again; their listing is diffed against the
+    indexed rows. Symbolic links to folders are indexed but not followed.
+    """
+    COMMIT_EVERY = 200
+
+    def __init__(self, index, on_progress=None, on_done=None):
+        super().__init__(name="file-index-crawler", daemon=True)
+        self.index = index
+        self.on_progress = on_progress
+        self.on_done = on_done
+        self.cancel_event = threading.Event()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def post(self, callback, *args):
+        if callback:
+            self.index.dispatcher.post(callback, *args)
+
+    def run(self):
+        conn = self.index.connect()
+        visited = 0
+        relisted = 0
+        started = time.monotonic()
+        try:
+            pending = list(self.index.roots)
+            while pending and not self.cancel_event.is_set():
+                path = pending.pop()
+                try:
+                    mtime_ns = os.stat(path).st_mtime_ns
+                except OSError:
+                    self.delete_subtree(conn, path)
+                    continue
+                row = conn.execute("SELECT mtime_ns FROM dirs WHERE path = ?", (path,)).fetchone()
+                if row and row[0] == mtime_ns:
+                    subdirs = [r[0] for r in conn.execute(
+                        "SELECT path FROM files WHERE parent = ? AND is_dir = 1", (path,))]
+                else:
+                    subdirs = self.reindex_dir(conn, path, mtime_ns)
+                    relisted += 1
+                pending.extend(subdirs)
+                visited += 1
+                if visited % self.COMMIT_EVERY == 0:
+                    conn.commit()
+                    self.post(self.on_progress, visited, relisted)
+            conn.commit()
+        except sqlite3.Error as e:
+            print(f"Error updating file index: {e}")
+        finally:
+            conn.close()
+        if not self.cancel_event.is_set():
+            self.post(self.on_done, visited, relisted, time.monotonic() - started)
+
+    def reindex_dir(self, conn, path, mtime_ns):
+        """Diffs one folder against its indexed rows and returns the subfolders to crawl."""
+        found = {}
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    try:
+                        is_dir = entry.is_dir(follow_symlinks=False)
+                        st = entry.stat(follow_symlinks=False)
+                        found[entry.name] = (entry.path, int(is_dir), st.st_size, st.st_mtime_ns)
+                    except OSError:
+                        continue
+        except OSError:
+            pass  # Unreadable folders are recorded as empty
+        indexed = {name: (is_dir, size, mtime) for name, is_dir, size, mtime in conn.execute(
+            "SELECT name, is_dir, size, mtime_ns FROM files WHERE parent = ?", (path,))}
+
+        for name, (is_dir, _size, _mtime) in indexed.items():
+            if name not in found or found[name][1] != is_dir:
+                self.delete_subtree(conn, os.path.join(path, name))
+                indexed[name] = None
+        conn.executemany(
+            "INSERT INTO files (path, parent, name, is_dir, size, mtime_ns) VALUES (?, ?, ?, ?, ?, ?)",
+            [(entry_path, path, name, is_dir, size, mtime)
+             for name, (entry_path, is_dir, size, mtime) in found.items() if indexed.get(name) is None])
+        conn.executemany(
+            "UPDATE files SET size = ?, mtime_ns = ? WHERE path = ?",
+            [(size, mtime, entry_path)
+             for name, (entry_path, is_dir, size, mtime) in found.items()
+             if indexed.get(name) is not None and indexed[name][1:] != (size, mtime)])
+        conn.execute("INSERT OR REPLACE INTO dirs (path, mtime_ns) VALUES (?, ?)", (path, mtime_ns))
+        return [entry_path for entry_path, is_dir, _size, _mtime in found.values() if is_dir]
+
+    def delete_subtree(self, conn, path):
+        """Removes a path and everything indexed below it."""
+        low, high = subtree_bounds(path)
+        conn.execute("DELETE FROM files WHERE path = ? OR (path >= ? AND path < ?)", (path, low, high))
+        conn.execute("DELETE FROM dirs WHERE path = ? OR (path >= ? AND path < ?)", (path, low, high))
+
+class IndexQuery(threading.Thread):
+    """Runs one search against the index and streams the hits back in batches."""
+    BATCH_SIZE = 200
+
+    def __init__(self, index, text, on_results, on_done, dirs_only, max_results):
+        super().__init__(name="file-index-query", daemon=True)
+        self.index = index
+        self.text = text
+        self.on_results = on_results
+        self.on_done = on_done
+        self.dirs_only = dirs_only
+        self.max_results = max_results
+        self.cancel_event = threading.Event()
+
+    def start(self):
+        super().start()
+        return self
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def deliver(self, callback, *args):
+        """Runs on the main thread, drops results of a cancelled search."""
+        if not self.cancel_event.is_set():
+            callback(*args)
+
+    def run(self):
+        match = build_match_query(self.text)
+        if not match:
+            self.index.dispatcher.post(self.deliver, self.on_done, 0, None)
+            return
+        sql = ("SELECT f.path, f.name, f.is_dir, f.size, f.mtime_ns FROM files_fts "
+               "JOIN files f ON f.id = files_fts.rowid WHERE files_fts MATCH ?")
+        if self.dirs_only:
+            sql += " AND f.is_dir = 1"
+        sql += " LIMIT ?"
+        count = 0
+        error = None
+        conn = self.index.connect()
+        try:
+            cursor = conn.execute(sql, (match, self.max_results))
+            while not self.cancel_event.is_set():
+                rows = cursor.fetchmany(self.BATCH_SIZE)
+                if not rows:
+                    break
+                count += len(rows)
+                self.index.dispatcher.post(self.deliver, self.on_results, rows)
+        except sqlite3.Error as e:
+            error = e
+        finally:
+            conn.close()
+        self.index.dispatcher.post(self.deliver, self.on_done, count, error)
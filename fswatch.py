@@ -0,0 +1,265 @@
+import abc
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import time
+
+class DirectoryWatcher(abc.ABC):
+    """
+    Base class for watching a set of directories for entries being created, deleted or changed.
+
+    Changes are coalesced on a worker thread: a burst of events (a ``git checkout``
+    touching thousands of files, say) is delivered as one call to
+    on_changes({directory: set_of_names}) on the Tk main thread, once no new event
+    has arrived for ``quiet_period`` seconds or ``max_delay`` seconds after the first
+    event of the burst. A value of None instead of a set of names means the watcher
+    lost track of that directory and it has to be listed again.
+    """
+    def __init__(self, dispatcher, on_changes, quiet_period=0.1, max_delay=1.0):
+        self.dispatcher = dispatcher
+        self.on_changes = on_changes
+        self.quiet_period = quiet_period
+        self.max_delay = max_delay
+        self.lock = threading.Lock()
+        self.watch_counts = {}  # path -> number of tree nodes watching it
+        self.pending = {}
+        self.first_event = None
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._run, name=type(self).__name__, daemon=True)
+        self.thread.start()
+
+    def watch(self, path):
+        """Starts watching path. Calls are reference counted."""
+        with self.lock:
+            count = self.watch_counts.get(path, 0)
+            self.watch_counts[path] = count + 1
+            if count:
+                return
+        try:
+            self._add(path)
+        except OSError as e:
+            print(f"Cannot watch {path}: {e}")
+
+    def unwatch(self, path):
+        """Stops watching path once every watch() has been matched by an unwatch()."""
+        with self.lock:
+            count = self.watch_counts.get(path, 0) - 1
+            if count > 0:
+                self.watch_counts[path] = count
+                return
+            self.watch_counts.pop(path, None)
+            self.pending.pop(path, None)
+        self._remove(path)
+
+    @property
+    def watched_paths(self):
+        with self.lock:
+            return list(self.watch_counts)
+
+    def close(self):
+        """Stops the worker thread and drops all watches."""
+        self.stop_event.set()
+
+    def _record(self, path, name):
+        """Adds a change to the pending burst. Called from the worker thread."""
+        with self.lock:
+            if path not in self.watch_counts:
+                return
+            if name is None:
+                self.pending[path] = None
+            else:
+                names = self.pending.setdefault(path, set())
+                if names is not None:
+                    names.add(name)
+            if self.first_event is None:
+                self.first_event = time.monotonic()
+
+    def _flush(self, quiet):
+        """Hands the pending burst to the main thread once it has settled."""
+        with self.lock:
+            if not self.pending:
+                return
+            if not quiet and time.monotonic() - self.first_event < self.max_delay:
+                return
+            changes = self.pending
+            self.pending = {}
+            self.first_event = None
+        self.dispatcher.post(self.on_changes, changes)
+
+    @abc.abstractmethod
+    def _add(self, path):
+        """Starts watching a path. May raise OSError."""
+
+    @abc.abstractmethod
+    def _remove(self, path):
+        """Stops watching a path."""
+
+    @abc.abstractmethod
+    def _run(self):
+        """Worker thread body: records changes until stop_event is set."""
+
+class InotifyWatcher(DirectoryWatcher):
+    """Watches directories with Linux inotify, called through ctypes."""
+    IN_MODIFY = 0x00000002
+    IN_ATTRIB = 0x00000004
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_ONLYDIR = 0x01000000
+    IN_NONBLOCK = 0x00000800
+    IN_CLOEXEC = 0x00080000
+    WATCH_MASK = (IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_CLOSE_WRITE
+                  | IN_ATTRIB | IN_ONLYDIR)
+    EVENT_HEADER = struct.Struct("iIII")
+
+    def __init__(self, dispatcher, on_changes, **kwargs):
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = self.libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self.fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        self.wd_paths = {}  # watch descriptor -> path
+        self.path_wds = {}  # path -> watch descriptor
+        super().__init__(dispatcher, on_changes, **kwargs)
+
+    def _add(self, path):
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), self.WATCH_MASK)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno), path)
+        with self.lock:
+            self.wd_paths[wd] = path
+            self.path_wds[path] = wd
+
+    def _remove(self, path):
+        with self.lock:
+            wd = self.path_wds.pop(path, None)
+            if wd is None:
+                return
+            self.wd_paths.pop(wd, None)
+        self.libc.inotify_rm_watch(self.fd, wd)
+
+    def _run(self):
+        try:
+            while not self.stop_event.is_set():
+                timeout = self.quiet_period if self.pending else 0.5
+                readable, _, _ = select.select([self.fd], [], [], timeout)
+                if not readable:
+                    self._flush(quiet=True)
+                    continue
+                try:
+                    data = os.read(self.fd, 64 * 1024)
+                except BlockingIOError:
+                    continue
+                self._parse(data)
+                self._flush(quiet=False)
+        finally:
+            os.close(self.fd)
+
+    def _parse(self, data):
+        """Turns a buffer of raw inotify events into pending changes."""
+        offset = 0
+        while offset + self.EVENT_HEADER.size <= len(data):
+            wd, mask, _cookie, length = self.EVENT_HEADER.unpack_from(data, offset)
+            offset += self.EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+            if mask & self.IN_Q_OVERFLOW:
+                # The kernel dropped events, every watched directory has to be re-listed
+                for path in self.watched_paths:
+                    self._record(path, None)
+                continue
+            with self.lock:
+                path = self.wd_paths.get(wd)
+                if mask & self.IN_IGNORED:
+                    # The directory itself is gone, its parent reports the deletion
+                    self.wd_paths.pop(wd, None)
+                    if path is not None and self.path_wds.get(path) == wd:
+                        del self.path_wds[path]
+                    continue
+            if path is not None and name:
+                self._record(path, os.fsdecode(name))
+
+class PollingWatcher(DirectoryWatcher):
+    """
+    Portable fallback that polls the mtime of each watched directory.
+
+    A directory is only listed again after its mtime changed; the new listing is
+    compared with the previous one so only the names that changed are reported.
+    The first listing of a directory is taken on the worker thread, so watching a
+    large one does not block the caller; if its mtime moved in between, the whole
+    directory is reported as changed.
+    """
+    def __init__(self, dispatcher, on_changes, interval=1.0, **kwargs):
+        self.interval = interval
+        self.snapshots = {}  # path -> (mtime_ns, {name: (size, mtime_ns)} or None until listed)
+        super().__init__(dispatcher, on_changes, **kwargs)
+
+    def _add(self, path):
+        mtime_ns = os.stat(path).st_mtime_ns
+        with self.lock:
+            self.snapshots[path] = (mtime_ns, None)
+
+    def _remove(self, path):
+        with self.lock:
+            self.snapshots.pop(path, None)
+
+    def _snapshot(self, path):
+        """Returns the directory mtime and a name -> (size, mtime) map of its entries."""
+        mtime_ns = os.stat(path).st_mtime_ns
+        entries = {}
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    st = entry.stat(follow_symlinks=False)
+                    entries[entry.name] = (st.st_size, st.st_mtime_ns)
+                except OSError:
+                    entries[entry.name] = None
+        return mtime_ns, entries
+
+    def _run(self):
+        while not self.stop_event.wait(self.interval):
+            with self.lock:
+                snapshots = dict(self.snapshots)
+            for path, (mtime_ns, entries) in snapshots.items():
+                try:
+                    if entries is not None and os.stat(path).st_mtime_ns == mtime_ns:
+                        continue
+                    snapshot = self._snapshot(path)
+                except OSError:
+                    continue
+                if entries is None:
+                    with self.lock:
+                        if path not in self.snapshots:
+                            continue
+                        self.snapshots[path] = snapshot
+                    if snapshot[0] != mtime_ns:
+                        self._record(path, None)
+                    continue
+                new_entries = snapshot[1]
+                changed = {name for name in entries.keys() | new_entries.keys()
+                           if entries.get(name) != new_entries.get(name)}
+                with self.lock:
+                    if path not in self.snapshots:
+                        continue
+                    self.snapshots[path] = snapshot
+                for name in changed:
+                    self._record(path, name)
+            self._flush(quiet=True)
+
+def create_watcher(dispatcher, on_changes):
+    """Returns an inotify watcher on Linux, or a polling watcher elsewhere or if inotify fails."""
+    if sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(dispatcher, on_changes)
+        except (OSError, AttributeError) as e:
+            print(f"inotify unavailable, falling back to polling: {e}")
+    return PollingWatcher(dispatcher, on_changes)
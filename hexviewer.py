@@ -0,0 +1,334 @@
+import mmap
+import os
+import threading
+import time
+import tkinter as tk
+from tkinter import ttk, messagebox
+from tkinter import font as tkfont
+
+from workers import dispatcher_for
+
+BYTES_PER_ROW = 16
+# Printable ASCII is shown as is in the text column, every other byte as a dot
+ASCII_TABLE = bytes(byte if 32 <= byte < 127 else ord(".") for byte in range(256))
+
+class ByteSearch:
+    """
+    Searches a memory-mapped file for a byte string on a worker thread.
+
+    The mapping is scanned with mmap.find in chunks of chunk_size bytes that
+    overlap by the length of the pattern, so a match across two chunks is still
+    found and the search can be cancelled between chunks. on_done receives the
+    offset of the first match at or after start, wrapping around the end of the
+    file, or None. on_progress(scanned, size) reports how far it got.
+    """
+    def __init__(self, data, pattern, dispatcher, on_done, on_progress=None, start=0, chunk_size=16 * 1024 * 1024):
+        self.data = data
+        self.pattern = pattern
+        self.dispatcher = dispatcher
+        self.on_done = on_done
+        self.on_progress = on_progress
+        self.start_offset = start
+        self.chunk_size = chunk_size
+        self.scanned = 0
+        self.last_post = time.monotonic()
+        self._cancel_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="hex-search", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        self._cancel_event.set()
+
+    def join(self):
+        """Waits until the worker thread has stopped, at most one chunk after a cancel."""
+        if self._thread.is_alive():
+            self._thread.join()
+
+    @property
+    def running(self):
+        return self._thread.is_alive()
+
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    def _run(self):
+        """Worker thread body."""
+        size = len(self.data)
+        try:
+            offset = self.search(self.start_offset, size)
+            if offset is None:
+                offset = self.search(0, min(size, self.start_offset))
+        except ValueError as e:  # The file was closed while searching
+            print(f"Error searching: {e}")
+            return
+        self.dispatcher.post(self._deliver, self.on_done, offset)
+
+    def _deliver(self, callback, *args):
+        if callback and not self.cancelled:
+            callback(*args)
+
+    def search(self, start, limit):
+        """Returns the offset of the first match starting in start..limit."""
+        overlap = len(self.pattern) - 1
+        position = start
+        while position < limit and not self.cancelled:
+            end = min(position + self.chunk_size, limit)
+            found = self.data.find(self.pattern, position, min(end + overlap, len(self.data)))
+            if found >= 0:
+                return found
+            self.scanned += end - position
+            position = end
+            now = time.monotonic()
+            if now - self.last_post >= 0.1:
+                self.last_post = now
+                self.dispatcher.post(self._deliver, self.on_progress, self.scanned, len(self.data))
+        return None
+
+def parse_pattern(text, as_hex):
+    """Returns the bytes to search for, from hex digits ("DE AD be ef") or from text. Raises ValueError."""
+    if as_hex:
+        return bytes.fromhex(text)
+    return text.encode("utf-8")
+
+def format_row(offset, chunk, offset_digits):
+    """Returns one line of the dump: the offset, the bytes in hex and the bytes as ASCII."""
+    first = chunk[:8].hex(" ").upper()
+    second = chunk[8:].hex(" ").upper()
+    return f"{offset:0{offset_digits}X}  {first:<23}  {second:<23}  |{chunk.translate(ASCII_TABLE).decode('ascii')}|"
+
+class HexViewer:
+    """
+    Shows any file as a hex and ASCII dump.
+
+    The file is memory-mapped and only the rows in view are formatted into the
+    widget, so opening a file costs the same whatever its size and scrolling
+    only reads the bytes on screen. The scrollbar maps to the whole file.
+    """
+    def __init__(self, parent):
+        self.hex_frame = ttk.Frame(parent)
+        self.hex_frame.pack(fill="both", expand=True)
+
+        # Create a header frame with the offset and search fields and the close button
+        self.header_frame = ttk.Frame(self.hex_frame)
+        self.header_frame.pack(fill="x")
+        ttk.Label(self.header_frame, text="Offset:").pack(side="left")
+        self.offset_var = tk.StringVar()
+        offset_entry = ttk.Entry(self.header_frame, textvariable=self.offset_var, width=14)
+        offset_entry.pack(side="left", padx=(0, 10))
+        offset_entry.bind("<Return>", lambda e: self.goto_offset_text())
+        ttk.Label(self.header_frame, text="Find:").pack(side="left")
+        self.find_var = tk.StringVar()
+        find_entry = ttk.Entry(self.header_frame, textvariable=self.find_var, width=30)
+        find_entry.pack(side="left")
+        find_entry.bind("<Return>", lambda e: self.find_next())
+        self.find_hex_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(self.header_frame, text="Hex", variable=self.find_hex_var).pack(side="left")
+        ttk.Button(self.header_frame, text="Find Next", command=self.find_next).pack(side="left")
+        self.status_label = ttk.Label(self.header_frame)
+        self.status_label.pack(side="left", padx=10)
+        self.close_button = ttk.Button(self.header_frame, text="X", command=self.close_file)
+
+        # The dump shows exactly the rows that fit, the scrollbar stands for the whole file
+        self.dump_frame = ttk.Frame(self.hex_frame)
+        self.dump_frame.pack(fill="both", expand=True)
+        self.font = ("Courier", 10)
+        self.line_height = None
+        self.text_widget = tk.Text(self.dump_frame, wrap="none", font=self.font, state="disabled",
+                                   cursor="arrow", takefocus=True)
+        self.text_widget.pack(side="left", fill="both", expand=True)
+        self.text_widget.tag_configure("match", background="#FFE58F")
+        self.v_scrollbar = ttk.Scrollbar(self.dump_frame, orient="vertical", command=self.yview)
+        self.v_scrollbar.pack(side="right", fill="y")
+
+        self.text_widget.bind("<Configure>", lambda e: self.render())
+        self.text_widget.bind("<MouseWheel>", self.on_mousewheel)
+        self.text_widget.bind("<Button-4>", lambda e: self.scroll_rows(-3))
+        self.text_widget.bind("<Button-5>", lambda e: self.scroll_rows(3))
+        self.text_widget.bind("<Button-1>", lambda e: self.text_widget.focus_set())
+        for key, step in [("<Up>", -1), ("<Down>", 1)]:
+            self.text_widget.bind(key, lambda e, step=step: self.scroll_rows(step))
+        self.text_widget.bind("<Prior>", lambda e: self.scroll_rows(-self.visible_rows()))
+        self.text_widget.bind("<Next>", lambda e: self.scroll_rows(self.visible_rows()))
+        self.text_widget.bind("<Control-Home>", lambda e: self.scroll_to_row(0) or "break")
+        self.text_widget.bind("<Control-End>", lambda e: self.scroll_to_row(self.total_rows()) or "break")
+
+        self.current_path = None
+        self.file = None
+        self.data = b""
+        self.size = 0
+        self.offset_digits = 8
+        self.top_row = 0
+        # Byte range shown as selected: the last match or the offset jumped to
+        self.selection = None
+        self.search = None
+        # Cancelled searches that may still be reading the mapping
+        self.stopping_searches = []
+
+    def open_file(self, path, detection=None):
+        """Opens a file read-only. detection is accepted for symmetry with the text editor."""
+        self.close_file()
+        try:
+            self.file = open(path, "rb")
+            self.size = os.fstat(self.file.fileno()).st_size
+            # Empty files cannot be mapped
+            self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else b""
+        except (OSError, ValueError) as e:
+            self.close_file()
+            messagebox.showerror("Error", f"Error opening file: {e}")
+            return
+        self.current_path = path
+        self.offset_digits = max(8, len(f"{max(0, self.size - 1):X}"))
+        self.status_label.configure(text=f"{os.path.basename(path)}: {self.size:,} bytes")
+        self.close_button.pack(side="right")
+        self.render()
+
+    def close_file(self):
+        """Closes the file and empties the dump."""
+        if self.search:
+            self.search.cancel()
+            self.stopping_searches.append(self.search)
+            self.search = None
+        # A search still inside a chunk would read the mapping after it is closed
+        for search in self.stopping_searches:
+            search.join()
+        self.stopping_searches = []
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        if self.file:
+            self.file.close()
+        self.file = None
+        self.data = b""
+        self.size = 0
+        self.current_path = None
+        self.top_row = 0
+        self.selection = None
+        self.status_label.configure(text="")
+        self.close_button.pack_forget()
+        self.render()
+
+    def total_rows(self):
+        return (self.size + BYTES_PER_ROW - 1) // BYTES_PER_ROW
+
+    def visible_rows(self):
+        if self.line_height is None:
+            self.line_height = tkfont.Font(font=self.font).metrics("linespace")
+        return max(1, self.text_widget.winfo_height() // self.line_height)
+
+    def scroll_to_row(self, row):
+        self.top_row = max(0, min(row, self.total_rows() - self.visible_rows()))
+        self.render()
+
+    def scroll_rows(self, count):
+        self.scroll_to_row(self.top_row + count)
+        return "break"
+
+    def on_mousewheel(self, event):
+        self.scroll_rows(-3 if event.delta > 0 else 3)
+        return "break"
+
+    def yview(self, *args):
+        """Scrollbar command: maps the scrollbar position to a row of the whole file."""
+        if args[0] == "moveto":
+            self.scroll_to_row(round(float(args[1]) * self.total_rows()))
+        elif args[0] == "scroll":
+            count = int(args[1]) * (self.visible_rows() if args[2] == "pages" else 1)
+            self.scroll_rows(count)
+
+    def render(self):
+        """Formats the rows in view into the widget."""
+        rows = self.visible_rows()
+        start = self.top_row * BYTES_PER_ROW
+        data = self.data[start:start + rows * BYTES_PER_ROW]
+        lines = [format_row(start + i, data[i:i + BYTES_PER_ROW], self.offset_digits)
+                 for i in range(0, len(data), BYTES_PER_ROW)]
+        widget = self.text_widget
+        widget.configure(state="normal")
+        widget.delete("1.0", "end")
+        widget.insert("1.0", "\n".join(lines))
+        self.tag_selection(start, start + len(data))
+        widget.configure(state="disabled")
+        total = max(1, self.total_rows())
+        self.v_scrollbar.set(self.top_row / total, min(1.0, (self.top_row + rows) / total))
+
+    def tag_selection(self, start, end):
+        """Highlights the selected bytes that are in view, in both columns."""
+        if self.selection is None:
+            return
+        first, last = max(self.selection[0], start), min(self.selection[1], end)
+        hex_start = self.offset_digits + 2
+        ascii_start = hex_start + 3 * BYTES_PER_ROW + 3
+        ranges = []
+        while first < last:
+            row, column = divmod(first - start, BYTES_PER_ROW)
+            count = min(last - first, BYTES_PER_ROW - column)
+            hex_first = hex_start + 3 * column + (column >= 8)
+            hex_last = hex_start + 3 * (column + count - 1) + (column + count - 1 >= 8) + 2
+            ranges.extend((f"{row + 1}.{hex_first}", f"{row + 1}.{hex_last}",
+                           f"{row + 1}.{ascii_start + column}", f"{row + 1}.{ascii_start + column + count}"))
+            first += count
+        if ranges:
+            self.text_widget.tag_add("match", *ranges)
+
+    def goto_offset(self, offset, length=1):
+        """Scrolls an offset into view and selects length bytes from it."""
+        offset = max(0, min(offset, self.size - 1))
+        self.selection = (offset, offset + length)
+        row = offset // BYTES_PER_ROW
+        if not self.top_row <= row < self.top_row + self.visible_rows():
+            self.top_row = max(0, row - self.visible_rows() // 3)
+        self.scroll_to_row(self.top_row)
+
+    def goto_offset_text(self):
+        """Jumps to the offset typed in the offset field: hex with a 0x prefix, or decimal."""
+        if not self.current_path:
+            return
+        try:
+            offset = int(self.offset_var.get().strip(), 0)
+        except ValueError:
+            messagebox.showerror("Go to Offset", "Enter a decimal offset, or a hex offset starting with 0x.")
+            return
+        if not 0 <= offset < self.size:
+            messagebox.showinfo("Go to Offset", f"The file is {self.size:,} bytes long.")
+            return
+        self.goto_offset(offset)
+        self.text_widget.focus_set()
+
+    def find_next(self):
+        """Searches for the pattern after the selection on a worker thread, see ByteSearch."""
+        if not self.current_path or not self.find_var.get():
+            return
+        try:
+            pattern = parse_pattern(self.find_var.get(), self.find_hex_var.get())
+        except ValueError:
+            messagebox.showerror("Find", "Enter pairs of hex digits, like DE AD BE EF.")
+            return
+        if not pattern:
+            return
+        start = self.selection[0] + 1 if self.selection else self.top_row * BYTES_PER_ROW
+
+        def on_done(offset):
+            self.search = None
+            if offset is None:
+                self.status_label.configure(text="Not found")
+                return
+            self.status_label.configure(text=f"Found at 0x{offset:X}")
+            self.goto_offset(offset, len(pattern))
+
+        def on_progress(scanned, size):
+            self.status_label.configure(text=f"Searching… {100 * scanned // max(1, size)}%")
+
+        if self.search:
+            self.search.cancel()
+            self.stopping_searches.append(self.search)
+        self.stopping_searches = [search for search in self.stopping_searches if search.running]
+        self.status_label.configure(text="Searching…")
+        self.search = ByteSearch(self.data, pattern, dispatcher_for(self.text_widget), on_done, on_progress,
+                                 start=start).start()
+
+    def on_closing(self):
+        """Handles the window close event."""
+        self.close_file()
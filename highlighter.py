@@ -0,0 +1,191 @@
+import time
+
+# Marks the start state of a line that was inserted and not tokenized yet
+UNKNOWN = object()
+
+class IncrementalHighlighter:
+    """
+    Keeps syntax highlighting of a Text widget up to date one line at a time.
+
+    The lexer state at the start of every line is remembered. An edit re-tokenizes
+    from the edited line only until the state at the start of a following line is
+    the same as before the edit. Lines that were never highlighted are processed in
+    order by a background pass that runs in short idle-time slices; the visible
+    lines are painted first, speculatively if the background pass has not reached
+    them yet. Bursts of keystrokes are debounced into a single update.
+    """
+    TAGS = ("keyword", "string", "comment", "function", "number")
+
+    def __init__(self, text_widget, proxy, debounce_ms=40, slice_seconds=0.01, chunk_lines=100):
+        self.text = text_widget
+        self.proxy = proxy
+        self.debounce_ms = debounce_ms
+        self.slice_seconds = slice_seconds
+        self.chunk_lines = chunk_lines
+        self.lexer = None
+        self.states = [None]   # states[i] is the lexer state at the start of line i + 1
+        self.valid_until = 1   # lines before this one are highlighted from correct states
+        self.repairs = set()   # edited lines below valid_until that must be re-tokenized
+        self.update_job = None
+        self.background_job = None
+        proxy.add_change_listener(self.on_change)
+        proxy.add_scroll_listener(self.on_scroll)
+
+    def set_lexer(self, lexer):
+        """Highlights the buffer from scratch with the given lexer, or removes highlighting."""
+        self.lexer = lexer
+        self.reset()
+
+    def reset(self):
+        """Drops all highlighting state and starts over."""
+        self.states = [None]
+        self.valid_until = 1
+        self.repairs.clear()
+        for tag in self.TAGS:
+            self.proxy.call("tag", "remove", tag, "1.0", "end")
+        if self.lexer:
+            self.schedule(0)
+
+    def last_line(self):
+        return int(self.proxy.call("index", "end-1c").split(".")[0])
+
+    def on_change(self, start, removed, added):
+        """Keeps the per-line states aligned with an edit reported by the proxy."""
+        if not self.lexer:
+            return
+        delta = added - removed
+        if start < len(self.states):
+            self.states[start:start + removed] = [UNKNOWN] * added
+        self.repairs = {line if line <= start else max(start, line + delta) for line in self.repairs}
+        if self.valid_until > start + removed:
+            # The lines after the edit keep their highlighting, they just moved
+            self.valid_until += delta
+            self.repairs.add(start)
+        else:
+            self.valid_until = min(self.valid_until, start)
+            self.repairs = {line for line in self.repairs if line < self.valid_until}
+        del self.states[self.valid_until:]
+        self.schedule(self.debounce_ms)
+
+    def on_scroll(self):
+        if self.lexer:
+            self.schedule(self.debounce_ms)
+
+    def schedule(self, delay):
+        """Runs update() once after delay, however many times this is called meanwhile."""
+        if self.update_job is not None:
+            self.text.after_cancel(self.update_job)
+        self.update_job = self.text.after(delay, self.update)
+
+    def update(self):
+        """Repairs edited lines, paints the viewport and resumes the background pass."""
+        self.update_job = None
+        if not self.lexer:
+            return
+        self.run_repairs(time.monotonic() + self.slice_seconds)
+        self.paint_viewport()
+        if self.repairs or self.valid_until <= self.last_line():
+            self.schedule_background()
+
+    def run_repairs(self, deadline):
+        """Runs the pending repairs in line order; returns False if time ran out first."""
+        for line in sorted(self.repairs):
+            self.repairs.discard(line)
+            if line >= self.valid_until:
+                continue
+            resume = self.repair(line, deadline)
+            if resume is not None:
+                # Later repairs may depend on the states this one has yet to fix
+                self.repairs.add(resume)
+                return False
+        return True
+
+    def schedule_background(self):
+        if self.background_job is None:
+            self.background_job = self.text.after(1, self.background)
+
+    def background(self):
+        """Highlights the next slice of lines the background pass has not reached yet."""
+        self.background_job = None
+        if not self.lexer:
+            return
+        deadline = time.monotonic() + self.slice_seconds
+        if not self.run_repairs(deadline):
+            self.schedule_background()
+            return
+        last_line = self.last_line()
+        while self.valid_until <= last_line and time.monotonic() < deadline:
+            first = self.valid_until
+            count = min(self.chunk_lines, last_line - first + 1)
+            state = self.states[first - 1]
+            token_lists = []
+            for line in self.get_lines(first, count):
+                tokens, state = self.lexer.tokenize(line, state)
+                token_lists.append(tokens)
+                self.states.append(state)
+            self.paint(first, token_lists)
+            self.valid_until = first + count
+        if self.valid_until <= last_line:
+            self.schedule_background()
+
+    def repair(self, line, deadline):
+        """Re-tokenizes from an edited line until the states converge; returns where to resume if out of time."""
+        state = self.states[line - 1]
+        last_line = self.last_line()
+        while line <= last_line:
+            count = min(self.chunk_lines, last_line - line + 1)
+            token_lists = []
+            converged = False
+            for offset, text in enumerate(self.get_lines(line, count)):
+                tokens, state = self.lexer.tokenize(text, state)
+                token_lists.append(tokens)
+                next_line = line + offset + 1
+                if next_line >= self.valid_until:
+                    # Past the highlighted region, the background pass takes over from here
+                    self.states[self.valid_until - 1] = state
+                    converged = True
+                    break
+                if self.states[next_line - 1] == state:
+                    converged = True
+                    break
+                self.states[next_line - 1] = state
+            self.paint(line, token_lists)
+            line += len(token_lists)
+            if converged:
+                return None
+            if time.monotonic() >= deadline:
+                return line
+        return None
+
+    def paint_viewport(self):
+        """Paints the visible lines the background pass has not reached yet, guessing their state."""
+        first = int(self.proxy.call("index", "@0,0").split(".")[0])
+        last = int(self.proxy.call("index", f"@0,{self.text.winfo_height()}").split(".")[0])
+        first = max(first, self.valid_until)
+        if first > last:
+            return
+        state = self.states[-1] if first == self.valid_until else None
+        token_lists = []
+        for text in self.get_lines(first, last - first + 1):
+            tokens, state = self.lexer.tokenize(text, state)
+            token_lists.append(tokens)
+        self.paint(first, token_lists)
+
+    def get_lines(self, first, count):
+        """Returns the text of count lines starting at first with a single Tk call."""
+        return self.proxy.call("get", f"{first}.0", f"{first + count - 1}.0 lineend").split("\n")
+
+    def paint(self, first, token_lists):
+        """Replaces the tags of a run of lines with their tokens, with one Tk call per tag."""
+        if not token_lists:
+            return
+        last = first + len(token_lists) - 1
+        ranges = {tag: [] for tag in self.TAGS}
+        for offset, tokens in enumerate(token_lists):
+            line = first + offset
+            for tag, start, end in tokens:
+                ranges[tag].extend((f"{line}.{start}", f"{line}.{end}"))
+        for tag in self.TAGS:
+            self.proxy.call("tag", "remove", tag, f"{first}.0", f"{last}.0 lineend")
+            if ranges[tag]:
+                self.proxy.call("tag", "add", tag, *ranges[tag])
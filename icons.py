@@ -0,0 +1,181 @@
+import hashlib
+import mimetypes
+import os
+import tkinter as tk
+
+from config import app_data_path
+
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets")
+SOURCES = {
+    "folder": "folder.png",
+    "open_folder": "open.png",
+    "file": "file.png",
+}
+
+# File icons get a colored badge per category so files can be told apart at a glance
+CATEGORY_COLORS = {
+    "image": (46, 160, 67),
+    "pdf": (215, 58, 73),
+    "document": (3, 102, 214),
+    "code": (111, 66, 193),
+    "text": (106, 115, 125),
+    "archive": (227, 98, 9),
+    "audio": (219, 171, 9),
+    "video": (234, 74, 170),
+}
+CATEGORY_EXTENSIONS = {
+    "image": ["png", "jpg", "jpeg", "gif", "bmp", "tif", "tiff", "webp", "svg", "ico"],
+    "pdf": ["pdf"],
+    "document": ["doc", "docx", "odt", "rtf", "xls", "xlsx", "ods", "ppt", "pptx", "odp"],
+    "code": ["py", "js", "ts", "html", "css", "c", "h", "cpp", "hpp", "java", "go", "rs", "rb",
+             "sh", "json", "yaml", "yml", "xml", "toml"],
+    "text": ["txt", "md", "rst", "log", "csv", "ini", "cfg", "conf"],
+    "archive": ["zip", "tar", "gz", "tgz", "bz2", "xz", "7z", "rar"],
+    "audio": ["mp3", "wav", "flac", "ogg", "m4a"],
+    "video": ["mp4", "mkv", "avi", "mov", "webm"],
+}
+MIME_CATEGORIES = {"image": "image", "audio": "audio", "video": "video", "text": "text"}
+
+# The order of the icons in the atlas
+ATLAS_NAMES = list(SOURCES) + [f"file:{category}" for category in CATEGORY_COLORS]
+
+class IconCache:
+    """
+    Pre-scaled tree icons shared by every row.
+
+    All icons are rendered once into an atlas at the target pixel size, which
+    follows the display scaling so HiDPI screens get sharp icons. The atlas is
+    saved as a PNG keyed by the source mtimes and the target size, so later
+    startups load it directly with Tk and never decode or resample the sources.
+    Each icon is a single PhotoImage, and per-extension lookups are dict lookups.
+    """
+    def __init__(self, widget, size=16, padding=5):
+        self.widget = widget
+        self.size = round(size * self.display_scale(widget))
+        self.padding = round(padding * self.display_scale(widget))
+        self.cell = self.size + 2 * self.padding
+        self.images = {}
+        self.by_extension = {}
+        for category, extensions in CATEGORY_EXTENSIONS.items():
+            for extension in extensions:
+                self.by_extension["." + extension] = category
+        self.load()
+
+    @staticmethod
+    def display_scale(widget):
+        """Returns the display scale relative to a standard 96 DPI screen."""
+        try:
+            return max(1.0, float(widget.tk.call("tk", "scaling")) * 72 / 96)
+        except (tk.TclError, ValueError):
+            return 1.0
+
+    def cache_path(self):
+        """Returns the atlas file for the current sources and target size."""
+        key = hashlib.sha1()
+        for name in sorted(SOURCES):
+            path = os.path.join(ASSETS_DIR, SOURCES[name])
+            mtime_ns = os.stat(path).st_mtime_ns if os.path.exists(path) else 0
+            key.update(f"{name}:{mtime_ns};".encode())
+        key.update(",".join(ATLAS_NAMES).encode())
+        return app_data_path("icons", f"atlas-{self.size}px-{self.padding}-{key.hexdigest()[:16]}.png")
+
+    def load(self):
+        """Loads the atlas from the disk cache, building it first if needed."""
+        path = self.cache_path()
+        atlas = None
+        if os.path.exists(path):
+            atlas = self.read_atlas(path)
+            if atlas is None:
+                # A corrupt or truncated cache file is thrown away and built again
+                try:
+                    os.remove(path)
+                except OSError as e:
+                    print(f"Error removing icon atlas {path}: {e}")
+                    return
+        if atlas is None:
+            try:
+                self.build_atlas(path)
+            except (ImportError, OSError) as e:
+                print(f"Error building icon atlas: {e}")
+                return
+            atlas = self.read_atlas(path)
+            if atlas is None:
+                return
+        for index, name in enumerate(ATLAS_NAMES):
+            image = tk.PhotoImage(master=self.widget, width=self.cell, height=self.cell)
+            x = index * self.cell
+            image.tk.call(image, "copy", atlas, "-from", x, 0, x + self.cell, self.cell)
+            self.images[name] = image
+
+    def read_atlas(self, path):
+        """Returns the atlas image, or None if the file cannot be read or is too small."""
+        try:
+            atlas = tk.PhotoImage(master=self.widget, file=path)
+        except tk.TclError as e:
+            print(f"Error reading icon atlas {path}: {e}")
+            return None
+        if atlas.width() < self.cell * len(ATLAS_NAMES) or atlas.height() < self.cell:
+            print(f"Error reading icon atlas {path}: unexpected size {atlas.width()}x{atlas.height()}")
+            return None
+        return atlas
+
+    def build_atlas(self, path):
+        """Renders every icon into one strip and saves it. Only this path needs Pillow."""
+        from PIL import Image, ImageDraw, ImageOps
+
+        sources = {}
+        for name, filename in SOURCES.items():
+            image = Image.open(os.path.join(ASSETS_DIR, filename)).convert("RGBA")
+            image = image.resize((self.size, self.size), Image.Resampling.LANCZOS)
+            sources[name] = ImageOps.expand(image, border=self.padding, fill=(255, 255, 255, 0))
+
+        atlas = Image.new("RGBA", (self.cell * len(ATLAS_NAMES), self.cell), (255, 255, 255, 0))
+        for index, name in enumerate(ATLAS_NAMES):
+            if name in sources:
+                icon = sources[name]
+            else:
+                icon = sources["file"].copy()
+                badge = max(4, self.size // 2)
+                left = self.padding + self.size - badge
+                top = self.padding + self.size - badge
+                ImageDraw.Draw(icon).rectangle(
+                    [left, top, left + badge - 1, top + badge - 1],
+                    fill=CATEGORY_COLORS[name.split(":", 1)[1]] + (255,),
+                )
+            atlas.paste(icon, (index * self.cell, 0))
+        temp_path = path + ".tmp"
+        atlas.save(temp_path, "PNG")
+        os.replace(temp_path, path)
+
+    def get(self, name):
+        """Returns an icon by its atlas name, or None if the icons could not be loaded."""
+        return self.images.get(name)
+
+    def category_for(self, filename):
+        """Returns the icon category of a file name, or None for a generic file."""
+        extension = os.path.splitext(filename)[1].lower()
+        category = self.by_extension.get(extension)
+        if category is None and extension:
+            mime_type, _ = mimetypes.guess_type(filename)
+            category = MIME_CATEGORIES.get(mime_type.split("/", 1)[0]) if mime_type else None
+            # Remember the answer, the next file with this extension is a plain dict lookup
+            self.by_extension[extension] = category
+        return category
+
+    def icon_for(self, filename, is_dir=False):
+        """Returns the shared icon for a tree row."""
+        if is_dir:
+            return self.images.get("folder")
+        category = self.category_for(filename)
+        if category:
+            return self.images.get(f"file:{category}")
+        return self.images.get("file")
+
+_caches = {}
+
+def icon_cache_for(widget, size=16):
+    """Returns the icon cache shared by all widgets of the same Tk root."""
+    key = (id(widget._root()), size)
+    if key not in _caches:
+        _caches[key] = IconCache(widget._root(), size)
+    return _caches[key]
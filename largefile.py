@@ -0,0 +1,280 @@
+import bisect
+import codecs
+import mmap
+import os
+import re
+import threading
+import time
+
+from config import LARGE_FILE_INDEX_BLOCK
+
+class LargeFile:
+    """
+    A read-only memory-mapped file with a sparse index of line start offsets.
+
+    Lines are numbered from 1 like in Tk. The index holds one checkpoint
+    (line number, offset of its first byte) per block of block_size bytes; it is
+    built on a worker thread that only counts newlines block by block, so it runs
+    at memory speed and never holds more than one block. A line is located from
+    the nearest checkpoint before it, which bounds every lookup to one block of
+    scanning. Lookups past the part indexed so far skip ahead block by block too,
+    so they work before indexing is finished. on_progress(lines, bytes) and
+    on_done(total_lines) run on the main thread.
+
+    The encoding must encode a newline as the single byte b"\n", which rules out
+    UTF-16 and UTF-32.
+    """
+    def __init__(self, path, dispatcher, on_progress=None, on_done=None, block_size=LARGE_FILE_INDEX_BLOCK,
+                 encoding="utf-8"):
+        self.path = path
+        # The BOM is skipped by read_lines, the rest of the file is plain UTF-8
+        self.encoding = "utf-8" if encoding == "utf-8-sig" else encoding
+        self.dispatcher = dispatcher
+        self.on_progress = on_progress
+        self.on_done = on_done
+        self.block_size = block_size
+        self.file = open(path, "rb")
+        self.size = os.fstat(self.file.fileno()).st_size
+        # Empty files cannot be mapped
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else b""
+        self.lock = threading.Lock()
+        self.checkpoint_lines = [1]
+        self.checkpoint_offsets = [0]
+        self.indexed_bytes = 0
+        self.indexed_lines = 1   # number of the line containing offset indexed_bytes
+        self.line_count = None   # set once the whole file is indexed
+        self.searches = set()    # running LargeFileSearch threads, which read the mapping
+        self._cancel_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"index:{path}", daemon=True)
+
+    def start(self):
+        """Starts indexing in the background."""
+        self._thread.start()
+        return self
+
+    def close(self):
+        """Stops indexing and the searches, and unmaps the file once none of them reads it."""
+        self._cancel_event.set()
+        if self._thread.is_alive():
+            self._thread.join()
+        with self.lock:
+            searches = list(self.searches)
+        for search in searches:
+            search.cancel()
+            search.join()
+        if self.size:
+            self.data.close()
+        self.file.close()
+
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    def _run(self):
+        """Worker thread body."""
+        offset = 0
+        line = 1
+        last_post = time.monotonic()
+        while offset < self.size:
+            if self.cancelled:
+                return
+            end = min(offset + self.block_size, self.size)
+            block = self.data[offset:end]
+            count = block.count(b"\n")
+            with self.lock:
+                if count:
+                    self.checkpoint_lines.append(line + count)
+                    self.checkpoint_offsets.append(offset + block.rfind(b"\n") + 1)
+                line += count
+                offset = end
+                self.indexed_bytes = offset
+                self.indexed_lines = line
+            now = time.monotonic()
+            if now - last_post >= 0.1:
+                last_post = now
+                self.dispatcher.post(self._deliver, self.on_progress, line, offset)
+        with self.lock:
+            self.line_count = line
+        self.dispatcher.post(self._deliver, self.on_done, line)
+
+    def _deliver(self, callback, *args):
+        """Invokes a callback on the main thread unless the file was closed."""
+        if callback and not self.cancelled:
+            callback(*args)
+
+    def estimated_lines(self):
+        """Returns the number of lines, extrapolated from the indexed part while indexing."""
+        with self.lock:
+            if self.line_count is not None:
+                return self.line_count
+            if not self.indexed_bytes:
+                return max(1, self.size // 80)
+            return max(self.indexed_lines, round(self.indexed_lines * self.size / self.indexed_bytes))
+
+    def checkpoint_before_line(self, line):
+        with self.lock:
+            i = bisect.bisect_right(self.checkpoint_lines, line) - 1
+            return self.checkpoint_lines[i], self.checkpoint_offsets[i]
+
+    def checkpoint_before_offset(self, offset):
+        with self.lock:
+            i = bisect.bisect_right(self.checkpoint_offsets, offset) - 1
+            return self.checkpoint_lines[i], self.checkpoint_offsets[i]
+
+    def offset_of_line(self, line):
+        """Returns the offset of the first byte of a line, or None if the file has fewer lines."""
+        line = max(1, line)
+        current, offset = self.checkpoint_before_line(line)
+        while current < line:
+            end = min(offset + self.block_size, self.size)
+            if end <= offset:
+                return None
+            block = self.data[offset:end]
+            count = block.count(b"\n")
+            if current + count >= line:
+                position = -1
+                for _ in range(line - current):
+                    position = block.find(b"\n", position + 1)
+                return offset + position + 1
+            # offset is now inside line current + count rather than at its start
+            current += count
+            offset = end
+        return offset
+
+    def line_at_offset(self, offset):
+        """Returns the number of the line containing a byte offset."""
+        offset = min(max(0, offset), self.size)
+        line, position = self.checkpoint_before_offset(offset)
+        while position < offset:
+            end = min(position + self.block_size, offset)
+            line += self.data[position:end].count(b"\n")
+            position = end
+        return line
+
+    def line_start(self, offset):
+        """Returns the offset of the start of the line containing a byte offset."""
+        return self.data.rfind(b"\n", 0, offset) + 1
+
+    def read_lines(self, first, count, max_bytes=None):
+        """
+        Returns (text, lines) for count lines starting at line first, decoded.
+
+        lines is the number of lines actually read, which is smaller at the end of the
+        file. At most max_bytes are decoded, so a window of huge lines is cut short.
+        """
+        start = self.offset_of_line(first)
+        if start is None:
+            return "", 0
+        if start == 0 and self.data[:3] == codecs.BOM_UTF8:
+            start = 3
+        end = self.offset_of_line(first + count)
+        if end is None:
+            end = self.size
+        else:
+            end -= 1  # Leave out the newline ending the last line
+        if max_bytes is not None and end - start > max_bytes:
+            end = start + max_bytes
+        text = self.data[start:end].decode(self.encoding, errors="replace").replace("\r\n", "\n")
+        return text, text.count("\n") + 1
+
+class LargeFileSearch:
+    """
+    Searches a LargeFile for a pattern on a worker thread, without loading it.
+
+    The file is scanned in chunks of chunk_size bytes that end at a line boundary,
+    so a match never straddles two chunks and the search can be cancelled between
+    chunks. Matches do not span lines. on_done receives the (start, end) byte
+    offsets of the first match after start (or the last one before it when
+    searching backwards), wrapping around the end of the file, or None.
+    """
+    def __init__(self, large_file, pattern, dispatcher, on_done, start=0, backward=False,
+                 regex=False, match_case=True, whole_word=False, chunk_size=16 * 1024 * 1024):
+        self.large_file = large_file
+        self.dispatcher = dispatcher
+        self.on_done = on_done
+        self.start_offset = start
+        self.backward = backward
+        self.chunk_size = chunk_size
+        encoded = pattern.encode(large_file.encoding, errors="replace")
+        source = encoded if regex else re.escape(encoded)
+        if whole_word:
+            source = rb"\b(?:" + source + rb")\b"
+        self.regex = re.compile(source, 0 if match_case else re.IGNORECASE)
+        self._cancel_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="largefile-search", daemon=True)
+
+    def start(self):
+        with self.large_file.lock:
+            self.large_file.searches.add(self)
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        self._cancel_event.set()
+
+    def join(self):
+        """Waits until the worker thread has stopped, at most one chunk after a cancel."""
+        if self._thread.is_alive():
+            self._thread.join()
+
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    def _run(self):
+        """Worker thread body."""
+        size = self.large_file.size
+        try:
+            if self.backward:
+                span = self.search_backward(self.start_offset, 0) or self.search_backward(size, self.start_offset)
+            else:
+                span = self.search_forward(self.start_offset, size) or self.search_forward(0, self.start_offset)
+        except (ValueError, re.error) as e:
+            print(f"Error searching {self.large_file.path}: {e}")
+            span = None
+        finally:
+            with self.large_file.lock:
+                self.large_file.searches.discard(self)
+        if not self.cancelled:
+            self.dispatcher.post(self._deliver, span)
+
+    def _deliver(self, span):
+        if not self.cancelled:
+            self.on_done(span)
+
+    def chunk_end(self, offset, limit):
+        """Returns the end of a chunk starting at offset, moved forward to the next line start."""
+        end = offset + self.chunk_size
+        if end >= limit:
+            return limit
+        newline = self.large_file.data.find(b"\n", end, limit)
+        return limit if newline < 0 else newline + 1
+
+    def search_forward(self, start, limit):
+        """Returns the first match in start..limit."""
+        data = self.large_file.data
+        offset = start
+        while offset < limit and not self.cancelled:
+            end = self.chunk_end(offset, limit)
+            match = self.regex.search(data, offset, end)
+            if match:
+                return match.span()
+            offset = end
+        return None
+
+    def search_backward(self, end, limit):
+        """Returns the last match in limit..end."""
+        data = self.large_file.data
+        while end > limit and not self.cancelled:
+            start = max(limit, end - self.chunk_size)
+            if start > limit:
+                start = self.large_file.line_start(start)
+                if start <= limit:
+                    start = limit
+            last = None
+            for match in self.regex.finditer(data, start, end):
+                last = match
+            if last:
+                return last.span()
+            end = start
+        return None
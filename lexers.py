@@ -0,0 +1,223 @@
+import os
+import re
+
+# Rules shared by most languages. Each rule is (regex, tags): tags is the tag of the
+# whole match, or a tuple with one tag (or None) per capturing group of the regex.
+DOUBLE_QUOTED = r'"[^"\\\n]*(?:\\.[^"\\\n]*)*"'
+SINGLE_QUOTED = r"'[^'\\\n]*(?:\\.[^'\\\n]*)*'"
+NUMBER = r'\b(?:0[xX][0-9a-fA-F_]+|\d[\d_]*(?:\.\d[\d_]*)?(?:[eE][+-]?\d+)?)\b'
+
+WORD = r'[a-zA-Z_][a-zA-Z0-9_]*'
+
+class Lexer:
+    """
+    Tokenizes one line at a time with a single precompiled regex.
+
+    All rules of a language are joined into one alternation with a named group per
+    rule, so a line is scanned once and the earliest match wins; ties go to the rule
+    listed first. multiline lists (tag, opener, closer) constructs that may span
+    lines, such as block comments. Their openers take part in the same alternation,
+    and whether a line ends inside one of them is the state carried to the next line
+    (None, or the index of the open construct).
+
+    words maps a tag to a list of words such as keywords. Rather than a branch per
+    word, the regex ends with one branch matching a whole word, which is looked up
+    in a dict; this also lets the scan skip over identifiers in a single step.
+    """
+    def __init__(self, rules, multiline=(), words=None, word_pattern=WORD):
+        self.multiline = list(multiline)
+        self.words = {}
+        for tag, tag_words in (words or {}).items():
+            for word in tag_words:
+                self.words[word] = tag
+        self.group_tags = {}  # rule group name -> [(group number, tag), ...]
+        self.openers = {}     # opener group name -> construct index
+        alternatives = []
+        for index, (_tag, opener, _closer) in enumerate(self.multiline):
+            name = f"m{index}"
+            self.openers[name] = index
+            alternatives.append(f"(?P<{name}>{re.escape(opener)})")
+        # Group numbers inside the alternation are shifted by the groups before them
+        group = len(alternatives)
+        for index, (regex, tags) in enumerate(rules):
+            name = f"r{index}"
+            group += 1
+            inner_groups = re.compile(regex).groups
+            if isinstance(tags, str):
+                self.group_tags[name] = [(group, tags)]
+            else:
+                self.group_tags[name] = [(group + offset + 1, tag) for offset, tag in enumerate(tags) if tag]
+            group += inner_groups
+            alternatives.append(f"(?P<{name}>{regex})")
+        if self.words:
+            alternatives.append(f"(?P<word>{word_pattern})")
+        self.regex = re.compile("|".join(alternatives)) if alternatives else None
+
+    def tokenize(self, line, state=None):
+        """Returns the (tag, start column, end column) tokens of a line and the state at its end."""
+        tokens = []
+        pos = 0
+        if state is not None:
+            tag, _opener, closer = self.multiline[state]
+            end = line.find(closer)
+            if end < 0:
+                tokens.append((tag, 0, len(line)))
+                return tokens, state
+            pos = end + len(closer)
+            tokens.append((tag, 0, pos))
+        if self.regex is None:
+            return tokens, None
+        group_tags = self.group_tags
+        openers = self.openers
+        words = self.words
+        while True:
+            for match in self.regex.finditer(line, pos):
+                name = match.lastgroup
+                if name == "word":
+                    tag = words.get(match.group())
+                    if tag:
+                        tokens.append((tag, match.start(), match.end()))
+                    continue
+                if name in openers:
+                    state = openers[name]
+                    tag, opener, closer = self.multiline[state]
+                    start = match.start()
+                    end = line.find(closer, start + len(opener))
+                    if end < 0:
+                        tokens.append((tag, start, len(line)))
+                        return tokens, state
+                    pos = end + len(closer)
+                    tokens.append((tag, start, pos))
+                    # Carry on after the closer with a fresh scan
+                    break
+                for group, tag in group_tags[name]:
+                    start, end = match.span(group)
+                    if start < end:
+                        tokens.append((tag, start, end))
+            else:
+                return tokens, None
+
+PYTHON_KEYWORDS = [
+    'and', 'as', 'assert', 'async', 'await', 'break', 'class', 'continue', 'def', 'del', 'elif',
+    'else', 'except', 'finally', 'for', 'from', 'global', 'if', 'import', 'in', 'is', 'lambda',
+    'nonlocal', 'not', 'or', 'pass', 'raise', 'return', 'try', 'while', 'with', 'yield', 'None',
+    'True', 'False'
+]
+PYTHON_LEXER = Lexer(
+    [
+        (r'#.*', "comment"),
+        (r'\b(def|class)\s+([a-zA-Z_][a-zA-Z0-9_]*)', ("keyword", "function")),
+        (DOUBLE_QUOTED, "string"),
+        (SINGLE_QUOTED, "string"),
+        (NUMBER, "number"),
+    ],
+    multiline=[("string", '"""', '"""'), ("string", "'''", "'''")],
+    words={"keyword": PYTHON_KEYWORDS},
+)
+WEB_KEYWORDS = [
+    'var', 'let', 'const', 'function', 'return', 'if', 'else', 'for', 'while', 'do', 'switch',
+    'case', 'break', 'continue', 'try', 'catch', 'finally', 'throw', 'new', 'delete', 'typeof',
+    'instanceof', 'void', 'this', 'super', 'class', 'extends', 'import', 'export', 'default',
+    'async', 'await', 'null', 'undefined', 'true', 'false'
+]
+WEB_LEXER = Lexer(
+    [
+        (r'//.*', "comment"),
+        (r'\b(function)\s+([a-zA-Z_$][a-zA-Z0-9_$]*)', ("keyword", "function")),
+        (DOUBLE_QUOTED, "string"),
+        (SINGLE_QUOTED, "string"),
+        (r'`[^`\\]*(?:\\.[^`\\]*)*`', "string"),
+        (NUMBER, "number"),
+    ],
+    multiline=[("comment", "/*", "*/")],
+    words={"keyword": WEB_KEYWORDS},
+    word_pattern=r'[a-zA-Z_$][a-zA-Z0-9_$]*',
+)
+GO_KEYWORDS = [
+    'break', 'case', 'chan', 'const', 'continue', 'default', 'defer', 'else', 'fallthrough',
+    'for', 'func', 'go', 'goto', 'if', 'import', 'interface', 'map', 'package', 'range',
+    'return', 'select', 'struct', 'switch', 'type', 'var', 'nil', 'true', 'false', 'iota'
+]
+GO_LEXER = Lexer(
+    [
+        (r'//.*', "comment"),
+        (r'\b(func)\s+(?:\([^)]*\)\s*)?([a-zA-Z_][a-zA-Z0-9_]*)', ("keyword", "function")),
+        (DOUBLE_QUOTED, "string"),
+        (SINGLE_QUOTED, "string"),
+        (NUMBER, "number"),
+    ],
+    # Raw strings may span lines
+    multiline=[("comment", "/*", "*/"), ("string", "`", "`")],
+    words={"keyword": GO_KEYWORDS},
+)
+RUST_KEYWORDS = [
+    'as', 'async', 'await', 'break', 'const', 'continue', 'crate', 'dyn', 'else', 'enum',
+    'extern', 'false', 'fn', 'for', 'if', 'impl', 'in', 'let', 'loop', 'match', 'mod', 'move',
+    'mut', 'pub', 'ref', 'return', 'self', 'Self', 'static', 'struct', 'super', 'trait', 'true',
+    'type', 'unsafe', 'use', 'where', 'while'
+]
+RUST_LEXER = Lexer(
+    [
+        (r'//.*', "comment"),
+        (r'\b(fn)\s+([a-zA-Z_][a-zA-Z0-9_]*)', ("keyword", "function")),
+        (r'\b(struct|enum|trait|impl|type|mod)\s+([a-zA-Z_][a-zA-Z0-9_]*)', ("keyword", "function")),
+        (DOUBLE_QUOTED, "string"),
+        # Character literals only, so lifetimes such as 'a are left alone
+        (r"'(?:[^'\\\n]|\\[^\n]+?)'", "string"),
+        (NUMBER, "number"),
+    ],
+    multiline=[("comment", "/*", "*/")],
+    words={"keyword": RUST_KEYWORDS},
+)
+YAML_LEXER = Lexer(
+    [
+        (r'(?:^|(?<=\s))#.*', "comment"),
+        (r'^\s*(?:-\s+)?([^\s#:\'"][^#:]*?|' + DOUBLE_QUOTED + '|' + SINGLE_QUOTED + r')\s*:(?=\s|$)', ("keyword",)),
+        (DOUBLE_QUOTED, "string"),
+        (SINGLE_QUOTED, "string"),
+        (r'\b(?:true|false|yes|no|on|off|null)\b|~', "keyword"),
+        (r'^(?:---|\.\.\.)\s*$', "keyword"),
+        (NUMBER, "number"),
+    ],
+)
+JSON_KEYWORDS = ['true', 'false', 'null']
+JSON_LEXER = Lexer(
+    [
+        (r'(' + DOUBLE_QUOTED + r')\s*:', ("keyword",)),
+        (DOUBLE_QUOTED, "string"),
+        (r'-?\b\d+(?:\.\d+)?(?:[eE][+-]?\d+)?\b', "number"),
+    ],
+    words={"keyword": JSON_KEYWORDS},
+)
+DEFAULT_LEXER = Lexer(
+    [
+        (DOUBLE_QUOTED, "string"),
+        (SINGLE_QUOTED, "string"),
+        (r'\b\d+\b', "number"),
+    ],
+)
+
+_languages = {}
+_by_extension = {}
+
+def register_language(name, lexer, extensions):
+    """Registers the lexer of a language for the given file extensions."""
+    _languages[name] = lexer
+    for extension in extensions:
+        _by_extension[extension.lower()] = name
+
+def language_for_path(path):
+    """Returns the name of the language of a file, or None if it has no lexer."""
+    return _by_extension.get(os.path.splitext(path)[1].lower())
+
+def lexer_for_path(path):
+    """Returns the lexer for a file, based on its extension."""
+    name = language_for_path(path)
+    return _languages[name] if name else DEFAULT_LEXER
+
+register_language("python", PYTHON_LEXER, [".py", ".pyw", ".pyi"])
+register_language("web", WEB_LEXER, [".js", ".mjs", ".ts", ".html", ".htm", ".css"])
+register_language("go", GO_LEXER, [".go"])
+register_language("rust", RUST_LEXER, [".rs"])
+register_language("yaml", YAML_LEXER, [".yaml", ".yml"])
+register_language("json", JSON_LEXER, [".json"])
@@ -1,13 +1,19 @@
+import time
+_IMPORT_START = time.perf_counter()
+
+import argparse
 import os
 import tkinter as tk
 from tkinter import ttk, messagebox
+from config import STARTUP_TARGET_SECONDS
 from menu import AppMenu
 from treeview import FileTreeView
-from texteditor import TextEditor
-from imageviewer import ImageViewer
-from pdfviewer import PDFViewer
-from docxviewer import DocxViewer
-import mimetypes
+from viewers import create_default_registry
+from formatting import format_size
+from textdetect import sniff_file
+from workers import dispatcher_for
+
+_IMPORT_END = time.perf_counter()
 
 class Pylinq:
     def __init__(self, root):
@@ -15,9 +21,6 @@ class Pylinq:
         self.root.title("PyLinq -- File Exploration App")
         self.current_path = os.path.expanduser("~")
         
-        # Initialize mimetypes
-        mimetypes.init()
-
         # Create a PanedWindow to hold the Treeview and content area
         self.main_paned_window = tk.PanedWindow(root, orient=tk.HORIZONTAL, sashwidth=5)
         self.main_paned_window.pack(fill="both", expand=True)
@@ -30,23 +33,23 @@ class Pylinq:
         self.content_frame = ttk.Frame(self.main_paned_window)
         self.main_paned_window.add(self.content_frame, stretch="always", minsize=400)
 
-        # Initialize the Treeview and all viewers
+        # Initialize the Treeview
         self.file_tree = FileTreeView(self.file_tree_frame, self.open_file)
-        
-        # Initialize all viewers with the content frame as parent
-        self.text_editor = TextEditor(self.content_frame)
-        self.image_viewer = ImageViewer(self.content_frame)
-        self.pdf_viewer = PDFViewer(self.content_frame)
-        self.docx_viewer = DocxViewer(self.content_frame)
-
-        # Initially hide all viewers
-        self.text_editor.text_frame.pack_forget()
-        self.image_viewer.image_frame.pack_forget()
-        self.pdf_viewer.pdf_frame.pack_forget()
-        self.docx_viewer.docx_frame.pack_forget()
-        
+
+        # Viewers are imported and built the first time a matching file is opened
+        self.viewers = create_default_registry(self.content_frame)
+
         # Show the text editor initially
-        self.show_text_editor()
+        self.viewers.show("text")
+        self.text_editor.on_binary_file = lambda path: self.viewers.open("hex", path)
+
+        # The file search index is opened the first time a search is made
+        self.file_index = None
+        # Likewise the full-text index of PDF and DOCX documents
+        self.document_index = None
+
+        # The Edit > Find window, created the first time it is shown
+        self.find_dialog = None
 
         # Set up the menu
         self.menu = AppMenu(root, self.execute_callback)
@@ -71,6 +74,15 @@ class Pylinq:
         root.bind('<Control-s>', self.save_file)
         root.bind('<Control-q>', self.on_closing)
         root.bind('<Control-o>', self.open_file_dialog)
+        root.bind('<Control-F>', lambda e: self.show_file_search())
+        root.bind('<Control-f>', lambda e: self.show_find())
+        root.bind('<<Find>>', lambda e: self.show_find())
+        root.bind('<Control-h>', lambda e: self.show_find(replace=True))
+        root.bind('<<Replace>>', lambda e: self.show_find(replace=True))
+        root.bind('<F3>', self.find_next)
+        root.bind('<Shift-F3>', lambda e: self.find_next(backward=True))
+        root.bind('<Control-g>', self.goto_line)
+        root.bind('<Control-t>', self.toggle_follow)
         
         # Set protocol for window close
         root.protocol("WM_DELETE_WINDOW", self.on_closing)
@@ -81,6 +93,17 @@ class Pylinq:
         self.callbacks['open'] = self.open_file
         self.callbacks['open_dialog'] = self.open_file_dialog
         self.callbacks['close'] = self.on_closing
+        self.callbacks['file_search'] = self.show_file_search
+        self.callbacks['directory_search'] = lambda: self.show_file_search(dirs_only=True)
+        self.callbacks['content_search'] = self.show_content_search
+        self.callbacks['document_search'] = self.show_document_search
+        self.callbacks['toggle_sizes'] = self.file_tree.toggle_sizes
+        self.callbacks['find'] = self.show_find
+        self.callbacks['replace'] = lambda: self.show_find(replace=True)
+        self.callbacks['find_next'] = self.find_next
+        self.callbacks['find_previous'] = lambda: self.find_next(backward=True)
+        self.callbacks['goto_line'] = self.goto_line
+        self.callbacks['toggle_follow'] = self.toggle_follow
         self.callbacks['dummy'] = self.dummy_command
 
     def execute_callback(self, callback_name, *args, **kwargs):
@@ -90,6 +113,26 @@ class Pylinq:
         else:
             print(f"No callback found for: {callback_name}")
 
+    @property
+    def text_editor(self):
+        return self.viewers.get("text")
+
+    @property
+    def hex_viewer(self):
+        return self.viewers.get("hex")
+
+    @property
+    def image_viewer(self):
+        return self.viewers.get("image")
+
+    @property
+    def pdf_viewer(self):
+        return self.viewers.get("pdf")
+
+    @property
+    def docx_viewer(self):
+        return self.viewers.get("docx")
+
     def open_file(self, path):
         """Open a file based on its type."""
         try:
@@ -99,26 +142,19 @@ class Pylinq:
                 
             self.current_path = path
             
-            # Determine file type
-            mime_type, _ = mimetypes.guess_type(path)
-            file_extension = os.path.splitext(path)[1].lower()
-            
-            if mime_type and mime_type.startswith('image/'):
-                self.show_image_viewer()
-                self.image_viewer.open_image(path)
-            elif file_extension == '.pdf':
-                self.show_pdf_viewer()
-                self.pdf_viewer.open_pdf(path)
-            elif file_extension == '.docx' or file_extension == '.doc':
-                self.show_docx_viewer()
-                self.docx_viewer.open_docx(path)
-            elif os.path.isdir(path):
+            if os.path.isdir(path):
                 # If it's a directory, just update the tree view
                 messagebox.showinfo("Directory", f"Selected directory: {path}")
             else:
-                # Default to text editor for all other files
-                self.show_text_editor()
-                self.text_editor.open_file(path)
+                name = self.viewers.viewer_for_path(path)
+                if name != "text":
+                    self.viewers.open(name, path)
+                    return
+                # Only the first few KB are read to tell text from binary
+                detection = sniff_file(path)
+                if detection.binary:
+                    name = "hex"
+                self.viewers.open(name, path, detection=detection)
         except Exception as e:
             messagebox.showerror("Error", f"Error opening file: {e}")
 
@@ -145,21 +181,191 @@ class Pylinq:
         if self.current_path:
             try:
                 # Check if we're in text editor mode
-                if self.text_editor.text_frame.winfo_ismapped():
-                    self.text_editor.save_file(self.current_path)
-                    messagebox.showinfo("Success", f"File saved: {self.current_path}")
+                if self.viewers.is_active("text"):
+                    editor = self.text_editor
+                    path = editor.current_file_path
+
+                    def on_done(success):
+                        if success:
+                            messagebox.showinfo("Success", f"File saved: {path}")
+                    # Unchanged files are not written again, so there is nothing to report
+                    editor.save_file(on_done=on_done if editor.text_widget.edit_modified() else None)
                 else:
                     messagebox.showinfo("Info", "No text file is currently open for editing.")
             except Exception as e:
                 messagebox.showerror("Error", f"Error saving file: {e}")
 
+    def show_file_search(self, dirs_only=False):
+        """Opens a search window backed by the persistent file index."""
+        from fsindex import FileIndex
+        from searchdialog import SearchDialog
+        if self.file_index is None:
+            self.file_index = FileIndex(dispatcher_for(self.root))
+
+        def start_search(query, add_results, finish):
+            def on_results(rows):
+                add_results([
+                    ((name, os.path.dirname(path), "" if is_dir else format_size(size)), path)
+                    for path, name, is_dir, size, _mtime_ns in rows
+                ])
+
+            def on_done(count, error):
+                finish(f"Search failed: {error}" if error else None)
+            return self.file_index.search(query, on_results, on_done, dirs_only=dirs_only)
+
+        dialog = SearchDialog(
+            self.root,
+            "Directory Search" if dirs_only else "File Search",
+            [("Name", 220), ("Folder", 460), ("Size", 90)],
+            start_search,
+            self.open_file,
+        )
+
+        # Bring the index up to date in the background while the user types
+        def on_progress(visited, relisted):
+            dialog.set_info(f"Indexing… {visited:,} folders checked")
+
+        def on_done(visited, relisted, seconds):
+            dialog.set_info(f"Index up to date ({visited:,} folders, {relisted:,} changed, {seconds:.1f}s)")
+        dialog.set_info("Indexing…")
+        self.file_index.refresh(on_progress, on_done)
+
+    def show_content_search(self):
+        """Opens a window searching file contents below the selected folder."""
+        from contentsearch import ContentSearch
+        from searchdialog import SearchDialog
+        folder = self.file_tree.selected_folder()
+        if not folder:
+            folder = self.current_path if os.path.isdir(self.current_path) else os.path.dirname(self.current_path)
+
+        def start_search(query, add_results, finish, regex=False, match_case=False, whole_word=False):
+            def on_results(matches):
+                add_results([
+                    ((os.path.relpath(path, folder), line, snippet), (path, line, column))
+                    for path, line, column, snippet in matches
+                ])
+
+            def on_done(count, files, error):
+                finish(f"Search failed: {error}" if error else f"{count:,} matches in {files:,} files")
+            return ContentSearch(
+                dispatcher_for(self.root), folder, query, on_results, on_done,
+                regex=regex, match_case=match_case, whole_word=whole_word,
+            ).start()
+
+        SearchDialog(
+            self.root,
+            f"Find in Files: {folder}",
+            [("File", 260), ("Line", 60), ("Text", 460)],
+            start_search,
+            lambda hit: self.open_file_at(*hit),
+            options=[("regex", "Regular expression"), ("match_case", "Match case"), ("whole_word", "Whole word")],
+        )
+
+    def show_document_search(self):
+        """Opens a window searching the text of the PDF and DOCX documents below the selected folder."""
+        from docindex import DocumentIndex
+        from searchdialog import SearchDialog
+        if self.document_index is None:
+            self.document_index = DocumentIndex(dispatcher_for(self.root))
+        folder = self.file_tree.selected_folder()
+        if not folder:
+            folder = self.current_path if os.path.isdir(self.current_path) else os.path.dirname(self.current_path)
+
+        def start_search(query, add_results, finish):
+            def on_results(rows):
+                add_results([
+                    ((os.path.relpath(path, folder),
+                      f"Page {location + 1}" if path.lower().endswith(".pdf") else f"Paragraph {location + 1}",
+                      snippet), (path, location))
+                    for path, location, snippet in rows
+                ])
+
+            def on_done(count, error):
+                finish(f"Search failed: {error}" if error else None)
+            return self.document_index.search(query, folder, on_results, on_done)
+
+        dialog = SearchDialog(
+            self.root,
+            f"Search Documents: {folder}",
+            [("Document", 260), ("Location", 90), ("Text", 420)],
+            start_search,
+            lambda hit: self.open_document_at(*hit),
+        )
+
+        # Extract the text of new and changed documents in the background while the user types
+        def on_progress(checked, extracted):
+            dialog.set_info(f"Indexing… {checked:,} documents checked, {extracted:,} extracted")
+
+        def on_done(checked, extracted, removed, seconds, error):
+            if error:
+                dialog.set_info(f"Indexing failed: {error}")
+            else:
+                dialog.set_info(f"Index up to date ({checked:,} documents, {extracted:,} extracted, {seconds:.1f}s)")
+        dialog.set_info("Indexing…")
+        self.document_index.refresh(folder, on_progress, on_done)
+
+    def open_document_at(self, path, location):
+        """Opens a PDF at a page or a DOCX document at a paragraph, both counted from 0."""
+        if self.viewers.viewer_for_path(path) == "pdf" and os.path.isfile(path):
+            # PDFs open asynchronously, so the page is passed along
+            self.current_path = path
+            self.viewers.open("pdf", path, page=location)
+            return
+        self.open_file(path)
+        if self.viewers.is_active("docx") and self.docx_viewer.current_docx_path == path:
+            self.docx_viewer.goto_paragraph(location)
+
+    def show_find(self, replace=False):
+        """Shows the find and replace window for the text editor."""
+        if not self.viewers.is_active("text"):
+            messagebox.showinfo("Info", "No text file is currently open.")
+            return
+        if self.find_dialog is not None and self.find_dialog.exists():
+            self.find_dialog.show(replace)
+            return
+        from finddialog import FindDialog
+        self.find_dialog = FindDialog(self.root, self.text_editor, replace=replace)
+
+    def find_next(self, event=None, backward=False):
+        """Selects the next (or previous) match of the text searched for last."""
+        if self.viewers.is_active("text") and self.text_editor.finder.pattern:
+            self.text_editor.finder.find_next(backward=backward)
+        else:
+            self.show_find()
+
+    def goto_line(self, event=None):
+        """Asks for a line number and moves the text editor's cursor there."""
+        if not self.viewers.is_active("text"):
+            messagebox.showinfo("Info", "No text file is currently open.")
+            return
+        from tkinter import simpledialog
+        line = simpledialog.askinteger("Go to Line", "Line number:", minvalue=1, parent=self.root)
+        if line:
+            self.text_editor.goto_line(line)
+
+    def toggle_follow(self, event=None):
+        """Starts or stops appending what is written to the open text file, like tail -f."""
+        if not self.viewers.is_active("text") or not self.text_editor.current_file_path:
+            messagebox.showinfo("Info", "No text file is currently open.")
+            return
+        self.text_editor.toggle_follow()
+
+    def open_file_at(self, path, line, column=0):
+        """Opens a file in the text editor and scrolls to the given line."""
+        self.open_file(path)
+        if self.viewers.is_active("text") and self.text_editor.current_file_path == path:
+            self.text_editor.goto_line(line, column)
+
     def on_closing(self, event=None):
         """Handle application closing."""
         try:
-            self.text_editor.on_closing()
-            self.image_viewer.on_closing()
-            self.pdf_viewer.on_closing()
-            self.docx_viewer.on_closing()
+            if self.file_index:
+                self.file_index.close()
+            if self.document_index:
+                self.document_index.close()
+            self.file_tree.close()
+            for viewer in self.viewers.built():
+                viewer.on_closing()
             self.root.destroy()
         except Exception as e:
             print(f"Error during closing: {e}")
@@ -169,54 +375,37 @@ class Pylinq:
         """Placeholder for unimplemented commands."""
         messagebox.showinfo("Not Implemented", f"The '{button_name}' feature is not yet implemented.")
 
-    def show_text_editor(self):
-        """Show the text editor and hide the other viewers."""
-        # Hide all viewers first
-        self.text_editor.text_frame.pack_forget()
-        self.image_viewer.image_frame.pack_forget()
-        self.pdf_viewer.pdf_frame.pack_forget()
-        self.docx_viewer.docx_frame.pack_forget()
-        
-        # Then show only the text editor
-        self.text_editor.text_frame.pack(fill="both", expand=True)
-
-    def show_image_viewer(self):
-        """Show the image viewer and hide the other viewers."""
-        # Hide all viewers first
-        self.text_editor.text_frame.pack_forget()
-        self.image_viewer.image_frame.pack_forget()
-        self.pdf_viewer.pdf_frame.pack_forget()
-        self.docx_viewer.docx_frame.pack_forget()
-        
-        # Then show only the image viewer
-        self.image_viewer.image_frame.pack(fill="both", expand=True)
-        
-    def show_pdf_viewer(self):
-        """Show the PDF viewer and hide the other viewers."""
-        # Hide all viewers first
-        self.text_editor.text_frame.pack_forget()
-        self.image_viewer.image_frame.pack_forget()
-        self.pdf_viewer.pdf_frame.pack_forget()
-        self.docx_viewer.docx_frame.pack_forget()
-        
-        # Then show only the PDF viewer
-        self.pdf_viewer.pdf_frame.pack(fill="both", expand=True)
-        
-    def show_docx_viewer(self):
-        """Show the DOCX viewer and hide the other viewers."""
-        # Hide all viewers first
-        self.text_editor.text_frame.pack_forget()
-        self.image_viewer.image_frame.pack_forget()
-        self.pdf_viewer.pdf_frame.pack_forget()
-        self.docx_viewer.docx_frame.pack_forget()
-        
-        # Then show only the DOCX viewer
-        self.docx_viewer.docx_frame.pack(fill="both", expand=True)
+def profile_startup(root, app, tk_start, tk_end, app_end):
+    """Prints where the time to the first window went once the window is mapped."""
+    def report(event=None):
+        root.unbind("<Map>", binding)
+        first_window = time.perf_counter()
+        print("Startup profile (seconds):")
+        print(f"  imports          {_IMPORT_END - _IMPORT_START:8.3f}")
+        print(f"  Tk root          {tk_end - tk_start:8.3f}")
+        print(f"  Pylinq.__init__  {app_end - tk_end:8.3f}")
+        for name, seconds in app.viewers.build_times.items():
+            print(f"    {name + ' viewer':<14} {seconds:8.3f}")
+        print(f"  first window     {first_window - _IMPORT_START:8.3f} "
+              f"(target {STARTUP_TARGET_SECONDS:.3f})")
+    binding = root.bind("<Map>", report, add="+")
+
+def main():
+    parser = argparse.ArgumentParser(description="PyLinq file exploration app")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="report import and construction times up to the first window")
+    args = parser.parse_args()
+
+    tk_start = time.perf_counter()
+    root = tk.Tk()
+    tk_end = time.perf_counter()
+    app = Pylinq(root)
+    if args.profile_startup:
+        profile_startup(root, app, tk_start, tk_end, time.perf_counter())
+    root.mainloop()
 
 if __name__ == "__main__":
     try:
-        root = tk.Tk()
-        app = Pylinq(root)
-        root.mainloop()
+        main()
     except Exception as e:
         messagebox.showerror("Fatal Error", f"An unexpected error occurred: {e}")
\ No newline at end of file
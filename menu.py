@@ -30,8 +30,11 @@ class AppMenu:
         edit_menu.add_command(label="Copy", command=lambda: self.execute_callback('dummy', 'Copy'), accelerator="Ctrl+C")
         edit_menu.add_command(label="Paste", command=lambda: self.execute_callback('dummy', 'Paste'), accelerator="Ctrl+V")
         edit_menu.add_separator()
-        edit_menu.add_command(label="Find...", command=lambda: self.execute_callback('dummy', 'Find'), accelerator="Ctrl+F")
-        edit_menu.add_command(label="Replace...", command=lambda: self.execute_callback('dummy', 'Replace'), accelerator="Ctrl+H")
+        edit_menu.add_command(label="Find...", command=lambda: self.execute_callback('find'), accelerator="Ctrl+F")
+        edit_menu.add_command(label="Find Next", command=lambda: self.execute_callback('find_next'), accelerator="F3")
+        edit_menu.add_command(label="Find Previous", command=lambda: self.execute_callback('find_previous'), accelerator="Shift+F3")
+        edit_menu.add_command(label="Replace...", command=lambda: self.execute_callback('replace'), accelerator="Ctrl+H")
+        edit_menu.add_command(label="Go to Line...", command=lambda: self.execute_callback('goto_line'), accelerator="Ctrl+G")
         edit_menu.add_separator()
         edit_menu.add_command(label="Select All", command=lambda: self.execute_callback('dummy', 'Select All'), accelerator="Ctrl+A")
 
@@ -44,12 +47,16 @@ class AppMenu:
         view_menu.add_separator()
         view_menu.add_command(label="Toggle Line Numbers", command=lambda: self.execute_callback('dummy', 'Toggle Line Numbers'))
         view_menu.add_command(label="Toggle Word Wrap", command=lambda: self.execute_callback('dummy', 'Toggle Word Wrap'))
+        view_menu.add_command(label="Toggle Folder Sizes", command=lambda: self.execute_callback('toggle_sizes'))
+        view_menu.add_command(label="Follow File", command=lambda: self.execute_callback('toggle_follow'), accelerator="Ctrl+T")
 
         # Add Tools menu
         tools_menu = Menu(self.menu_bar, tearoff=0)
         self.menu_bar.add_cascade(label="Tools", menu=tools_menu)
-        tools_menu.add_command(label="File Search", command=lambda: self.execute_callback('dummy', 'File Search'), accelerator="Ctrl+Shift+F")
-        tools_menu.add_command(label="Directory Search", command=lambda: self.execute_callback('dummy', 'Directory Search'))
+        tools_menu.add_command(label="File Search", command=lambda: self.execute_callback('file_search'), accelerator="Ctrl+Shift+F")
+        tools_menu.add_command(label="Directory Search", command=lambda: self.execute_callback('directory_search'))
+        tools_menu.add_command(label="Find in Files...", command=lambda: self.execute_callback('content_search'))
+        tools_menu.add_command(label="Search Documents...", command=lambda: self.execute_callback('document_search'))
         tools_menu.add_separator()
         tools_menu.add_command(label="Options", command=lambda: self.execute_callback('dummy', 'Options'))
 
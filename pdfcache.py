@@ -0,0 +1,186 @@
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+from PIL import Image
+
+from config import APP_DATA_DIR, PDF_CACHE_MAX_BYTES, PDF_DISK_CACHE_MAX_BYTES, PDF_DISK_CACHE_NAME
+
+def page_key(path, mtime_ns, page, dpi):
+    """Returns the cache key of a page of a document rendered at dpi."""
+    return (os.path.abspath(path), mtime_ns, page, dpi)
+
+def image_bytes(image):
+    """Returns the memory an image takes: one byte per band per pixel."""
+    return image.width * image.height * len(image.getbands())
+
+class PageCache:
+    """
+    An LRU cache of rendered PDF pages keyed by (path, mtime, page, dpi).
+
+    Keys carry the st_mtime_ns of the document, so a page of a file that has
+    changed is never served from the cache. The in-memory tier is bounded by the
+    total bytes of the page bitmaps. Pages are also written to an optional disk
+    tier in disk_dir, in the background, so documents opened recently render from
+    PNG files instead of the PDF; it is bounded by disk_max_bytes and drops the
+    least recently read files first. Safe to use from several threads.
+    """
+    def __init__(self, max_bytes=PDF_CACHE_MAX_BYTES, disk_dir=None, disk_max_bytes=PDF_DISK_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.pages = OrderedDict()  # key -> image
+        self.total_bytes = 0
+        self.lock = threading.Lock()
+        self.disk_dir = disk_dir if disk_max_bytes > 0 else None
+        self.disk_max_bytes = disk_max_bytes
+        self.disk_bytes = None  # measured on the first write to the disk tier
+        self.disk_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def default(cls):
+        """Returns a cache with its disk tier in the application data folder."""
+        return cls(disk_dir=os.path.join(APP_DATA_DIR, PDF_DISK_CACHE_NAME))
+
+    def get(self, key):
+        """Returns the cached page image, or None."""
+        with self.lock:
+            image = self.pages.get(key)
+            if image is not None:
+                self.pages.move_to_end(key)
+                self.hits += 1
+                return image
+        image = self.load_from_disk(key)
+        with self.lock:
+            if image is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        self.put(key, image, write_to_disk=False)
+        return image
+
+    def peek(self, key):
+        """Returns the page if it is held in memory, without reading the disk tier."""
+        with self.lock:
+            image = self.pages.get(key)
+            if image is not None:
+                self.pages.move_to_end(key)
+                self.hits += 1
+            return image
+
+    def closest(self, key):
+        """
+        Returns the image held in memory of the same page at the DPI nearest to that of
+        key, preferring higher ones, or None. Good enough to show scaled until the real one arrives.
+        """
+        best = None
+        with self.lock:
+            for cached in self.pages:
+                if cached[:3] == key[:3]:
+                    distance = (cached[3] < key[3], abs(cached[3] - key[3]))
+                    if best is None or distance < best[0]:
+                        best = (distance, cached)
+            return self.pages[best[1]] if best else None
+
+    def put(self, key, image, write_to_disk=True):
+        """Stores a rendered page. It is written to the disk tier on a worker thread."""
+        size = image_bytes(image)
+        with self.lock:
+            self._remove(key)
+            if size <= self.max_bytes:
+                self.pages[key] = image
+                self.total_bytes += size
+                # Evict the least recently used pages until we are within budget
+                while self.total_bytes > self.max_bytes:
+                    self._remove(next(iter(self.pages)))
+        if write_to_disk and self.disk_dir:
+            threading.Thread(target=self.save_to_disk, args=(key, image), name="pdf-cache-write",
+                             daemon=True).start()
+
+    def clear(self):
+        """Drops the pages held in memory; the disk tier is kept."""
+        with self.lock:
+            self.pages.clear()
+            self.total_bytes = 0
+
+    def _remove(self, key):
+        image = self.pages.pop(key, None)
+        if image is not None:
+            self.total_bytes -= image_bytes(image)
+
+    def disk_path(self, key):
+        return os.path.join(self.disk_dir, hashlib.sha1(repr(key).encode("utf-8")).hexdigest() + ".png")
+
+    def load_from_disk(self, key):
+        """Returns the page from the disk tier, or None."""
+        if not self.disk_dir:
+            return None
+        path = self.disk_path(key)
+        try:
+            with Image.open(path) as file:
+                image = file.copy()
+            # The file times order the disk tier from least to most recently used
+            os.utime(path)
+            return image
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            print(f"Error reading cached page {path}: {e}")
+            return None
+
+    def save_to_disk(self, key, image):
+        """Writes a page to the disk tier atomically, then trims the tier to its budget."""
+        path = self.disk_path(key)
+        try:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(suffix=".tmp", dir=self.disk_dir)
+            try:
+                with os.fdopen(fd, "wb") as file:
+                    # Fast compression: the disk tier trades space for render time
+                    image.save(file, format="PNG", compress_level=1)
+                os.replace(temp_path, path)
+            except BaseException:
+                os.remove(temp_path)
+                raise
+            size = os.path.getsize(path)
+        except OSError as e:
+            print(f"Error caching page {path}: {e}")
+            return
+        with self.disk_lock:
+            if self.disk_bytes is None:
+                self.disk_bytes = self.measure_disk()
+            else:
+                self.disk_bytes += size
+            if self.disk_bytes > self.disk_max_bytes:
+                self.trim_disk()
+
+    def cached_files(self):
+        """Returns (mtime, size, path) for every file of the disk tier."""
+        files = []
+        try:
+            with os.scandir(self.disk_dir) as entries:
+                for entry in entries:
+                    if entry.name.endswith(".png"):
+                        stat = entry.stat()
+                        files.append((stat.st_mtime, stat.st_size, entry.path))
+        except OSError as e:
+            print(f"Error listing {self.disk_dir}: {e}")
+        return files
+
+    def measure_disk(self):
+        return sum(size for _, size, _ in self.cached_files())
+
+    def trim_disk(self):
+        """Deletes the least recently used files until the disk tier is within its budget."""
+        files = sorted(self.cached_files())
+        self.disk_bytes = sum(size for _, size, _ in files)
+        for _, size, path in files:
+            if self.disk_bytes <= self.disk_max_bytes:
+                break
+            try:
+                os.remove(path)
+                self.disk_bytes -= size
+            except OSError as e:
+                print(f"Error removing cached page {path}: {e}")
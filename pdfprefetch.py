@@ -0,0 +1,171 @@
+import itertools
+import queue
+import threading
+
+from config import PDF_PREFETCH_RADIUS, PDF_RENDER_WORKERS
+from pdfcache import page_key
+
+# Priority of the page that was asked for; prefetches count up from it by distance
+REQUESTED = 0
+
+class RenderTask:
+    """A page waiting for or being rendered by a PageScheduler worker."""
+    def __init__(self, key, path, page, dpi, priority):
+        self.key = key
+        self.path = path
+        self.page = page
+        self.dpi = dpi
+        self.priority = priority
+        self.running = False
+        self.cancelled = False
+        # (on_ready, on_error) of the request waiting for this page, touched on the main thread only
+        self.waiter = None
+
+class PageScheduler:
+    """
+    Renders PDF pages on a pool of worker threads, the requested pages first.
+
+    request() delivers a page from the memory cache at once, or queues it with
+    the highest priority and delivers it when rendered. It also queues the pages
+    on either side of it, nearest and following pages first, so page turns
+    usually find the next page ready. request_pages() does the same for all the
+    pages in view at once. A new request supersedes the previous one:
+    its callbacks are dropped and queued prefetches that are out of the new range
+    are cancelled, while pages already being rendered are finished and cached.
+    render(path, page, dpi) runs on the workers and returns the image; the
+    callbacks run on the main thread. Rendering happens in other processes (see
+    pdfrender), so threads are enough to render pages in parallel.
+    """
+    def __init__(self, cache, render, dispatcher, workers=PDF_RENDER_WORKERS, radius=PDF_PREFETCH_RADIUS):
+        self.cache = cache
+        self.render = render
+        self.dispatcher = dispatcher
+        self.radius = radius
+        self.queue = queue.PriorityQueue()
+        self.sequence = itertools.count()
+        self.lock = threading.Lock()
+        # key -> RenderTask, queued, running, or rendered and not yet handed over on the main thread
+        self.tasks = {}
+        self.closed = False
+        self._threads = [threading.Thread(target=self._work, name=f"pdf-render-{i}", daemon=True)
+                         for i in range(workers)]
+        for thread in self._threads:
+            thread.start()
+
+    def request(self, path, mtime_ns, page, dpi, on_ready, on_error=None, page_count=None):
+        """
+        Asks for a page and prefetches its neighbours. Returns True if on_ready(image) was
+        called right away from the cache, False if it will be called once the page is rendered.
+        """
+        neighbours = []
+        for distance in range(1, self.radius + 1):
+            for neighbour in (page + distance, page - distance):
+                if neighbour >= 0 and (page_count is None or neighbour < page_count):
+                    neighbours.append((neighbour, dpi))
+        cached = self.request_pages(path, mtime_ns, [(page, dpi)], lambda page, image: on_ready(image),
+                                    on_error and (lambda page, error: on_error(error)), prefetch=neighbours)
+        return bool(cached)
+
+    def request_pages(self, path, mtime_ns, pages, on_ready, on_error=None, prefetch=()):
+        """
+        Asks for several pages, given as (page, dpi) in order of priority, then for the
+        prefetch pages. Queued pages that are in neither list are cancelled. on_ready(page,
+        image) is called right away for the pages in the memory cache, and for the others
+        once they are rendered. Returns the pages delivered from the cache.
+        """
+        self.drop_waiters()
+        wanted = {page_key(path, mtime_ns, page, dpi) for page, dpi in list(pages) + list(prefetch)}
+        with self.lock:
+            for key, task in list(self.tasks.items()):
+                if key not in wanted and not task.running:
+                    task.cancelled = True
+                    del self.tasks[key]
+        cached = []
+        for priority, (page, dpi) in enumerate(pages, REQUESTED):
+            key = page_key(path, mtime_ns, page, dpi)
+            image = self.cache.peek(key)
+            if image is not None:
+                cached.append((page, image))
+            else:
+                self.schedule(key, path, page, dpi, priority).waiter = (on_ready, on_error)
+        for priority, (page, dpi) in enumerate(prefetch, REQUESTED + len(pages)):
+            key = page_key(path, mtime_ns, page, dpi)
+            if self.cache.peek(key) is None:
+                self.schedule(key, path, page, dpi, priority)
+        for page, image in cached:
+            on_ready(page, image)
+        return [page for page, _ in cached]
+
+    def schedule(self, key, path, page, dpi, priority):
+        """Queues a page, or raises the priority of a page that is already queued. Returns its task."""
+        with self.lock:
+            task = self.tasks.get(key)
+            if task is None:
+                task = self.tasks[key] = RenderTask(key, path, page, dpi, priority)
+            elif task.running or task.priority <= priority:
+                return task
+            task.priority = priority
+            # The entry queued before stays in the queue and is skipped by the workers
+            self.queue.put((priority, next(self.sequence), task))
+        return task
+
+    def drop_waiters(self):
+        """Forgets the callbacks of earlier requests, whose pages are no longer wanted on screen."""
+        with self.lock:
+            for task in self.tasks.values():
+                task.waiter = None
+
+    def cancel_all(self):
+        """Drops every request and queued prefetch, when a document is closed."""
+        with self.lock:
+            for task in self.tasks.values():
+                task.waiter = None
+                if not task.running:
+                    task.cancelled = True
+            self.tasks = {key: task for key, task in self.tasks.items() if task.running}
+
+    def close(self):
+        """Stops the workers once the pages being rendered are done."""
+        self.closed = True
+        self.cancel_all()
+        for _ in self._threads:
+            self.queue.put((-1, next(self.sequence), None))
+
+    def _work(self):
+        """Worker thread body."""
+        while True:
+            priority, _, task = self.queue.get()
+            if task is None:
+                return
+            with self.lock:
+                if task.cancelled or task.running or priority != task.priority:
+                    continue
+                task.running = True
+            image, error = None, None
+            try:
+                image = self.cache.get(task.key)
+                if image is None:
+                    image = self.render(task.path, task.page, task.dpi)
+                    self.cache.put(task.key, image)
+            except Exception as e:
+                error = e
+            if not self.closed:
+                # The task stays known until it is delivered, so that a request made
+                # meanwhile can still drop its waiter
+                self.dispatcher.post(self._deliver, task, image, error)
+
+    def _deliver(self, task, image, error):
+        """Hands a rendered page to the request waiting for it, if it is still wanted."""
+        with self.lock:
+            if self.tasks.get(task.key) is task:
+                del self.tasks[task.key]
+        if task.waiter is None:
+            return
+        on_ready, on_error = task.waiter
+        task.waiter = None
+        if error is None:
+            on_ready(task.page, image)
+        elif on_error:
+            on_error(task.page, error)
+        else:
+            print(f"Error rendering page {task.page + 1} of {task.path}: {error}")
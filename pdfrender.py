@@ -0,0 +1,274 @@
+import collections
+import concurrent.futures
+import itertools
+import multiprocessing
+import os
+import queue
+import threading
+from multiprocessing import shared_memory
+
+from config import PDF_OPEN_DOCUMENTS, PDF_RENDER_BACKEND, PDF_RENDER_WORKERS
+
+# Page count and the (width, height) in points of every page as displayed, None where unreadable
+DocumentInfo = collections.namedtuple("DocumentInfo", ["page_count", "page_sizes"])
+
+class PdfiumDocument:
+    """A document opened with pypdfium2, which renders in-process without any subprocess."""
+    name = "pdfium"
+
+    def __init__(self, path):
+        import pypdfium2
+        self.pdf = pypdfium2.PdfDocument(path)
+
+    def page_count(self):
+        return len(self.pdf)
+
+    def page_size(self, page_num):
+        # Sizes from pdfium already follow the crop box and the page rotation
+        return tuple(self.pdf.get_page_size(page_num))
+
+    def render(self, page_num, dpi):
+        page = self.pdf[page_num]
+        try:
+            return page.render(scale=dpi / 72, rev_byteorder=True).to_pil()
+        finally:
+            page.close()
+
+    def close(self):
+        self.pdf.close()
+
+class MuPDFDocument:
+    """A document opened with PyMuPDF."""
+    name = "mupdf"
+
+    def __init__(self, path):
+        import fitz
+        self.pdf = fitz.open(path)
+
+    def page_count(self):
+        return self.pdf.page_count
+
+    def page_size(self, page_num):
+        rect = self.pdf[page_num].rect
+        return rect.width, rect.height
+
+    def render(self, page_num, dpi):
+        from PIL import Image
+        pixmap = self.pdf[page_num].get_pixmap(dpi=dpi, alpha=False)
+        return Image.frombytes("RGB", (pixmap.width, pixmap.height), pixmap.samples)
+
+    def close(self):
+        self.pdf.close()
+
+class PopplerDocument:
+    """
+    The fallback: PyPDF2 reads the page sizes and pdf2image renders each page with
+    its own pdftoppm run. Only the parsing is kept between pages.
+    """
+    name = "poppler"
+
+    def __init__(self, path):
+        from PyPDF2 import PdfReader
+        self.path = path
+        self.pdf = PdfReader(path)
+
+    def page_count(self):
+        return len(self.pdf.pages)
+
+    def page_size(self, page_num):
+        page = self.pdf.pages[page_num]
+        box = page.cropbox
+        width, height = float(box.width), float(box.height)
+        if page.rotation % 180:
+            width, height = height, width
+        return width, height
+
+    def render(self, page_num, dpi):
+        from pdf2image import convert_from_path
+        images = convert_from_path(self.path, dpi=dpi, first_page=page_num + 1, last_page=page_num + 1)
+        if not images:
+            raise ValueError(f"page {page_num + 1} could not be rendered")
+        return images[0]
+
+    def close(self):
+        self.pdf = None
+
+BACKENDS = {"pdfium": PdfiumDocument, "mupdf": MuPDFDocument, "poppler": PopplerDocument}
+BACKEND_MODULES = {"pdfium": "pypdfium2", "mupdf": "fitz", "poppler": "pdf2image"}
+
+def find_backend(name=PDF_RENDER_BACKEND):
+    """Returns the document class of a backend, or of the first one installed for "auto"."""
+    if name != "auto":
+        return BACKENDS[name]
+    for candidate in ("pdfium", "mupdf"):
+        try:
+            __import__(BACKEND_MODULES[candidate])
+            return BACKENDS[candidate]
+        except ImportError:
+            continue
+    return PopplerDocument
+
+def serve(backend_name, requests, replies, max_documents):
+    """
+    Body of a render process. Keeps up to max_documents documents open and answers
+    requests until it receives None. Rendered pages are written to a new shared memory
+    block whose name is sent back; the receiving side unlinks it.
+    """
+    backend = find_backend(backend_name)
+    documents = collections.OrderedDict()  # path -> (mtime_ns, document)
+
+    def document(path):
+        mtime_ns = os.stat(path).st_mtime_ns
+        entry = documents.pop(path, None)
+        if entry is not None and entry[0] != mtime_ns:
+            entry[1].close()
+            entry = None
+        if entry is None:
+            entry = (mtime_ns, backend(path))
+        documents[path] = entry
+        while len(documents) > max_documents:
+            documents.popitem(last=False)[1][1].close()
+        return entry[1]
+
+    while True:
+        request = requests.get()
+        if request is None:
+            break
+        request_id, kind, path, args = request
+        try:
+            if kind == "info":
+                pdf = document(path)
+                sizes = []
+                for page_num in range(pdf.page_count()):
+                    try:
+                        sizes.append(pdf.page_size(page_num))
+                    except Exception:
+                        sizes.append(None)
+                replies.put((request_id, DocumentInfo(len(sizes), sizes), None))
+            else:
+                page_num, dpi = args
+                image = document(path).render(page_num, dpi)
+                if image.mode not in ("RGB", "L"):
+                    image = image.convert("RGB")
+                pixels = image.tobytes()
+                block = shared_memory.SharedMemory(create=True, size=max(1, len(pixels)))
+                block.buf[:len(pixels)] = pixels
+                replies.put((request_id, (block.name, image.mode, image.size), None))
+                block.close()
+        except Exception as e:
+            replies.put((request_id, None, f"{type(e).__name__}: {e}"))
+    for _, pdf in documents.values():
+        pdf.close()
+
+class RenderService:
+    """
+    Renders PDF pages in long-lived worker processes.
+
+    Each process keeps the documents it has rendered recently open, so a page
+    costs a render only, not a new pdftoppm process reparsing the file.
+    Requests go over a shared queue to whichever process is free. Pixels come
+    back through a shared memory block rather than encoded as an image file.
+    The backend is pypdfium2 or PyMuPDF when installed. Otherwise it is
+    poppler, which still runs pdftoppm per page but parses the document once.
+    The processes start on the first request. render() and document_info()
+    block and may be called from any thread.
+    """
+    def __init__(self, backend=PDF_RENDER_BACKEND, processes=PDF_RENDER_WORKERS, max_documents=PDF_OPEN_DOCUMENTS):
+        self.backend = backend
+        self.process_count = processes
+        self.max_documents = max_documents
+        # Spawned, not forked, so the workers do not inherit the Tk process and its threads
+        self.context = multiprocessing.get_context("spawn")
+        self.lock = threading.Lock()
+        self.sequence = itertools.count()
+        self.pending = {}  # request id -> Future
+        self.processes = []
+        self.requests = None
+        self.replies = None
+        self._thread = None
+        self.closed = False
+
+    def render(self, path, page_num, dpi):
+        """Returns the page as a PIL image. Same signature as the render function of PageScheduler."""
+        return self.call("render", path, (page_num, dpi))
+
+    def document_info(self, path):
+        """Returns the DocumentInfo of a document."""
+        return self.call("info", path, None)
+
+    def call(self, kind, path, args):
+        future = concurrent.futures.Future()
+        with self.lock:
+            if self.closed:
+                raise RuntimeError("the render service is closed")
+            self.start()
+            request_id = next(self.sequence)
+            self.pending[request_id] = future
+        self.requests.put((request_id, kind, os.path.abspath(path), args))
+        return future.result()
+
+    def start(self):
+        """Starts the processes that are not running. Called with the lock held."""
+        if self.requests is None:
+            self.requests = self.context.Queue()
+            self.replies = self.context.Queue()
+            self._thread = threading.Thread(target=self._receive, name="pdf-render-replies", daemon=True)
+            self._thread.start()
+        self.processes = [process for process in self.processes if process.is_alive()]
+        while len(self.processes) < self.process_count:
+            process = self.context.Process(target=serve, name="pdf-render",
+                                           args=(self.backend, self.requests, self.replies, self.max_documents),
+                                           daemon=True)
+            process.start()
+            self.processes.append(process)
+
+    def close(self):
+        """Stops the processes once they have answered the requests they hold."""
+        with self.lock:
+            if self.closed:
+                return
+            self.closed = True
+            if self.requests is not None:
+                for _ in self.processes:
+                    self.requests.put(None)
+
+    def _receive(self):
+        """Thread body: resolves the futures with the replies of the processes."""
+        while True:
+            try:
+                request_id, result, error = self.replies.get(timeout=1)
+            except queue.Empty:
+                with self.lock:
+                    if self.closed and not any(process.is_alive() for process in self.processes):
+                        self._fail_pending(RuntimeError("the render service is closed"))
+                        return
+                    if self.pending and not all(process.is_alive() for process in self.processes):
+                        # A process died with a request; which one is unknown, so all of them fail
+                        self._fail_pending(RuntimeError("a PDF render process exited"))
+                continue
+            if result is not None and not isinstance(result, DocumentInfo):
+                result = self._take_image(*result)
+            with self.lock:
+                future = self.pending.pop(request_id, None)
+            if future is None:
+                continue
+            if error is not None:
+                future.set_exception(RuntimeError(error))
+            else:
+                future.set_result(result)
+
+    def _fail_pending(self, error):
+        for future in self.pending.values():
+            future.set_exception(error)
+        self.pending = {}
+
+    def _take_image(self, name, mode, size):
+        """Copies a page out of its shared memory block and frees the block."""
+        from PIL import Image
+        block = shared_memory.SharedMemory(name=name)
+        try:
+            length = size[0] * size[1] * len(mode)
+            return Image.frombytes(mode, size, bytes(block.buf[:length]))
+        finally:
+            block.close()
+            block.unlink()
@@ -0,0 +1,291 @@
+import concurrent.futures
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import tkinter as tk
+from tkinter import ttk
+
+from config import (APP_DATA_DIR, PDF_THUMB_BATCH, PDF_THUMB_CACHE_MAX_BYTES, PDF_THUMB_CACHE_NAME,
+                    PDF_THUMB_START_DELAY_MS, PDF_THUMB_WIDTH, PDF_THUMB_WORKERS)
+from workers import dispatcher_for
+
+def document_key(path):
+    """Returns the name of a document's thumbnail folder, which changes whenever the file does."""
+    stat = os.stat(path)
+    identity = f"{os.path.abspath(path)}\0{stat.st_size}\0{stat.st_mtime_ns}"
+    return hashlib.sha1(identity.encode("utf-8")).hexdigest()
+
+def thumbnail_path(folder, page_num):
+    return os.path.join(folder, f"{page_num + 1}.png")
+
+def render_thumbnails(path, first_page, last_page, width, folder):
+    """
+    Renders pages first_page..last_page (counted from 0) to PNG files of the given width
+    in folder, with a single pdftoppm run. Runs in a worker process. Returns the pages written.
+    """
+    from pdf2image import convert_from_path
+    os.makedirs(folder, exist_ok=True)
+    images = convert_from_path(path, size=(width, None), first_page=first_page + 1,
+                               last_page=last_page + 1, thread_count=1)
+    written = []
+    for page_num, image in zip(range(first_page, last_page + 1), images):
+        fd, temp_path = tempfile.mkstemp(suffix=".tmp", dir=folder)
+        try:
+            with os.fdopen(fd, "wb") as file:
+                image.save(file, format="PNG")
+            os.replace(temp_path, thumbnail_path(folder, page_num))
+        except BaseException:
+            os.remove(temp_path)
+            raise
+        written.append(page_num)
+    return written
+
+def trim_cache(cache_dir, max_bytes, keep):
+    """Deletes the least recently opened document folders until the cache is within max_bytes."""
+    folders = []
+    try:
+        with os.scandir(cache_dir) as entries:
+            for entry in entries:
+                if entry.is_dir() and entry.path != keep:
+                    size = sum(os.path.getsize(os.path.join(entry.path, name)) for name in os.listdir(entry.path))
+                    folders.append((entry.stat().st_mtime, size, entry.path))
+    except OSError as e:
+        print(f"Error listing {cache_dir}: {e}")
+        return
+    total = sum(size for _, size, _ in folders)
+    for _, size, path in sorted(folders):
+        if total <= max_bytes:
+            break
+        shutil.rmtree(path, ignore_errors=True)
+        total -= size
+
+class ThumbnailSidebar:
+    """
+    A scrolling strip of page thumbnails for a PDF document.
+
+    Thumbnails are rendered in batches of PDF_THUMB_BATCH pages by a pool of worker
+    processes, each batch in a single pdftoppm run at thumbnail size, and written
+    as PNG files to a folder per document under the application data folder. The
+    folder is keyed by the path, size and mtime of the file, so a document opened
+    again shows its thumbnails straight from disk. Like the pages of continuous
+    mode, only the thumbnails within a screen of the view are loaded; batches
+    that scroll away before a worker picks them up are cancelled. Rendering
+    starts PDF_THUMB_START_DELAY_MS after a document is opened, so its first page
+    is not competing with thumbnails. on_select(page_num) is called when a
+    thumbnail is clicked.
+    """
+    PADDING = 8
+    LABEL_HEIGHT = 16
+
+    def __init__(self, parent, on_select, width=PDF_THUMB_WIDTH):
+        self.on_select = on_select
+        self.width = width
+        self.frame = ttk.Frame(parent)
+        self.canvas = tk.Canvas(self.frame, width=width + 2 * self.PADDING, bg="#E8E8E8", highlightthickness=0)
+        self.canvas.pack(side="left", fill="y")
+        self.scrollbar = ttk.Scrollbar(self.frame, orient="vertical", command=self.canvas.yview)
+        self.scrollbar.pack(side="right", fill="y")
+        self.canvas.configure(yscrollcommand=self.on_yscroll)
+        self.canvas.bind("<Configure>", lambda e: self.schedule_viewport())
+        self.canvas.bind("<Button-1>", self.on_click)
+        self.canvas.bind("<MouseWheel>", lambda e: self.canvas.yview_scroll(-1 if e.delta > 0 else 1, "units"))
+        self.canvas.bind("<Button-4>", lambda e: self.canvas.yview_scroll(-1, "units"))
+        self.canvas.bind("<Button-5>", lambda e: self.canvas.yview_scroll(1, "units"))
+        self.dispatcher = dispatcher_for(self.canvas)
+        self.cache_dir = os.path.join(APP_DATA_DIR, PDF_THUMB_CACHE_NAME)
+
+        self.executor = None
+        self.path = None
+        self.folder = None
+        self.page_count = 0
+        self.slot_height = 0
+        self.current_page = None
+        self.highlight = None
+        self.items = {}    # page -> [placeholder item, image item, PhotoImage, label item]
+        self.batches = {}  # batch -> Future
+        self.failed = set()
+        # Bumped for every document, so results for an earlier one are ignored
+        self.generation = 0
+        self.rendering = False
+        self.viewport_job = None
+        self.start_job = None
+
+    def set_document(self, path, page_count, aspect):
+        """Shows the thumbnails of a document whose pages are aspect times as high as wide."""
+        self.clear()
+        try:
+            self.folder = os.path.join(self.cache_dir, document_key(path))
+        except OSError as e:
+            print(f"Error reading {path}: {e}")
+            return
+        self.path = path
+        self.page_count = page_count
+        self.slot_height = round(self.width * aspect) + self.LABEL_HEIGHT + self.PADDING
+        self.canvas.configure(scrollregion=(0, 0, self.width + 2 * self.PADDING,
+                                            page_count * self.slot_height + self.PADDING))
+        self.canvas.yview_moveto(0)
+        if os.path.isdir(self.folder):
+            # The folder time orders the cache from least to most recently opened
+            os.utime(self.folder)
+        threading.Thread(target=trim_cache, args=(self.cache_dir, PDF_THUMB_CACHE_MAX_BYTES, self.folder),
+                         name="pdf-thumb-trim", daemon=True).start()
+        self.start_job = self.canvas.after(PDF_THUMB_START_DELAY_MS, self.start_rendering)
+        self.schedule_viewport()
+
+    def clear(self):
+        """Forgets the document, cancelling the batches not yet started."""
+        self.generation += 1
+        for future in self.batches.values():
+            future.cancel()
+        self.batches = {}
+        self.failed = set()
+        if self.start_job is not None:
+            self.canvas.after_cancel(self.start_job)
+            self.start_job = None
+        self.rendering = False
+        self.canvas.delete("all")
+        self.items = {}
+        self.highlight = None
+        self.current_page = None
+        self.path = None
+        self.page_count = 0
+
+    def close(self):
+        """Stops the worker processes."""
+        self.clear()
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+    def start_rendering(self):
+        self.start_job = None
+        self.rendering = True
+        self.schedule_viewport()
+
+    def on_yscroll(self, first, last):
+        self.scrollbar.set(first, last)
+        self.schedule_viewport()
+
+    def schedule_viewport(self):
+        if self.viewport_job is None:
+            self.viewport_job = self.canvas.after_idle(self.update_viewport)
+
+    def slot_top(self, page_num):
+        return self.PADDING + page_num * self.slot_height
+
+    def update_viewport(self):
+        """Loads the thumbnails within a screen of the view and releases the others."""
+        self.viewport_job = None
+        if not self.path or not self.slot_height:
+            return
+        height = self.canvas.winfo_height()
+        top = self.canvas.canvasy(0)
+        first = max(0, int((top - height) // self.slot_height))
+        last = min(self.page_count, int((top + 2 * height) // self.slot_height) + 1)
+        near = range(first, last)
+
+        for page_num in [page_num for page_num in self.items if page_num not in near]:
+            placeholder, image_item, _, label = self.items.pop(page_num)
+            for item in (placeholder, image_item, label):
+                if item is not None:
+                    self.canvas.delete(item)
+        needed = set()
+        for page_num in near:
+            if page_num not in self.items:
+                slot = self.slot_top(page_num)
+                placeholder = self.canvas.create_rectangle(
+                    self.PADDING, slot, self.PADDING + self.width, slot + self.slot_height - self.LABEL_HEIGHT - self.PADDING,
+                    outline="#C0C0C0", fill="#F4F4F4")
+                label = self.canvas.create_text(self.PADDING + self.width / 2,
+                                                slot + self.slot_height - self.PADDING - self.LABEL_HEIGHT / 2,
+                                                text=str(page_num + 1), fill="#606366")
+                self.items[page_num] = [placeholder, None, None, label]
+                self.show_thumbnail(page_num)
+            if self.items[page_num][1] is None:
+                needed.add(page_num // PDF_THUMB_BATCH)
+
+        # Batches that are out of range and not started yet are dropped
+        for batch in [batch for batch in self.batches if batch not in needed]:
+            if self.batches[batch].cancel():
+                del self.batches[batch]
+        if self.rendering:
+            for batch in sorted(needed - self.batches.keys() - self.failed):
+                self.submit(batch)
+        self.draw_highlight()
+
+    def show_thumbnail(self, page_num):
+        """Draws a thumbnail from the disk cache. Returns False if it is not there yet."""
+        entry = self.items.get(page_num)
+        path = thumbnail_path(self.folder, page_num)
+        if entry is None or entry[1] is not None or not os.path.exists(path):
+            return False
+        try:
+            image = tk.PhotoImage(file=path)
+        except tk.TclError as e:
+            print(f"Error loading thumbnail {path}: {e}")
+            return False
+        entry[2] = image
+        entry[1] = self.canvas.create_image(self.PADDING + self.width / 2, self.slot_top(page_num), anchor="n", image=image)
+        self.canvas.delete(entry[0])
+        entry[0] = None
+        return True
+
+    def submit(self, batch):
+        """Renders a batch of pages on the worker processes."""
+        if self.executor is None:
+            self.executor = concurrent.futures.ProcessPoolExecutor(max_workers=PDF_THUMB_WORKERS)
+        first = batch * PDF_THUMB_BATCH
+        last = min(self.page_count, first + PDF_THUMB_BATCH) - 1
+        future = self.executor.submit(render_thumbnails, self.path, first, last, self.width, self.folder)
+        self.batches[batch] = future
+        generation = self.generation
+        future.add_done_callback(lambda future: self.dispatcher.post(self.on_batch_done, generation, batch, future))
+
+    def on_batch_done(self, generation, batch, future):
+        if generation != self.generation:
+            return
+        if self.batches.get(batch) is future:
+            del self.batches[batch]
+        if future.cancelled():
+            return
+        try:
+            pages = future.result()
+        except Exception as e:
+            print(f"Error rendering thumbnails of {self.path}: {e}")
+            self.failed.add(batch)
+            return
+        for page_num in pages:
+            self.show_thumbnail(page_num)
+        self.draw_highlight()
+
+    def set_current(self, page_num):
+        """Frames the thumbnail of the page shown and scrolls it into view."""
+        if not self.path or page_num == self.current_page:
+            return
+        self.current_page = page_num
+        top, bottom = self.canvas.canvasy(0), self.canvas.canvasy(self.canvas.winfo_height())
+        slot = self.slot_top(page_num)
+        if slot < top or slot + self.slot_height > bottom:
+            total = self.page_count * self.slot_height + self.PADDING
+            self.canvas.yview_moveto(max(0, slot - self.PADDING) / total)
+        self.draw_highlight()
+
+    def draw_highlight(self):
+        if self.highlight is not None:
+            self.canvas.delete(self.highlight)
+            self.highlight = None
+        if self.current_page is None:
+            return
+        slot = self.slot_top(self.current_page)
+        self.highlight = self.canvas.create_rectangle(
+            self.PADDING - 3, slot - 3, self.PADDING + self.width + 3, slot + self.slot_height - self.LABEL_HEIGHT - self.PADDING + 3,
+            outline="#3874D8", width=2)
+
+    def on_click(self, event):
+        if not self.path:
+            return
+        page_num = int((self.canvas.canvasy(event.y) - self.PADDING) // self.slot_height)
+        if 0 <= page_num < self.page_count:
+            self.on_select(page_num)
@@ -1,12 +1,38 @@
+import bisect
 import os
+import threading
 import tkinter as tk
 from tkinter import ttk, messagebox
-from PyPDF2 import PdfReader
-from pdf2image import convert_from_path
 from PIL import Image, ImageTk
 
+from config import PDF_MAX_DPI, PDF_MIN_DPI, PDF_RENDER_DPI, PDF_RESIZE_DELAY_MS
+from pdfcache import PageCache, page_key
+from pdfprefetch import PageScheduler
+from pdfrender import RenderService
+from pdfthumbs import ThumbnailSidebar
+from workers import dispatcher_for
+
+def fit_dpi(page_width, page_height, box_width, box_height, zoom=1.0):
+    """Returns the DPI at which a page of the given size in points fits a box in pixels, times zoom."""
+    scale = min(box_width / page_width, box_height / page_height) * zoom
+    return max(PDF_MIN_DPI, min(PDF_MAX_DPI, int(scale * 72)))
+
+# Size in points of pages whose size cannot be read: US Letter
+DEFAULT_PAGE_SIZE = (612.0, 792.0)
+
 class PDFViewer:
-    """A viewer for PDF documents."""
+    """
+    A viewer for PDF documents.
+
+    Pages are shown one at a time, or in continuous mode stacked in a canvas
+    whose scroll region covers the whole document. In continuous mode only the
+    pages within a screen of the view are rendered and hold a PhotoImage; pages
+    that scroll further away are released, so memory use does not grow with the
+    length of the document.
+    """
+    # Pixels between pages in continuous mode
+    PAGE_GAP = 10
+
     def __init__(self, parent):
         self.pdf_frame = ttk.Frame(parent)
         self.pdf_frame.pack(fill="both", expand=True)
@@ -34,6 +60,16 @@ class PDFViewer:
         # Create next page button
         self.next_button = ttk.Button(self.nav_frame, text="Next", command=self.next_page)
         self.next_button.pack(side="left", padx=5, pady=5)
+
+        # Create the continuous scrolling toggle
+        self.continuous_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(self.nav_frame, text="Continuous", variable=self.continuous_var,
+                        command=self.set_continuous).pack(side="left", padx=5, pady=5)
+
+        # Create the thumbnail sidebar toggle
+        self.thumbnails_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(self.nav_frame, text="Thumbnails", variable=self.thumbnails_var,
+                        command=self.toggle_thumbnails).pack(side="left", padx=5, pady=5)
         
         # Create a frame for the canvas and scrollbars
         self.canvas_frame = ttk.Frame(self.pdf_frame)
@@ -42,25 +78,50 @@ class PDFViewer:
         # Create canvas to display PDF pages
         self.canvas = tk.Canvas(self.canvas_frame, bg="white")
         self.canvas.pack(side="left", fill="both", expand=True)
+
+        # Create the page thumbnail sidebar left of the canvas
+        self.thumbnails = ThumbnailSidebar(self.canvas_frame, self.load_page)
+        self.thumbnails.frame.pack(side="left", fill="y", before=self.canvas)
             
         # Create vertical scrollbar
-        v_scrollbar = ttk.Scrollbar(self.canvas_frame, orient="vertical", command=self.canvas.yview)
-        v_scrollbar.pack(side="right", fill="y")
+        self.v_scrollbar = ttk.Scrollbar(self.canvas_frame, orient="vertical", command=self.canvas.yview)
+        self.v_scrollbar.pack(side="right", fill="y")
 
         # Create horizontal scrollbar
         h_scrollbar = ttk.Scrollbar(self.pdf_frame, orient="horizontal", command=self.canvas.xview)
         h_scrollbar.pack(side="bottom", fill="x")
         
         # Configure canvas to work with scrollbars
-        self.canvas.configure(yscrollcommand=v_scrollbar.set, xscrollcommand=h_scrollbar.set)
+        self.canvas.configure(yscrollcommand=self.on_yscroll, xscrollcommand=h_scrollbar.set)
 
         # Initialize variables
         self.current_pdf_path = None
+        # The DocumentInfo of the open document
         self.pdf_document = None
         self.current_page = 0
         self.total_pages = 0
         self.page_images = []
         self.current_image = None
+        # Rendered pages, so turning back to a page does not render it again
+        self.page_cache = PageCache.default()
+        # Render processes that keep documents open, fed the requested page and its
+        # neighbours by the scheduler threads
+        self.render_service = RenderService()
+        self.dispatcher = dispatcher_for(self.canvas)
+        self.scheduler = PageScheduler(self.page_cache, self.render_service.render, self.dispatcher)
+        # The document being opened: page count and sizes are read off the Tk thread
+        self.opening = None
+        self.pdf_mtime = None
+        # Pages are rendered to fit the canvas times the zoom factor
+        self.zoom = 1.0
+        self.canvas_size = None
+        self.resize_job = None
+        # Continuous mode: the top of each page in the canvas, each page's (dpi, width,
+        # height), and the canvas items of the pages near the view
+        self.page_tops = []
+        self.page_layout = []
+        self.visible_pages = {}  # page -> [placeholder item, image item, PhotoImage]
+        self.viewport_job = None
         
         # Hide navigation frame initially
         self.nav_frame.pack_forget()
@@ -68,13 +129,54 @@ class PDFViewer:
         # Bind resize event
         self.canvas.bind("<Configure>", self.on_resize)
 
-    def open_pdf(self, path):
-        """Opens the PDF document."""
+        # Scroll with the mouse wheel, zoom with Ctrl and the mouse wheel
+        self.canvas.bind("<MouseWheel>", lambda e: self.canvas.yview_scroll(-1 if e.delta > 0 else 1, "units"))
+        self.canvas.bind("<Button-4>", lambda e: self.canvas.yview_scroll(-1, "units"))
+        self.canvas.bind("<Button-5>", lambda e: self.canvas.yview_scroll(1, "units"))
+        self.canvas.bind("<Control-MouseWheel>", lambda e: self.set_zoom(self.zoom * (1.25 if e.delta > 0 else 0.8)))
+        self.canvas.bind("<Control-Button-4>", lambda e: self.set_zoom(self.zoom * 1.25))
+        self.canvas.bind("<Control-Button-5>", lambda e: self.set_zoom(self.zoom * 0.8))
+
+    def open_pdf(self, path, page=0):
+        """
+        Opens the PDF document at a page, counted from 0. Its page count and sizes are
+        read by the render service on a worker thread, the document is shown once they arrive.
+        """
+        self.close_pdf()
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except OSError as e:
+            messagebox.showerror("Error", f"Error opening PDF: {str(e)}")
+            return
+        opening = self.opening = (path, mtime_ns, page)
+        self.page_label.config(text="Opening…")
+        self.nav_frame.pack(fill="x", side="bottom")
+
+        def read_info():
+            try:
+                info, error = self.render_service.document_info(path), None
+            except Exception as e:
+                info, error = None, e
+            self.dispatcher.post(self.on_document_info, opening, info, error)
+        threading.Thread(target=read_info, name="pdf-open", daemon=True).start()
+
+    def on_document_info(self, opening, info, error):
+        """Shows a document opened by open_pdf, unless another one was opened or it was closed since."""
+        if opening is not self.opening:
+            return
+        self.opening = None
+        if error is not None:
+            self.close_pdf()
+            messagebox.showerror("Error", f"Error opening PDF: {str(error)}")
+            return
+        path, mtime_ns, page = opening
         try:
             self.current_pdf_path = path
-            self.pdf_document = PdfReader(path)
-            self.total_pages = len(self.pdf_document.pages)
+            self.pdf_mtime = mtime_ns
+            self.pdf_document = info
+            self.total_pages = info.page_count
             self.current_page = 0
+            self.zoom = 1.0
             
             # Show the close button and navigation frame
             self.close_button.pack(side="right")
@@ -84,7 +186,14 @@ class PDFViewer:
             self.update_page_label()
             
             # Load and display the first page
-            self.load_page(0)
+            self.clear_canvas()
+            if self.continuous_var.get():
+                self.layout_pages()
+            page = page if 0 <= page < self.total_pages else 0
+            self.load_page(page)
+            width, height = self.page_size_of(0) or DEFAULT_PAGE_SIZE
+            self.thumbnails.set_document(path, self.total_pages, height / width)
+            self.thumbnails.set_current(page)
         except Exception as e:
             messagebox.showerror("Error", f"Error opening PDF: {str(e)}")
     
@@ -92,42 +201,66 @@ class PDFViewer:
         """Loads and displays a specific page."""
         if not self.pdf_document or page_num < 0 or page_num >= self.total_pages:
             return
+        if self.continuous_var.get():
+            self.scroll_to_page(page_num)
+            return
         
-        try:
-            # Convert PDF page to image
-            images = convert_from_path(
-                self.current_pdf_path, 
-                first_page=page_num+1, 
-                last_page=page_num+1
-            )
-            
-            if images:
-                self.current_page = page_num
-                self.display_page(images[0])
-                self.update_page_label()
-        except Exception as e:
-            messagebox.showerror("Error", f"Error loading page: {str(e)}")
-    
+        # The page is shown as soon as it is rendered, the previous one stays up meanwhile
+        self.current_page = page_num
+        self.update_page_label()
+
+        def on_ready(image):
+            # A page turned away from, or scrolled past in continuous mode, is not shown
+            if page_num != self.current_page or self.continuous_var.get():
+                return
+            self.display_page(image)
+            self.update_page_label()
+
+        def on_error(error):
+            messagebox.showerror("Error", f"Error loading page: {error}")
+
+        dpi = self.target_dpi(page_num)
+        if not self.scheduler.request(self.current_pdf_path, self.pdf_mtime, page_num, dpi,
+                                      on_ready, on_error, page_count=self.total_pages):
+            self.page_label.config(text=f"Page: {page_num + 1}/{self.total_pages} (rendering…)")
+            # Show the page scaled from another resolution until it is rendered at this one
+            preview = self.page_cache.closest(page_key(self.current_pdf_path, self.pdf_mtime, page_num, dpi))
+            if preview is not None:
+                self.display_page(preview)
+
+    def page_size_of(self, page_num):
+        """Returns the size of a page in points, or None if it cannot be read."""
+        size = self.pdf_document.page_sizes[page_num]
+        return size if size and min(size) > 0 else None
+
+    def target_dpi(self, page_num):
+        """Returns the DPI that renders a page to fit the canvas at the current zoom."""
+        size = self.page_size_of(page_num)
+        if not size:
+            return PDF_RENDER_DPI
+        canvas_width = self.canvas.winfo_width() or 800
+        canvas_height = self.canvas.winfo_height() or 600
+        return fit_dpi(size[0], size[1], canvas_width, canvas_height, self.zoom)
+
     def display_page(self, page_image):
         """Displays the current page image on the canvas."""
         self.canvas.delete("all")
         
-        # Resize image to fit canvas while maintaining aspect ratio
         canvas_width = self.canvas.winfo_width() or 800
         canvas_height = self.canvas.winfo_height() or 600
         
         img_width, img_height = page_image.size
         
-        # Calculate scale factor to fit the image in the canvas
-        scale = min(canvas_width / img_width, canvas_height / img_height)
-        
-        # Resize the image
-        new_width = int(img_width * scale)
-        new_height = int(img_height * scale)
-        resized_image = page_image.resize((new_width, new_height), Image.Resampling.LANCZOS)
+        # Pages are rendered to fit the canvas at the current zoom, so only a page
+        # rendered for another size needs scaling, and only until its render arrives
+        scale = min(canvas_width / img_width, canvas_height / img_height) * self.zoom
+        if abs(scale - 1) > 0.02 and img_width * scale >= 1 and img_height * scale >= 1:
+            new_width = int(img_width * scale)
+            new_height = int(img_height * scale)
+            page_image = page_image.resize((new_width, new_height), Image.Resampling.BILINEAR)
         
         # Convert to PhotoImage and display
-        self.current_image = ImageTk.PhotoImage(resized_image)
+        self.current_image = ImageTk.PhotoImage(page_image)
         self.canvas.create_image(
             canvas_width // 2, canvas_height // 2,
             anchor="center", image=self.current_image
@@ -136,9 +269,121 @@ class PDFViewer:
         # Configure canvas scrolling region
         self.canvas.config(scrollregion=self.canvas.bbox("all"))
     
+    def set_continuous(self):
+        """Switches between one page at a time and all pages in one scrolling canvas."""
+        self.clear_canvas()
+        if not self.pdf_document:
+            return
+        if self.continuous_var.get():
+            self.layout_pages()
+        else:
+            self.canvas.xview_moveto(0)
+            self.canvas.yview_moveto(0)
+        self.load_page(self.current_page)
+
+    def clear_canvas(self):
+        """Removes the page images from the canvas and releases them."""
+        self.canvas.delete("all")
+        self.current_image = None
+        self.visible_pages = {}
+
+    def layout_pages(self):
+        """Stacks all pages at the width that fits the canvas and makes the scroll region cover them."""
+        canvas_width = self.canvas.winfo_width() or 800
+        self.page_tops = []
+        self.page_layout = []
+        top = self.PAGE_GAP
+        widest = 0
+        for page_num in range(self.total_pages):
+            width, height = self.page_size_of(page_num) or DEFAULT_PAGE_SIZE
+            dpi = fit_dpi(width, height, canvas_width - 2 * self.PAGE_GAP, float("inf"), self.zoom)
+            pixel_width, pixel_height = round(width * dpi / 72), round(height * dpi / 72)
+            self.page_tops.append(top)
+            self.page_layout.append((dpi, pixel_width, pixel_height))
+            top += pixel_height + self.PAGE_GAP
+            widest = max(widest, pixel_width)
+        self.canvas.config(scrollregion=(0, 0, max(canvas_width, widest + 2 * self.PAGE_GAP), top))
+
+    def scroll_to_page(self, page_num, fraction=0.0):
+        """Scrolls continuous mode so that a point fraction of the way down a page is at the top."""
+        if not self.page_tops:
+            return
+        total_height = float(self.canvas.cget("scrollregion").split()[3])
+        top = self.page_tops[page_num] - self.PAGE_GAP + fraction * self.page_layout[page_num][2]
+        self.canvas.yview_moveto(top / total_height)
+        self.schedule_viewport()
+
+    def on_yscroll(self, first, last):
+        """Updates the scrollbar and, in continuous mode, the pages near the view."""
+        self.v_scrollbar.set(first, last)
+        self.schedule_viewport()
+
+    def schedule_viewport(self):
+        if self.continuous_var.get() and self.viewport_job is None:
+            self.viewport_job = self.canvas.after_idle(self.update_viewport)
+
+    def update_viewport(self):
+        """Renders the pages within a screen of the view and releases the images of the others."""
+        self.viewport_job = None
+        if not self.continuous_var.get() or not self.pdf_document or not self.page_tops:
+            return
+        height = self.canvas.winfo_height()
+        top = self.canvas.canvasy(0)
+        bottom = top + height
+        first = max(0, bisect.bisect_right(self.page_tops, top - height) - 1)
+        last = bisect.bisect_right(self.page_tops, bottom + height)
+        near = range(first, last)
+
+        for page_num in [page_num for page_num in self.visible_pages if page_num not in near]:
+            placeholder, image_item, _ = self.visible_pages.pop(page_num)
+            self.canvas.delete(placeholder)
+            if image_item is not None:
+                self.canvas.delete(image_item)
+        center = float(self.canvas.cget("scrollregion").split()[2]) / 2
+        for page_num in near:
+            if page_num not in self.visible_pages:
+                _, width, page_height = self.page_layout[page_num]
+                page_top = self.page_tops[page_num]
+                placeholder = self.canvas.create_rectangle(center - width / 2, page_top, center + width / 2,
+                                                           page_top + page_height, outline="#C0C0C0", fill="#F4F4F4")
+                self.visible_pages[page_num] = [placeholder, None, None]
+
+        self.current_page = max(0, bisect.bisect_right(self.page_tops, top + height / 2) - 1)
+        self.update_page_label()
+
+        # The pages on screen are rendered first, nearest the middle first, then the margins
+        def order(page_num):
+            on_screen = self.page_tops[page_num] < bottom and self.page_tops[page_num] + self.page_layout[page_num][2] > top
+            return (not on_screen, abs(page_num - self.current_page))
+        pages = [(page_num, self.page_layout[page_num][0]) for page_num in sorted(near, key=order)
+                 if self.visible_pages[page_num][1] is None]
+        self.scheduler.request_pages(self.current_pdf_path, self.pdf_mtime, pages, self.on_page_ready,
+                                     self.on_page_error)
+
+    def on_page_ready(self, page_num, image):
+        """Draws a page rendered for continuous mode over its placeholder, if it is still near the view."""
+        entry = self.visible_pages.get(page_num)
+        if entry is None or entry[1] is not None or not self.continuous_var.get():
+            return
+        center = float(self.canvas.cget("scrollregion").split()[2]) / 2
+        entry[2] = ImageTk.PhotoImage(image)
+        entry[1] = self.canvas.create_image(center, self.page_tops[page_num], anchor="n", image=entry[2])
+        self.canvas.delete(entry[0])
+
+    def on_page_error(self, page_num, error):
+        print(f"Error rendering page {page_num + 1} of {self.current_pdf_path}: {error}")
+
     def update_page_label(self):
-        """Updates the page indicator label."""
+        """Updates the page indicator label and the thumbnail of the current page."""
         self.page_label.config(text=f"Page: {self.current_page + 1}/{self.total_pages}")
+        self.thumbnails.set_current(self.current_page)
+
+    def toggle_thumbnails(self):
+        """Shows or hides the thumbnail sidebar."""
+        if self.thumbnails_var.get():
+            self.thumbnails.frame.pack(side="left", fill="y", before=self.canvas)
+        else:
+            self.thumbnails.frame.pack_forget()
     
     def next_page(self):
         """Navigates to the next page."""
@@ -151,15 +396,48 @@ class PDFViewer:
             self.load_page(self.current_page - 1)
     
     def on_resize(self, event):
-        """Handle window resize events."""
-        if self.current_page is not None and 0 <= self.current_page < self.total_pages:
-            # Reload the current page to resize it
+        """Renders the page again for the new canvas size once resizing pauses."""
+        if (event.width, event.height) == self.canvas_size:
+            return
+        self.canvas_size = (event.width, event.height)
+        self.schedule_refit()
+
+    def set_zoom(self, zoom):
+        """Sets the zoom factor, 1 fitting the page to the canvas."""
+        self.zoom = max(0.25, min(8.0, zoom))
+        self.schedule_refit()
+
+    def schedule_refit(self):
+        if self.resize_job is not None:
+            self.canvas.after_cancel(self.resize_job)
+        self.resize_job = self.canvas.after(PDF_RESIZE_DELAY_MS, self.refit)
+
+    def refit(self):
+        """Shows the current page at the size of the canvas and the zoom factor."""
+        self.resize_job = None
+        if not self.pdf_document or not 0 <= self.current_page < self.total_pages:
+            return
+        if self.continuous_var.get() and self.page_tops:
+            # Keep the same point of the same page at the top of the view
+            top = self.canvas.canvasy(0)
+            page_num = max(0, bisect.bisect_right(self.page_tops, top) - 1)
+            fraction = (top + self.PAGE_GAP - self.page_tops[page_num]) / max(1, self.page_layout[page_num][2])
+            self.clear_canvas()
+            self.layout_pages()
+            self.scroll_to_page(page_num, max(0.0, fraction))
+        else:
             self.load_page(self.current_page)
     
     def close_pdf(self):
         """Closes the PDF document and resets the viewer."""
-        self.canvas.delete("all")
+        self.opening = None
+        self.scheduler.cancel_all()
+        self.thumbnails.clear()
+        self.clear_canvas()
+        self.page_tops = []
+        self.page_layout = []
         self.current_pdf_path = None
+        self.pdf_mtime = None
         self.pdf_document = None
         self.current_page = 0
         self.total_pages = 0
@@ -176,6 +454,10 @@ class PDFViewer:
         """Handles the window close event."""
         if self.current_pdf_path:
             response = messagebox.askyesnocancel("Close PDF", "Do you want to close the current PDF?")
+            if response is not None:
+                self.scheduler.close()
+                self.render_service.close()
+                self.thumbnails.close()
             if response:  # Yes
                 self.close_pdf()
                 self.pdf_frame.master.destroy()
@@ -184,4 +466,7 @@ class PDFViewer:
             else:  # No
                 self.pdf_frame.master.destroy()
         else:
+            self.scheduler.close()
+            self.render_service.close()
+            self.thumbnails.close()
             self.pdf_frame.master.destroy() 
\ No newline at end of file
@@ -0,0 +1,127 @@
+import tkinter as tk
+from tkinter import ttk
+
+class SearchDialog:
+    """
+    A non-modal search window whose results stream in while the search runs.
+
+    start_search(query, add_results, finish, **options) is called with the query text
+    and the state of the option checkboxes, and must return an object with a cancel()
+    method. The search calls add_results(rows) on the main thread with lists of
+    (values, payload) pairs, where values fill the result columns, and finish(message)
+    once it is done. Activating a result calls on_activate(payload).
+    """
+    def __init__(self, root, title, columns, start_search, on_activate, initial_query="", options=()):
+        self.start_search = start_search
+        self.on_activate = on_activate
+        self.option_vars = {}
+        self.search = None
+        self.payloads = {}
+        self.count = 0
+
+        self.window = tk.Toplevel(root)
+        self.window.title(title)
+        self.window.geometry("800x500")
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+
+        # Create the query bar
+        query_frame = ttk.Frame(self.window)
+        query_frame.pack(fill="x", padx=5, pady=5)
+        self.query_var = tk.StringVar(value=initial_query)
+        self.query_entry = ttk.Entry(query_frame, textvariable=self.query_var)
+        self.query_entry.pack(side="left", fill="x", expand=True)
+        self.query_entry.bind("<Return>", lambda e: self.run_search())
+        self.query_entry.bind("<Escape>", lambda e: self.cancel_search())
+        self.search_button = ttk.Button(query_frame, text="Search", command=self.run_search)
+        self.search_button.pack(side="left", padx=5)
+        self.stop_button = ttk.Button(query_frame, text="Stop", command=self.cancel_search)
+        self.stop_button.pack(side="left")
+
+        # Create the option checkboxes, given as (name, label) pairs
+        if options:
+            options_frame = ttk.Frame(self.window)
+            options_frame.pack(fill="x", padx=5)
+            for name, label in options:
+                self.option_vars[name] = tk.BooleanVar(value=False)
+                ttk.Checkbutton(options_frame, text=label, variable=self.option_vars[name]).pack(side="left")
+
+        # Create the status line, with room on the right for background activity
+        status_frame = ttk.Frame(self.window)
+        status_frame.pack(fill="x", side="bottom", padx=5, pady=2)
+        self.status_label = ttk.Label(status_frame, text="")
+        self.status_label.pack(side="left")
+        self.info_label = ttk.Label(status_frame, text="")
+        self.info_label.pack(side="right")
+
+        # Create the results list
+        results_frame = ttk.Frame(self.window)
+        results_frame.pack(fill="both", expand=True, padx=5)
+        self.results = ttk.Treeview(results_frame, columns=[name for name, _ in columns], show="headings")
+        for name, width in columns:
+            self.results.heading(name, text=name)
+            self.results.column(name, width=width, stretch=True)
+        self.results.pack(side="left", fill="both", expand=True)
+        v_scrollbar = ttk.Scrollbar(results_frame, orient="vertical", command=self.results.yview)
+        v_scrollbar.pack(side="right", fill="y")
+        self.results.configure(yscrollcommand=v_scrollbar.set)
+        self.results.bind("<Double-1>", self.on_result_activate)
+        self.results.bind("<Return>", self.on_result_activate)
+
+        self.query_entry.focus_set()
+        if initial_query:
+            self.run_search()
+
+    def run_search(self):
+        """Cancels the current search and starts a new one for the query."""
+        self.cancel_search()
+        self.results.delete(*self.results.get_children())
+        self.payloads.clear()
+        self.count = 0
+        query = self.query_var.get().strip()
+        if not query:
+            return
+        self.set_status("Searching…")
+        options = {name: var.get() for name, var in self.option_vars.items()}
+        try:
+            self.search = self.start_search(query, self.add_results, self.finish, **options)
+        except Exception as e:
+            self.set_status(f"Invalid search: {e}")
+
+    def cancel_search(self):
+        """Stops the search in progress."""
+        if self.search:
+            self.search.cancel()
+            self.search = None
+            self.set_status(f"Stopped, {self.count:,} results")
+
+    def add_results(self, rows):
+        """Appends a batch of results."""
+        for values, payload in rows:
+            item = self.results.insert("", "end", values=values)
+            self.payloads[item] = payload
+        self.count += len(rows)
+        self.set_status(f"Searching… {self.count:,} results")
+
+    def finish(self, message=None):
+        """Called by the search once it has completed."""
+        self.search = None
+        self.set_status(message or f"{self.count:,} results")
+
+    def set_status(self, text):
+        self.status_label.config(text=text)
+
+    def set_info(self, text):
+        """Shows the state of background work the results depend on, such as indexing."""
+        if self.window.winfo_exists():
+            self.info_label.config(text=text)
+
+    def on_result_activate(self, event=None):
+        """Opens the selected result."""
+        selection = self.results.selection()
+        if selection and selection[0] in self.payloads:
+            self.on_activate(self.payloads[selection[0]])
+
+    def close(self):
+        """Cancels the search and closes the window."""
+        self.cancel_search()
+        self.window.destroy()
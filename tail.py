@@ -0,0 +1,117 @@
+import os
+import threading
+
+from config import TAIL_MAX_BACKLOG, TAIL_POLL_INTERVAL
+from textdetect import text_decoder
+
+class FileFollower:
+    """
+    Follows a growing file on a worker thread, like tail -F.
+
+    The file stays open and is read from the offset where the caller stopped reading
+    it, so only the bytes written since are ever read. Its size is polled every
+    poll_interval seconds with os.stat. The fswatch watchers are not used: they
+    report IN_CLOSE_WRITE rather than IN_MODIFY and settle bursts, so a writer that
+    keeps the file open, as loggers do, would never be seen. A file that shrinks
+    below the offset was truncated and is read again from its start; a path that now
+    names another file (a different inode) was rotated, so the rest of the old file
+    is read and then the new one is opened and read from its start. A reader more
+    than max_backlog bytes behind skips ahead to the last max_backlog bytes.
+
+    on_data(text, offset) receives the newly written text and the offset read up to,
+    and on_event(message) a notice of truncation or rotation, both on the main thread.
+    """
+    def __init__(self, path, dispatcher, on_data, on_event=None, offset=0, encoding="utf-8",
+                 poll_interval=TAIL_POLL_INTERVAL, max_backlog=TAIL_MAX_BACKLOG, chunk_size=1024 * 1024):
+        self.path = path
+        self.dispatcher = dispatcher
+        self.on_data = on_data
+        self.on_event = on_event
+        self.offset = offset
+        self.encoding = encoding
+        self.poll_interval = poll_interval
+        self.max_backlog = max_backlog
+        self.chunk_size = chunk_size
+        self.file = None
+        self.identity = None
+        self.decoder = text_decoder(encoding)
+        self._cancel_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"follow:{path}", daemon=True)
+
+    def start(self):
+        """Starts following in the background."""
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        self._cancel_event.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    def _run(self):
+        """Worker thread body."""
+        try:
+            self.open(self.offset)
+            while not self.cancelled:
+                self.poll()
+                self._cancel_event.wait(self.poll_interval)
+        except OSError as e:
+            print(f"Error following {self.path}: {e}")
+            self.dispatcher.post(self._deliver, self.on_event, f"Stopped following: {e}")
+        finally:
+            if self.file:
+                self.file.close()
+
+    def _deliver(self, callback, *args):
+        """Invokes a callback on the main thread unless following was cancelled."""
+        if callback and not self.cancelled:
+            callback(*args)
+
+    def open(self, offset):
+        """Opens the file at the path and positions it at offset."""
+        if self.file:
+            self.file.close()
+        self.file = open(self.path, "rb")
+        stat = os.fstat(self.file.fileno())
+        self.identity = (stat.st_dev, stat.st_ino)
+        self.offset = min(offset, stat.st_size)
+        self.file.seek(self.offset)
+        self.decoder = text_decoder(self.encoding)
+
+    def poll(self):
+        """Reads whatever was written since the last poll, following truncation and rotation."""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            # Rotated away and not created again yet; the old file may still grow
+            stat = None
+        if stat is not None and (stat.st_dev, stat.st_ino) != self.identity:
+            self.read_new(os.fstat(self.file.fileno()).st_size)
+            self.open(0)
+            self.dispatcher.post(self._deliver, self.on_event, "File rotated, following the new file")
+        size = os.fstat(self.file.fileno()).st_size
+        if size < self.offset:
+            self.file.seek(0)
+            self.offset = 0
+            self.decoder = text_decoder(self.encoding)
+            self.dispatcher.post(self._deliver, self.on_event, "File truncated, following from its start")
+        self.read_new(size)
+
+    def read_new(self, size):
+        """Reads and posts the bytes from the offset up to size, skipping ahead if too far behind."""
+        if size - self.offset > self.max_backlog:
+            # Resume at the start of a line within the last max_backlog bytes
+            self.file.seek(size - self.max_backlog)
+            self.file.readline()
+            self.offset = self.file.tell()
+            self.decoder = text_decoder(self.encoding)
+        while self.offset < size and not self.cancelled:
+            chunk = self.file.read(min(self.chunk_size, size - self.offset))
+            if not chunk:
+                break
+            self.offset += len(chunk)
+            text = self.decoder.decode(chunk)
+            if text:
+                self.dispatcher.post(self._deliver, self.on_data, text, self.offset)
@@ -0,0 +1,113 @@
+import codecs
+import io
+from collections import namedtuple
+
+from config import TEXT_SNIFF_BYTES
+
+# The result of sniffing a file: the encoding to decode it with and the line ending
+# it uses, or binary=True
+Detection = namedtuple("Detection", ["encoding", "binary", "newline"])
+BINARY = Detection(None, True, None)
+
+# UTF-32 LE must be checked before UTF-16 LE, whose BOM is a prefix of it
+BOMS = [
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+]
+# Control characters that are common in text files
+TEXT_CONTROLS = set(b"\t\n\r\f\b\x1b")
+
+def detect(sample):
+    """Returns the Detection for the first bytes of a file."""
+    encoding = detect_encoding(sample)
+    if encoding is None:
+        return BINARY
+    return Detection(encoding, False, detect_newline(sample, encoding))
+
+def detect_encoding(sample):
+    """
+    Returns the encoding of the first bytes of a file, or None if the file is binary.
+
+    A BOM decides the encoding. Otherwise NUL bytes mean binary, unless they sit
+    at every other position as in UTF-16 text without a BOM. Text that is valid
+    UTF-8 is UTF-8; anything else that is not full of control characters is taken
+    as a single-byte Windows or Latin-1 encoding, which decodes every byte, so a
+    save never writes replacement characters over bytes that were not UTF-8.
+    """
+    for bom, encoding in BOMS:
+        if sample.startswith(bom):
+            return encoding
+    if not sample:
+        return "utf-8"
+
+    if b"\x00" in sample:
+        return utf16_without_bom(sample)
+
+    # A multi-byte sequence cut at the end of the sample is not an error
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(sample, final=False)
+        return "utf-8"
+    except UnicodeDecodeError:
+        pass
+
+    controls = sum(1 for byte in sample if byte < 0x20 and byte not in TEXT_CONTROLS)
+    if controls > len(sample) // 10:
+        return None
+    try:
+        sample.decode("cp1252")
+        return "cp1252"
+    except UnicodeDecodeError:
+        return "latin-1"
+
+def detect_newline(sample, encoding):
+    """Returns the line ending of the first line of the sample, "\n" if it has none."""
+    text = codecs.getincrementaldecoder(encoding)(errors="replace").decode(sample, final=False)
+    for index, char in enumerate(text):
+        if char == "\n":
+            return "\n"
+        if char == "\r":
+            # A "\r" ending the sample may be the first half of "\r\n"
+            return "\r\n" if text[index + 1:index + 2] in ("\n", "") else "\r"
+    return "\n"
+
+def utf16_without_bom(sample):
+    """Returns "utf-16-le" or "utf-16-be" if the NUL bytes look like ASCII text in UTF-16, else None."""
+    even = sample[0::2]
+    odd = sample[1::2]
+    if odd.count(0) > len(odd) * 0.9 and even.count(0) < len(even) * 0.1:
+        return "utf-16-le"
+    if even.count(0) > len(even) * 0.9 and odd.count(0) < len(odd) * 0.1:
+        return "utf-16-be"
+    return None
+
+def sniff_file(path, size=TEXT_SNIFF_BYTES):
+    """Returns the Detection for a file, reading only its first size bytes."""
+    with open(path, "rb") as file:
+        return detect(file.read(size))
+
+def text_decoder(encoding):
+    """Returns an incremental decoder that replaces undecodable bytes and translates newlines to "\\n"."""
+    return io.IncrementalNewlineDecoder(codecs.getincrementaldecoder(encoding)(errors="replace"), translate=True)
+
+def read_text(path, encoding, chunk_size=1024 * 1024, size=None):
+    """
+    Yields the text of a file chunk by chunk, decoded with an incremental decoder.
+
+    Undecodable bytes are replaced, and newlines are translated to "\\n" as when a
+    file is opened in text mode. Only one chunk of bytes is held at a time. If size
+    is given, no more than the first size bytes are read.
+    """
+    decoder = text_decoder(encoding)
+    with open(path, "rb") as file:
+        while True:
+            if size is not None:
+                chunk_size = min(chunk_size, size - file.tell())
+            chunk = file.read(chunk_size) if chunk_size > 0 else b""
+            text = decoder.decode(chunk, final=not chunk)
+            if text:
+                yield text
+            if not chunk:
+                return
@@ -1,35 +1,81 @@
 import os
 import tkinter as tk
 from tkinter import ttk, Text, messagebox
-import re
+from tkinter import font as tkfont
+
+from config import LARGE_FILE_THRESHOLD, LARGE_FILE_WINDOW_LINES, LARGE_FILE_WINDOW_MAX_BYTES, TAIL_MAX_LINES
+from filesave import FileSaver
+from highlighter import IncrementalHighlighter
+from findreplace import FindEngine
+from largefile import LargeFile
+from lexers import lexer_for_path
+from tail import FileFollower
+from textdetect import read_text, sniff_file
+from textproxy import TextChangeProxy
+from workers import dispatcher_for
 
 class LineNumbers(tk.Canvas):
-    """A canvas that displays line numbers for a text widget."""
-    def __init__(self, parent, text_widget, **kwargs):
+    """
+    A canvas that displays line numbers for a text widget.
+
+    The numbers follow every scroll and edit of the widget through its command proxy,
+    so they keep up with scrollbar drags. Any number of such events between two
+    frames results in a single redraw, which only updates a pool of canvas text items
+    in place and costs the same whatever the size of the document. The canvas is
+    as wide as the digits of the last line number.
+    """
+    def __init__(self, parent, text_widget, text_proxy, **kwargs):
         super().__init__(parent, **kwargs)
         self.text_widget = text_widget
-        self.text_widget.bind('<KeyRelease>', self.on_key_release)
-        self.text_widget.bind('<MouseWheel>', self.on_key_release)
-        self.text_widget.bind('<Configure>', self.on_key_release)
+        self.text_widget.bind('<Configure>', self.redraw, add="+")
+        text_proxy.add_scroll_listener(self.redraw)
         self.font = kwargs.get('font', ('Courier', 10))
+        # Added to the widget's line numbers when it holds a window of a larger file
+        self.line_offset = 0
+        self.items = []
+        self.digits = 0
+        self.digit_width = None
+        self.measured_font = None
+        self.redraw_job = None
         
-    def on_key_release(self, event=None):
-        self.redraw()
-        
-    def redraw(self):
-        """Redraws the line numbers."""
-        self.delete('all')
-        
-        # Get visible lines
-        i = self.text_widget.index('@0,0')
-        while True:
-            dline = self.text_widget.dlineinfo(i)
+    def redraw(self, event=None):
+        """Schedules a redraw of the line numbers, once however often this is called meanwhile."""
+        if self.redraw_job is None:
+            self.redraw_job = self.after_idle(self.draw)
+
+    def draw(self):
+        """Updates the line numbers of the visible lines."""
+        self.redraw_job = None
+        text = self.text_widget
+        first = int(text.index('@0,0').split('.')[0])
+        last = int(text.index(f'@0,{text.winfo_height()}').split('.')[0])
+        self.fit_width(int(text.index('end-1c').split('.')[0]) + self.line_offset)
+
+        x = int(self['width']) - 4
+        count = 0
+        for line in range(first, last + 1):
+            dline = text.dlineinfo(f'{line}.0')
             if dline is None:
-                break
-            y = dline[1]
-            linenum = str(i).split('.')[0]
-            self.create_text(2, y, anchor='nw', text=linenum, font=self.font, fill='#606366')
-            i = self.text_widget.index(f'{i}+1line')
+                continue
+            if count == len(self.items):
+                self.items.append(self.create_text(0, 0, anchor='ne', font=self.font, fill='#606366'))
+            item = self.items[count]
+            self.coords(item, x, dline[1])
+            self.itemconfigure(item, text=line + self.line_offset, font=self.font, state='normal')
+            count += 1
+        for item in self.items[count:]:
+            self.itemconfigure(item, state='hidden')
+
+    def fit_width(self, last_line):
+        """Sizes the canvas to the number of digits of the last line number."""
+        if self.measured_font != self.font:
+            self.digit_width = tkfont.Font(font=self.font).measure('0')
+            self.measured_font = self.font
+            self.digits = 0
+        digits = max(2, len(str(last_line)))
+        if digits != self.digits:
+            self.digits = digits
+            self.configure(width=digits * self.digit_width + 8)
 
 class TextEditor:
     """
@@ -46,6 +92,9 @@ class TextEditor:
         # Create close button but don't show it initially
         self.close_button = ttk.Button(self.header_frame, text="X", command=self.close_file)
         # Don't pack the close button initially - it will be shown when a file is opened
+
+        # Shows the state of a file opened in large-file mode
+        self.status_label = ttk.Label(self.header_frame)
         
         # Create a frame for line numbers and text widget
         self.editor_frame = ttk.Frame(self.text_frame)
@@ -56,8 +105,11 @@ class TextEditor:
                                font=('Courier', 10))
         self.text_widget.pack(side="right", fill="both", expand=True)
         
+        # Edits and scrolling are observed through a proxy of the widget command
+        self.text_proxy = TextChangeProxy(self.text_widget)
+
         # Create line numbers widget with text_widget parameter
-        self.line_numbers = LineNumbers(self.editor_frame, self.text_widget, width=30, bg='#f0f0f0')
+        self.line_numbers = LineNumbers(self.editor_frame, self.text_widget, self.text_proxy, width=30, bg='#f0f0f0')
         self.line_numbers.pack(side="left", fill="y")
         
         # Configure line numbers font
@@ -73,16 +125,44 @@ class TextEditor:
         # Add scrollbars
         self.add_scrollbars()
         
-        # Bind events for syntax highlighting
-        self.text_widget.bind('<KeyRelease>', self.highlight_syntax)
+        # Syntax highlighting follows edits and scrolling through the widget command proxy
+        self.highlighter = IncrementalHighlighter(self.text_widget, self.text_proxy)
 
         # Add keyboard shortcuts
-        self.text_widget.bind('<Control-s>', lambda e: self.save_file())
+        self.text_widget.bind('<Control-s>', self.on_save_key)
         self.text_widget.bind('<Control-o>', lambda e: self.open_file())
         self.text_widget.bind('<Control-z>', lambda e: self.text_widget.edit_undo())
         self.text_widget.bind('<Control-y>', lambda e: self.text_widget.edit_redo())
+        # Tk binds these to moving the cursor and deleting, hand them to the application instead
+        self.text_widget.bind('<Control-f>', lambda e: self.text_widget.event_generate('<<Find>>') or "break")
+        self.text_widget.bind('<Control-h>', lambda e: self.text_widget.event_generate('<<Replace>>') or "break")
+        self.text_widget.bind('<Control-t>', lambda e: self.toggle_follow() or "break")
 
         self.current_file_path = None
+        # The encoding and line ending the current file was read with, and is saved with
+        self.encoding = "utf-8"
+        self.newline = "\n"
+        # The FileSaver of a save in progress
+        self.saver = None
+        # Called with the path of a binary file instead of opening it
+        self.on_binary_file = None
+        # Bytes of the file read into the buffer when it was opened
+        self.loaded_size = 0
+
+        # Follow mode: the FileFollower appending to the buffer, and how many of the
+        # oldest lines were dropped to keep it under TAIL_MAX_LINES
+        self.follower = None
+        self.dropped_lines = 0
+
+        # Large-file mode: the widget holds window_lines lines starting at file line window_first
+        self.large_file = None
+        self.window_first = 1
+        self.window_lines = 0
+        self.window_at_end = True
+        self.slide_job = None
+
+        # Find and replace, driven by the Edit menu's find dialog
+        self.finder = FindEngine(self)
         
     def add_scrollbars(self):
         """Add scrollbars to the text widget."""
@@ -91,8 +171,8 @@ class TextEditor:
         v_scroll_frame.pack(side="right", fill="y")
         
         # Create vertical scrollbar
-        v_scrollbar = ttk.Scrollbar(v_scroll_frame, orient="vertical", command=self.text_widget.yview)
-        v_scrollbar.pack(fill="y", expand=True)
+        self.v_scrollbar = ttk.Scrollbar(v_scroll_frame, orient="vertical", command=self.yview)
+        self.v_scrollbar.pack(fill="y", expand=True)
         
         # Create a frame for the horizontal scrollbar
         h_scroll_frame = ttk.Frame(self.text_frame)
@@ -103,118 +183,364 @@ class TextEditor:
         h_scrollbar.pack(fill="x", expand=True)
         
         # Configure the text widget to use the scrollbars
-        self.text_widget.configure(yscrollcommand=v_scrollbar.set, xscrollcommand=h_scrollbar.set)
+        self.text_widget.configure(yscrollcommand=self.on_yscroll, xscrollcommand=h_scrollbar.set)
+
+    def yview(self, *args):
+        """Vertical scrollbar command. In large-file mode the scrollbar spans the whole file."""
+        if self.large_file is None or not args or args[0] != "moveto":
+            return self.text_widget.yview(*args)
+        total = self.large_file.estimated_lines()
+        self.load_window(int(float(args[1]) * total) + 1)
+
+    def on_yscroll(self, first, last):
+        """Text widget yscrollcommand, maps the view of a large-file window onto the whole file."""
+        self.line_numbers.redraw()
+        if self.large_file is None:
+            self.v_scrollbar.set(first, last)
+            return
+        first, last = float(first), float(last)
+        total = max(self.large_file.estimated_lines(), self.window_first + self.window_lines - 1)
+        top = self.window_first - 1 + first * self.window_lines
+        bottom = self.window_first - 1 + last * self.window_lines
+        self.v_scrollbar.set(top / total, bottom / total)
+
+        # Slide the window before the view reaches one of its edges
+        margin = self.window_lines // 4
+        near_start = self.window_first > 1 and first * self.window_lines < margin
+        near_end = not self.window_at_end and (1 - last) * self.window_lines < margin
+        if (near_start or near_end) and self.slide_job is None:
+            self.slide_job = self.text_widget.after_idle(self.slide_window)
 
-    def open_file(self, path=None):
-        """Opens the file within the program."""
+    def slide_window(self):
+        """Reloads the large-file window around the current view."""
+        self.slide_job = None
+        if self.large_file is not None:
+            top = self.window_first + int(self.text_widget.index("@0,0").split(".")[0]) - 1
+            self.load_window(top)
+
+    def open_file(self, path=None, detection=None):
+        """
+        Opens the file within the program. detection is the result of sniffing the file,
+        if the caller has already done so.
+        """
         if path is None:
             return
             
-        self.current_file_path = path
-        self.text_widget.delete("1.0", "end")
         try:
-            with open(path, "r", encoding="utf-8") as file:
-                content = file.read()
-                self.text_widget.insert("1.0", content)
-                self.highlight_syntax()
-                self.line_numbers.redraw()
+            if detection is None:
+                detection = sniff_file(path)
+            if detection.binary:
+                if self.on_binary_file:
+                    self.on_binary_file(path)
+                else:
+                    messagebox.showinfo("Binary File", "This appears to be a binary file and cannot be displayed.")
+                return
+            size = os.path.getsize(path)
+            large = size >= LARGE_FILE_THRESHOLD
+            if large and detection.encoding.startswith(("utf-16", "utf-32")):
+                messagebox.showinfo("Large File", f"Large {detection.encoding.upper()} files cannot be displayed.")
+                return
+
+            self.stop_following()
+            self.close_large_file()
+            self.reset_dropped_lines()
+            self.current_file_path = path
+            self.encoding = detection.encoding
+            self.newline = detection.newline
+            self.text_widget.delete("1.0", "end")
+            if large:
+                self.open_large_file(path)
+                return
+            # Stop at the size seen now, a file that is being written is followed from there
+            self.loaded_size = size
+            for chunk in read_text(path, detection.encoding, size=size):
+                self.text_widget.insert("end-1c", chunk)
+            self.text_widget.edit_reset()
+            self.text_widget.edit_modified(False)
+            self.highlight_syntax()
+            self.line_numbers.redraw()
                 
-                # Show the close button when a file is opened
-                self.close_button.pack(side="right")
-        except UnicodeDecodeError:
-            # Try with a different encoding or handle binary files
-            messagebox.showinfo("Binary File", "This appears to be a binary file and cannot be displayed.")
+            # Show the close button when a file is opened
+            self.close_button.pack(side="right")
         except Exception as e:
             messagebox.showerror("Error", f"Error opening file: {str(e)}")
 
-    def save_file(self, path=None):
-        """Saves the current file."""
+    def open_large_file(self, path):
+        """Opens a file read-only, keeping only a window of lines around the view in the widget."""
+        self.large_file = LargeFile(path, dispatcher_for(self.text_widget), self.on_index_progress,
+                                    self.on_index_done, encoding=self.encoding).start()
+        self.highlight_syntax()
+        self.load_window(1)
+        self.set_status()
+        self.status_label.pack(side="left")
+        self.close_button.pack(side="right")
+
+    def close_large_file(self):
+        """Leaves large-file mode if it is active."""
+        if self.large_file is None:
+            return
+        self.finder.clear()
+        if self.slide_job is not None:
+            self.text_widget.after_cancel(self.slide_job)
+            self.slide_job = None
+        self.large_file.close()
+        self.large_file = None
+        self.window_first = 1
+        self.window_lines = 0
+        self.window_at_end = True
+        self.text_widget.configure(state="normal")
+        self.line_numbers.line_offset = 0
+        self.status_label.pack_forget()
+
+    def set_status(self, message=None):
+        """Shows a message next to the large-file state, or the indexing state alone."""
+        if self.large_file.line_count is None:
+            percent = 100 * self.large_file.indexed_bytes // max(1, self.large_file.size)
+            state = f"Large file, read-only. Indexing lines… {percent}%"
+        else:
+            state = f"Large file, read-only. {self.large_file.line_count:,} lines"
+        self.status_label.configure(text=f"{state}  {message}" if message else state)
+
+    def on_index_progress(self, lines, offset):
+        if self.finder.search is None:
+            self.set_status()
+
+    def on_index_done(self, lines):
+        if self.finder.search is None:
+            self.set_status()
+        self.on_yscroll(*self.text_widget.yview())
+
+    def load_window(self, top_line):
+        """Loads the lines around a file line into the widget and scrolls that line to the top."""
+        large_file = self.large_file
+        if large_file.offset_of_line(top_line) is None:
+            top_line = large_file.line_at_offset(large_file.size)
+        first = max(1, top_line - LARGE_FILE_WINDOW_LINES // 2)
+        text, count = large_file.read_lines(first, LARGE_FILE_WINDOW_LINES, LARGE_FILE_WINDOW_MAX_BYTES)
+
+        # Keep the cursor on the same file line if it stays inside the window
+        line, column = map(int, self.text_widget.index("insert").split("."))
+        insert_line = self.window_first + line - 1
+
+        widget = self.text_widget
+        widget.configure(state="normal")
+        widget.delete("1.0", "end")
+        widget.insert("1.0", text)
+        widget.configure(state="disabled")
+        widget.edit_reset()
+        widget.edit_modified(False)
+        self.window_first = first
+        self.window_lines = count
+        self.window_at_end = large_file.offset_of_line(first + count) is None
+        self.line_numbers.line_offset = first - 1
+        if first <= insert_line < first + count:
+            widget.mark_set("insert", f"{insert_line - first + 1}.{column}")
+        widget.yview_moveto((top_line - first) / max(1, count))
+        self.line_numbers.redraw()
+
+    def goto_line(self, line, column=0, length=None, focus=True):
+        """
+        Moves the cursor to the given line and column and scrolls it into view. Selects
+        length characters from there, or the whole line if length is None.
+        """
+        if self.large_file is not None:
+            if not self.window_first <= line < self.window_first + self.window_lines:
+                self.load_window(max(1, line - 10))
+            line -= self.window_first - 1
+        index = f"{line}.{column}"
+        self.text_widget.mark_set("insert", index)
+        self.text_widget.tag_remove("sel", "1.0", "end")
+        if length is None:
+            self.text_widget.tag_add("sel", f"{line}.0", f"{line}.0 lineend")
+        else:
+            self.text_widget.tag_add("sel", index, f"{index}+{length}c")
+        self.text_widget.see(index)
+        if focus:
+            self.text_widget.focus_set()
+        self.line_numbers.redraw()
+
+    def toggle_follow(self):
+        """Starts or stops following the current file as it grows."""
+        if self.follower is not None:
+            self.stop_following()
+        else:
+            self.start_following()
+
+    def start_following(self):
+        """
+        Appends what is written to the current file to the end of the buffer as it is
+        written, see FileFollower. The buffer is read-only meanwhile.
+        """
+        if not self.current_file_path:
+            return
+        if self.large_file is not None:
+            messagebox.showinfo("Follow", "Large files cannot be followed.")
+            return
+        if self.text_widget.edit_modified():
+            messagebox.showinfo("Follow", "Save or discard your changes before following the file.")
+            return
+        self.follower = FileFollower(self.current_file_path, dispatcher_for(self.text_widget), self.on_follow_data,
+                                     self.on_follow_event, offset=self.loaded_size, encoding=self.encoding).start()
+        self.text_widget.configure(state="disabled", undo=False)
+        self.text_widget.see("end-1c")
+        self.on_follow_event()
+        self.status_label.pack(side="left")
+
+    def stop_following(self):
+        """Stops following the file. A buffer that lost its oldest lines stays read-only."""
+        if self.follower is None:
+            return
+        self.follower.cancel()
+        self.follower = None
+        self.text_widget.configure(undo=True)
+        if self.dropped_lines:
+            self.status_label.configure(text=f"End of file, read-only. {self.dropped_lines:,} earlier lines not shown")
+        else:
+            self.text_widget.configure(state="normal")
+            self.status_label.pack_forget()
+
+    def on_follow_data(self, text, offset):
+        """
+        Appends new text to the buffer and drops the oldest lines beyond TAIL_MAX_LINES.
+        Only the changed lines are highlighted again and only the visible line numbers redrawn.
+        """
+        widget = self.text_widget
+        at_end = widget.yview()[1] >= 1.0
+        widget.configure(state="normal")
+        widget.insert("end-1c", text)
+        excess = int(widget.index("end-1c").split(".")[0]) - TAIL_MAX_LINES
+        if excess > 0:
+            widget.delete("1.0", f"{excess + 1}.0")
+            self.dropped_lines += excess
+            self.line_numbers.line_offset = self.dropped_lines
+        widget.configure(state="disabled")
+        widget.edit_modified(False)
+        self.loaded_size = offset
+        if at_end:
+            widget.see("end-1c")
+
+    def on_follow_event(self, message=None):
+        """Shows that the file is followed, with a notice of truncation or rotation."""
+        state = f"Following {os.path.basename(self.current_file_path)}"
+        self.status_label.configure(text=f"{state}  {message}" if message else state)
+
+    def save_file(self, path=None, on_done=None):
+        """
+        Saves the current file in the background, see FileSaver. A buffer without changes
+        is not written to its own file again. on_done(success) runs on the main thread
+        when the save is over, or right away if there was nothing to save.
+        """
+        if self.large_file is not None:
+            messagebox.showinfo("Read-only", "Large files are opened read-only and cannot be saved.")
+            return
+        if self.follower is not None or self.dropped_lines:
+            messagebox.showinfo("Read-only", "Only the end of a followed file is loaded, it cannot be saved.")
+            return
         if path is None:
             path = self.current_file_path
-        if path:
-            try:
-                with open(path, "w", encoding="utf-8") as file:
-                    file.write(self.text_widget.get("1.0", "end-1c"))
-                self.text_widget.edit_modified(False)
-                return True
-            except Exception as e:
-                messagebox.showerror("Error", f"Error saving file: {str(e)}")
-                return False
-        return False
+        if not path:
+            return
+        if self.saver is not None and self.saver.is_alive():
+            messagebox.showinfo("Save", "The file is still being saved.")
+            return
+        if path == self.current_file_path and not self.text_widget.edit_modified():
+            if on_done:
+                on_done(True)
+            return
+
+        # Snapshot the buffer; edits made while it is written mark it modified again
+        text = self.text_widget.get("1.0", "end-1c")
+        self.text_widget.edit_modified(False)
+
+        def on_saved(error):
+            self.saver = None
+            self.status_label.pack_forget()
+            if error is not None:
+                if path == self.current_file_path:
+                    self.text_widget.edit_modified(True)
+                messagebox.showerror("Error", f"Error saving file: {error}")
+            elif path == self.current_file_path:
+                # Following starts from here, after the bytes the buffer now holds
+                try:
+                    self.loaded_size = os.path.getsize(path)
+                except OSError as e:
+                    print(f"Error reading the size of {path}: {e}")
+            if on_done:
+                on_done(error is None)
+
+        def on_progress(written, total):
+            self.status_label.configure(text=f"Saving {os.path.basename(path)}… {100 * written // total}%")
+
+        self.status_label.configure(text=f"Saving {os.path.basename(path)}…")
+        self.status_label.pack(side="left")
+        self.saver = FileSaver(path, text, dispatcher_for(self.text_widget), on_saved, on_progress,
+                               encoding=self.encoding, newline=self.newline).start()
+
+    def on_save_key(self, event=None):
+        self.save_file()
+        # Keep the application-wide Ctrl+S binding from saving a second time
+        return "break"
 
     def close_file(self):
         """Closes the file and resets the text widget."""
         if self.text_widget.edit_modified():
             response = messagebox.askyesnocancel("Save Changes", "Do you want to save changes before closing?")
             if response:  # Yes
-                if not self.save_file():
-                    return  # Don't close if save failed
+                # Don't close if save failed
+                self.save_file(on_done=lambda success: success and self.clear())
+                return
             elif response is None:  # Cancel
                 return
+        self.clear()
+
+    def clear(self):
+        """Resets the text widget without a file."""
+        self.stop_following()
+        self.close_large_file()
+        self.reset_dropped_lines()
         self.text_widget.delete("1.0", "end")
         self.current_file_path = None
+        self.encoding = "utf-8"
+        self.newline = "\n"
+        self.highlight_syntax()
         self.text_widget.edit_modified(False)
         self.line_numbers.redraw()
         
         # Hide the close button when file is closed
         self.close_button.pack_forget()
 
+    def reset_dropped_lines(self):
+        """Makes the buffer editable again after follow mode dropped lines from it."""
+        if self.dropped_lines:
+            self.dropped_lines = 0
+            self.line_numbers.line_offset = 0
+            self.text_widget.configure(state="normal")
+            self.status_label.pack_forget()
+
     def on_closing(self):
         """Handles the window close event."""
         if self.text_widget.edit_modified():
             response = messagebox.askyesnocancel("Save Changes", "Do you want to save changes before closing?")
             if response:  # Yes
                 self.save_file()
-                self.text_widget.edit_modified(False)
-                self.text_frame.master.destroy()
             elif response is None:  # Cancel
                 return
-            else:  # No
-                self.text_frame.master.destroy()
-        else:
-            self.text_frame.master.destroy()
+        if self.saver is not None:
+            # The application is going away, so wait for the file to be written
+            self.saver.join()
+            if self.saver.error is not None:
+                messagebox.showerror("Error", f"Error saving file: {self.saver.error}")
+                return
+        self.stop_following()
+        self.close_large_file()
+        self.text_frame.master.destroy()
             
     def highlight_syntax(self, event=None):
-        """Apply syntax highlighting to the text."""
-        # Remove existing tags
-        for tag in ["keyword", "string", "comment", "function", "number"]:
-            self.text_widget.tag_remove(tag, "1.0", "end")
-            
-        # Get file extension to determine language
-        if not self.current_file_path:
-            return
-            
-        file_ext = os.path.splitext(self.current_file_path)[1].lower()
-        
-        # Define patterns based on file type
-        patterns = {
-            "keyword": [],
-            "string": [r'"[^"\\]*(?:\\.[^"\\]*)*"', r"'[^'\\]*(?:\\.[^'\\]*)*'"],
-            "comment": [],
-            "function": [],
-            "number": [r'\b\d+\b']
-        }
-        
-        # Python specific patterns
-        if file_ext == '.py':
-            patterns["keyword"] = [r'\b(and|as|assert|break|class|continue|def|del|elif|else|except|finally|for|from|global|if|import|in|is|lambda|nonlocal|not|or|pass|raise|return|try|while|with|yield)\b']
-            patterns["comment"] = [r'#.*']
-            patterns["function"] = [r'\bdef\s+([a-zA-Z_][a-zA-Z0-9_]*)\b', r'\bclass\s+([a-zA-Z_][a-zA-Z0-9_]*)\b']
-        
-        # JavaScript/HTML/CSS patterns
-        elif file_ext in ['.js', '.html', '.css']:
-            patterns["keyword"] = [r'\b(var|let|const|function|return|if|else|for|while|do|switch|case|break|continue|try|catch|finally|throw|new|delete|typeof|instanceof|void|this|super|class|extends|import|export|default|async|await)\b']
-            patterns["comment"] = [r'//.*', r'/\*[\s\S]*?\*/']
-            patterns["function"] = [r'\bfunction\s+([a-zA-Z_][a-zA-Z0-9_]*)\b']
-        
-        # Apply highlighting
-        content = self.text_widget.get("1.0", "end-1c")
-        for tag, regexes in patterns.items():
-            for regex in regexes:
-                for match in re.finditer(regex, content):
-                    start = f"1.0+{match.start()}c"
-                    end = f"1.0+{match.end()}c"
-                    self.text_widget.tag_add(tag, start, end)
+        """Highlights the whole text from scratch with the lexer of the current file type."""
+        if not self.current_file_path or self.large_file is not None:
+            self.highlighter.set_lexer(None)
+        else:
+            self.highlighter.set_lexer(lexer_for_path(self.current_file_path))
         
         # Update line numbers
         self.line_numbers.redraw()
@@ -0,0 +1,88 @@
+import tkinter as tk
+
+class TextChangeProxy:
+    """
+    Intercepts the Tcl command of a Text widget to report edits and scrolling.
+
+    The widget command is renamed and replaced by a Python command that forwards
+    every operation. Inserts and deletes are reported to the change listeners as
+    on_change(start_line, lines_removed, lines_added), with the line numbers taken
+    before the edit, so listeners can keep per-line data in sync without re-reading
+    the buffer. Undo and redo are reported as a change of the whole buffer.
+    Operations that may move the view are reported to the scroll listeners after
+    they ran.
+    """
+    SCROLL_OPERATIONS = {"yview", "see", "insert", "delete", "replace", "edit"}
+
+    def __init__(self, text_widget):
+        self.widget = text_widget
+        self.tk = text_widget.tk
+        self.orig = text_widget._w + "_orig"
+        self.change_listeners = []
+        self.scroll_listeners = []
+        self.tk.call("rename", text_widget._w, self.orig)
+        self.tk.createcommand(text_widget._w, self.dispatch)
+
+    def add_change_listener(self, callback):
+        self.change_listeners.append(callback)
+
+    def add_scroll_listener(self, callback):
+        self.scroll_listeners.append(callback)
+
+    def call(self, *args):
+        """Runs a widget operation without going through the listeners."""
+        return self.tk.call((self.orig,) + args)
+
+    def line_of(self, index):
+        return int(self.call("index", index).split(".")[0])
+
+    def dispatch(self, operation, *args):
+        """
+        Replacement widget command. A Tcl error, such as an index that does not exist,
+        is returned as an empty result without notifying the listeners: raised from
+        here, _tkinter would re-raise it out of mainloop even under a Tcl catch.
+        """
+        try:
+            changes = []
+            if operation == "insert" and args:
+                # Inserting at "end" goes before the final newline, i.e. on the last line
+                start = min(self.line_of(args[0]), self.line_of("end-1c"))
+                added = sum(chars.count("\n") for chars in args[1::2])
+                changes.append((start, 0, added))
+            elif operation == "delete" and args:
+                changes.append(self.deleted_lines(*args[:2]))
+            elif operation == "replace" and len(args) >= 3:
+                start, removed, _ = self.deleted_lines(*args[:2])
+                added = sum(chars.count("\n") for chars in args[2::2])
+                changes.append((start, removed, added))
+            elif operation == "edit" and args and args[0] in ("undo", "redo"):
+                # Undo and redo don't tell which lines they touch, so report the whole buffer
+                changes.append((1, self.line_of("end-1c") - 1, None))
+            result = self.tk.call((self.orig, operation) + args)
+            if changes and changes[-1][2] is None:
+                changes[-1] = (1, changes[-1][1], self.line_of("end-1c") - 1)
+        except tk.TclError:
+            return ""
+        for start, removed, added in changes:
+            for callback in self.change_listeners:
+                callback(start, removed, added)
+        if operation in self.SCROLL_OPERATIONS:
+            for callback in self.scroll_listeners:
+                callback()
+        return result
+
+    def deleted_lines(self, index1, index2=None):
+        """Returns (start line, lines removed, 0) for a delete of index1..index2."""
+        start = self.line_of(index1)
+        if index2 is None:
+            end = self.line_of(f"{index1}+1c")
+        else:
+            end = self.line_of(index2)
+        # Tk never deletes the final newline, so the last line cannot be removed
+        last = self.line_of("end-1c")
+        return start, max(0, min(end, last) - start), 0
+
+    def close(self):
+        """Restores the original widget command."""
+        self.tk.deletecommand(self.widget._w)
+        self.tk.call("rename", self.orig, self.widget._w)
@@ -1,11 +1,34 @@
 import os
+import time
 from tkinter import ttk
-from PIL import Image, ImageTk, ImageOps  # Import Pillow modules
 
-from config import configure_styles
+from config import configure_styles, TREE_PAGE_THRESHOLD, TREE_PAGE_SIZE, TREE_INSERT_BUDGET
+from dircache import DirectoryCache
+from dirscan import DirectoryScanner, entry_for_path
+from dirsize import DirSizeCalculator
+from formatting import format_size
+from fswatch import create_watcher
+from icons import icon_cache_for
+from workers import dispatcher_for
+
+class NodeListing:
+    """The entries scanned for one tree node and how many of them are materialized as rows."""
+    def __init__(self, path, limit):
+        self.path = path
+        self.entries = []
+        self.inserted = 0
+        self.limit = limit
+        self.more_node = None
+        self.rows = {}  # name -> tree item of the materialized entries
+        self.watched = False
+
+    @property
+    def remaining(self):
+        return len(self.entries) - self.inserted
 
 class FileTreeView:
-    def __init__(self, parent, open_file_callback):
+    def __init__(self, parent, open_file_callback, page_threshold=TREE_PAGE_THRESHOLD,
+                 page_size=TREE_PAGE_SIZE, insert_budget=TREE_INSERT_BUDGET, dir_cache=None):
         self.tree_frame = ttk.Frame(parent)
         self.tree_frame.pack(fill="both", expand=True)
 
@@ -13,12 +36,36 @@ class FileTreeView:
         self.tree_container = ttk.Frame(self.tree_frame)
         self.tree_container.pack(side="top", fill="both", expand=True)
 
-        # Configure the treeview with show="tree" to only show items, not columns
-        # Set the displaycolumns to an empty list to ensure horizontal scrolling works
-        self.tree = ttk.Treeview(self.tree_container, style="Treeview", show="tree")
+        # Configure the treeview with show="tree" to only show items, not headings
+        # The path column is never displayed, the size column only when sizes are shown
+        self.tree = ttk.Treeview(self.tree_container, style="Treeview", show="tree",
+                                 columns=("path", "size"), displaycolumns=())
+        self.tree.column("size", width=90, minwidth=60, anchor="e", stretch=False)
         self.tree.pack(side="left", fill="both", expand=True)
 
         self.open_file_callback = open_file_callback
+        self.dispatcher = dispatcher_for(self.tree)
+        # The directory scan in progress, if any, and the node it fills
+        self.scan = None
+        self.scan_node = None
+        self.scan_placeholder = None
+        # Folders the watcher lost track of, listed again once no scan is running
+        self.relist_nodes = []
+        # Listings of folders browsed before, reused until the folder changes on disk
+        self.dir_cache = dir_cache if dir_cache is not None else DirectoryCache()
+        # Paging of large folders: node -> NodeListing, and the nodes waiting for rows
+        self.page_threshold = page_threshold
+        self.page_size = page_size
+        self.insert_budget = insert_budget
+        self.listings = {}
+        self.pending_nodes = []
+        self.insert_job = None
+        # Optional size column, folder totals are computed in the background
+        self.show_sizes = False
+        self.size_calculator = None
+        self.dir_sizes = {}  # path -> last known size text of a folder
+        # Live updates of the expanded folders
+        self.watcher = create_watcher(self.dispatcher, self.on_fs_changes)
         self.tree.bind("<Double-1>", self.on_double_click)
         self.tree.bind("<<TreeviewOpen>>", self.on_treeview_open)
         self.tree.bind("<<TreeviewClose>>", self.on_treeview_close)
@@ -27,9 +74,11 @@ class FileTreeView:
         # Add binding for window resize to update column width
         self.tree_frame.bind("<Configure>", self.on_frame_configure)
 
-        self.folder_icon = self.resize_icon("./assets/folder.png", (16, 16))
-        self.file_icon = self.resize_icon("./assets/file.png", (16, 16))
-        self.open_folder_icon = self.resize_icon("./assets/open.png", (16, 16))
+        # Icons come from an atlas shared by all rows and cached on disk across sessions
+        self.icons = icon_cache_for(self.tree)
+        self.folder_icon = self.icons.get("folder")
+        self.file_icon = self.icons.get("file")
+        self.open_folder_icon = self.icons.get("open_folder")
 
         # Create a style for the Treeview
         configure_styles()
@@ -44,7 +93,8 @@ class FileTreeView:
         """Handle frame resize events to adjust column width."""
         # Set the column width to a large value to ensure horizontal scrolling works
         # This ensures long filenames can be scrolled to view
-        self.tree.column("#0", width=max(200, event.width - 20), stretch=False)
+        size_width = self.tree.column("size", "width") if self.show_sizes else 0
+        self.tree.column("#0", width=max(200, event.width - 20 - size_width), stretch=False)
         
     def create_scrollbar(self):
         """Creates the scrollbars."""
@@ -66,15 +116,16 @@ class FileTreeView:
     def on_item_select(self, event):
         """Handles item selection to highlight the selected item."""
         # The selection is automatically handled by ttk.Treeview
-        # We can add custom styling if needed
-        pass
+        item = self.tree.identify_row(event.y)
+        if item and "more" in self.tree.item(item, "tags"):
+            self.show_more(self.tree.parent(item))
 
     def populate_drives(self):
         """Populates the tree view with the available drives."""
         drives = self.get_drives()
         for drive in drives:
             node = self.tree.insert("", "end", text=drive, values=[drive], image=self.folder_icon)
-            self.tree.insert(node, "end")  # Add a dummy child to make the node expandable
+            self.add_dummy_child(node)
 
     def get_drives(self):
         """Returns a list of available drives on the system."""
@@ -85,22 +136,303 @@ class FileTreeView:
                 drives.append(drive_letter)
         return drives
 
+    def add_dummy_child(self, node):
+        """Adds a dummy child to make the node expandable."""
+        self.tree.insert(node, "end", tags=("dummy",))
+
+    def is_unpopulated(self, node):
+        """Returns True if the node only holds its dummy child."""
+        children = self.tree.get_children(node)
+        return len(children) == 1 and "dummy" in self.tree.item(children[0], "tags")
+
     def populate_tree(self, path, parent=""):
-        """Populates the tree view with the contents of the given path."""
-        # Remove dummy child if it exists
-        if parent and self.tree.get_children(parent):
-            self.tree.delete(self.tree.get_children(parent)[0])
-        for item in os.listdir(path):
-            item_path = os.path.join(path, item)
-            if os.path.isdir(item_path):
-                node = self.tree.insert(parent, "end", text=item, values=[item_path], image=self.folder_icon)
-                self.tree.insert(node, "end")  # Add a dummy child to make the node expandable
+        """Populates the tree view with the contents of the given path in the background."""
+        # Only one folder is scanned at a time, opening another one cancels the previous scan
+        self.cancel_scan()
+        self.clear_node(parent)
+        self.listings[parent] = NodeListing(path, self.page_threshold)
+        cached_entries = self.dir_cache.get(path)
+        if cached_entries is not None:
+            self.insert_entries(parent, cached_entries)
+            self.watch_node(parent)
+            return
+        self.scan_node = parent
+        self.scan_placeholder = self.tree.insert(parent, "end", text="loading\u2026", tags=("placeholder",))
+        self.scan = DirectoryScanner(
+            path,
+            self.dispatcher,
+            on_batch=lambda entries: self.insert_entries(parent, entries),
+            on_done=lambda mtime_ns: self.finish_scan(path, mtime_ns),
+            on_error=lambda error: self.finish_scan(path, error=error),
+        ).start()
+
+    def clear_node(self, node):
+        """Deletes all rows below the node and forgets their listings and watches."""
+        self.tree.delete(*self.tree.get_children(node))
+        self.drop_listing(node)
+        self.clear_stale_listings()
+        self.pending_nodes = [item for item in self.pending_nodes if item in self.listings]
+
+    def drop_listing(self, node):
+        """Forgets the listing of a node and stops watching its folder."""
+        listing = self.listings.pop(node, None)
+        if listing and listing.watched:
+            self.watcher.unwatch(listing.path)
+        if listing and self.size_calculator:
+            self.size_calculator.cancel([entry.path for entry in listing.entries if entry.is_dir])
+
+    def watch_node(self, node):
+        """Starts watching the folder of a fully listed node for changes."""
+        listing = self.listings.get(node)
+        if listing and not listing.watched:
+            self.watcher.watch(listing.path)
+            listing.watched = True
+
+    def insert_entries(self, parent, entries):
+        """Queues a batch of scanned entries for insertion under the parent node."""
+        listing = self.listings.get(parent)
+        if listing is None:
+            return
+        listing.entries.extend(entries)
+        self.schedule_insert(parent)
+
+    def schedule_insert(self, node):
+        """Makes sure the rows of the node get inserted in the next time slice."""
+        if node not in self.pending_nodes:
+            self.pending_nodes.append(node)
+        if self.insert_job is None:
+            self.insert_job = self.tree.after_idle(self.insert_pending)
+
+    def insert_pending(self):
+        """Inserts queued rows for a bounded amount of time, then yields to the event loop."""
+        self.insert_job = None
+        deadline = time.monotonic() + self.insert_budget
+        while self.pending_nodes:
+            node = self.pending_nodes[0]
+            listing = self.listings.get(node)
+            if listing is None or (node and not self.tree.exists(node)):
+                self.pending_nodes.pop(0)
+                continue
+            end = min(len(listing.entries), listing.limit)
+            if listing.inserted < end and listing.more_node:
+                # Keep the "Show more" row last, it is added back below
+                self.tree.delete(listing.more_node)
+                listing.more_node = None
+            while listing.inserted < end:
+                if time.monotonic() >= deadline:
+                    self.insert_job = self.tree.after(1, self.insert_pending)
+                    return
+                entry = listing.entries[listing.inserted]
+                listing.rows[entry.name] = self.insert_row(node, entry)
+                listing.inserted += 1
+            self.update_more_node(node, listing)
+            self.pending_nodes.pop(0)
+
+    def insert_row(self, parent, entry):
+        """Inserts the row for a single entry and returns it."""
+        if entry.is_dir:
+            node = self.tree.insert(parent, "end", text=entry.name, image=self.folder_icon,
+                                    values=[entry.path, self.dir_sizes.get(entry.path, "")])
+            self.add_dummy_child(node)
+            if self.show_sizes:
+                self.size_calculator.add([entry.path])
+            return node
+        return self.tree.insert(parent, "end", text=entry.name, image=self.icons.icon_for(entry.name),
+                                values=[entry.path, format_size(entry.size)])
+
+    def update_more_node(self, node, listing):
+        """Adds, relabels or removes the "Show more" row of a paged node."""
+        remaining = listing.remaining
+        if remaining <= 0:
+            if listing.more_node and self.tree.exists(listing.more_node):
+                self.tree.delete(listing.more_node)
+            listing.more_node = None
+            return
+        text = f"Show more ({remaining:,} remaining)"
+        if listing.more_node and self.tree.exists(listing.more_node):
+            self.tree.item(listing.more_node, text=text)
+        else:
+            listing.more_node = self.tree.insert(node, "end", text=text, tags=("more",))
+
+    def show_more(self, node):
+        """Materializes the next page of rows of a paged node."""
+        listing = self.listings.get(node)
+        if listing is None:
+            return
+        if listing.more_node and self.tree.exists(listing.more_node):
+            self.tree.delete(listing.more_node)
+        listing.more_node = None
+        listing.limit = listing.inserted + self.page_size
+        self.schedule_insert(node)
+
+    def finish_scan(self, path, mtime_ns=None, error=None):
+        """Caches the listing and removes the loading placeholder once the scan has completed."""
+        if error:
+            print(f"Error reading directory: {error}")
+        elif self.scan_node in self.listings:
+            self.dir_cache.put(path, mtime_ns, self.listings[self.scan_node].entries)
+            self.watch_node(self.scan_node)
+            # Changes made while the folder was listed came before the watch, so don't trust
+            # the cached listing and read the folder again the next time it is opened
+            try:
+                if os.stat(path).st_mtime_ns != mtime_ns:
+                    self.dir_cache.invalidate(path)
+            except OSError:
+                self.dir_cache.invalidate(path)
+        if self.scan_placeholder and self.tree.exists(self.scan_placeholder):
+            self.tree.delete(self.scan_placeholder)
+        self.scan = None
+        self.scan_node = None
+        self.scan_placeholder = None
+        self.run_relists()
+
+    def cancel_scan(self):
+        """Cancels the scan in progress and resets its partially filled node."""
+        if not self.scan:
+            return
+        self.scan.cancel()
+        node = self.scan_node
+        self.scan = None
+        self.scan_node = None
+        self.scan_placeholder = None
+        if node and self.tree.exists(node):
+            self.clear_node(node)
+            self.add_dummy_child(node)
+            self.tree.item(node, open=False, image=self.folder_icon)
+
+    def on_fs_changes(self, changes):
+        """Applies a coalesced burst of filesystem changes to the expanded folders."""
+        for node, listing in list(self.listings.items()):
+            if listing.path not in changes or node == self.scan_node or node not in self.listings:
+                continue
+            names = changes[listing.path]
+            if names is None:
+                if node not in self.relist_nodes:
+                    self.relist_nodes.append(node)
             else:
-                self.tree.insert(parent, "end", text=item, values=[item_path], image=self.file_icon)
+                self.apply_changes(node, listing, names)
+        self.run_relists()
+
+    def run_relists(self):
+        """Lists the queued folders again, one scan at a time, without cancelling a running scan."""
+        while self.relist_nodes and not self.scan:
+            node = self.relist_nodes.pop(0)
+            listing = self.listings.get(node)
+            if listing is not None and (not node or self.tree.exists(node)):
+                self.dir_cache.invalidate(listing.path)
+                self.populate_tree(listing.path, node)
+
+    def apply_changes(self, node, listing, names):
+        """Updates the rows of a node for the given changed names without re-listing the folder."""
+        changed = {name: entry_for_path(os.path.join(listing.path, name)) for name in names}
+        entries = []
+        inserted = 0
+        for index, entry in enumerate(listing.entries):
+            if entry.name in changed:
+                fresh = changed.pop(entry.name)
+                row = listing.rows.get(entry.name)
+                if fresh is None or fresh.is_dir != entry.is_dir:
+                    # Deleted, or replaced by an entry of the other kind which is re-added below
+                    if row:
+                        self.tree.delete(row)
+                        del listing.rows[entry.name]
+                    if fresh is not None:
+                        changed[entry.name] = fresh
+                    continue
+                entry = fresh
+                if row and not entry.is_dir:
+                    self.tree.set(row, "size", format_size(entry.size))
+            entries.append(entry)
+            if index < listing.inserted:
+                inserted += 1
+        entries.extend(entry for entry in changed.values() if entry is not None)
+        listing.entries = entries
+        listing.inserted = inserted
+        self.schedule_insert(node)
+        if self.show_sizes:
+            self.refresh_ancestor_sizes(node)
+        # Stale watches and listings of deleted subfolders
+        self.clear_stale_listings()
+        try:
+            self.dir_cache.put(listing.path, os.stat(listing.path).st_mtime_ns, entries)
+        except OSError:
+            self.dir_cache.invalidate(listing.path)
+
+    def clear_stale_listings(self):
+        """Drops the listings of nodes that no longer exist."""
+        for item in [item for item in self.listings if item and not self.tree.exists(item)]:
+            self.drop_listing(item)
+
+    def close(self):
+        """Stops the background work of the tree: the scan, the folder watcher and size walks."""
+        self.cancel_scan()
+        self.watcher.close()
+        if self.size_calculator:
+            self.size_calculator.close()
+            self.size_calculator = None
+
+    def toggle_sizes(self):
+        """Shows or hides the size column."""
+        self.set_show_sizes(not self.show_sizes)
+
+    def set_show_sizes(self, show):
+        """Shows or hides the size column, computing folder sizes while it is shown."""
+        self.show_sizes = show
+        self.tree.configure(displaycolumns=("size",) if show else ())
+        if not show:
+            # The calculator and its cache of folder totals are kept for the next time
+            if self.size_calculator:
+                self.size_calculator.cancel_all()
+            return
+        if self.size_calculator is None:
+            self.size_calculator = DirSizeCalculator(self.dispatcher, self.on_size_update)
+        self.size_calculator.add([entry.path for listing in self.listings.values()
+                                  for entry in listing.entries[:listing.inserted] if entry.is_dir])
+
+    def refresh_ancestor_sizes(self, node):
+        """Recomputes the size of a changed folder and of every folder above it in the tree."""
+        paths = []
+        while node:
+            values = self.tree.item(node, "values")
+            if values:
+                paths.append(values[0])
+            node = self.tree.parent(node)
+        self.size_calculator.add(paths)
+
+    def on_size_update(self, path, total, done, capped):
+        """Shows a (partial) folder size in the row of the folder."""
+        text = format_size(total) + ("+" if capped else "") + ("" if done else "\u2026")
+        self.dir_sizes[path] = text
+        parent, name = os.path.split(path)
+        for listing in self.listings.values():
+            if listing.path == parent and name in listing.rows:
+                row = listing.rows[name]
+                if self.tree.exists(row):
+                    self.tree.set(row, "size", text)
+
+    def is_ancestor(self, ancestor, item):
+        """Returns True if item is ancestor or lies below it."""
+        while item:
+            if item == ancestor:
+                return True
+            item = self.tree.parent(item)
+        return False
+
+    def selected_folder(self):
+        """Returns the selected folder, or the folder of the selected file, or None."""
+        selection = self.tree.selection()
+        values = self.tree.item(selection[0], "values") if selection else None
+        if not values:
+            return None
+        path = values[0]
+        return path if os.path.isdir(path) else os.path.dirname(path)
 
     def on_double_click(self, event):
         """Handles double-click event on tree view."""
         item = self.tree.selection()[0]
+        tags = self.tree.item(item, "tags")
+        if "placeholder" in tags or "more" in tags:
+            return
         path = self.tree.item(item, "values")[0]
         if os.path.isdir(path):
             self.populate_tree(path, item)
@@ -109,25 +441,18 @@ class FileTreeView:
 
     def on_treeview_open(self, event):
         """Handles tree view open event to populate children and change icon."""
-        item = self.tree.selection()[0]
+        item = self.tree.focus()
         path = self.tree.item(item, "values")[0]
-        if len(self.tree.get_children(item)) == 1:
-            self.tree.delete(self.tree.get_children(item)[0])
+        if self.is_unpopulated(item):
             self.populate_tree(path, item)
         self.tree.item(item, image=self.open_folder_icon)
 
     def on_treeview_close(self, event):
         """Handles tree view close event to change icon back to closed folder."""
-        item = self.tree.selection()[0]
+        item = self.tree.focus()
+        # Stop scanning a folder that is no longer visible
+        if self.scan and self.is_ancestor(item, self.scan_node):
+            self.cancel_scan()
+        # The rows are kept, and stay up to date through the watcher, so re-opening the
+        # folder shows the subfolders that were expanded in it without listing anything
         self.tree.item(item, image=self.folder_icon)
-        
-    def resize_icon(self, path, size, padding=(5, 5)):
-        """Resizes the icon to the specified size and returns a PhotoImage."""
-        try:
-            image = Image.open(path)
-            image = image.resize(size, Image.Resampling.LANCZOS)
-            image_with_padding = ImageOps.expand(image, border=padding, fill=(255, 255, 255, 0))
-            return ImageTk.PhotoImage(image_with_padding)
-        except FileNotFoundError:
-            print(f"Icon file not found: {path}")
-            return None
\ No newline at end of file
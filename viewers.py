@@ -0,0 +1,122 @@
+import mimetypes
+import os
+import time
+
+class ViewerSpec:
+    """Describes a viewer type: how to build it and how to drive it."""
+    def __init__(self, name, factory, frame_attr, open_method):
+        self.name = name
+        self.factory = factory
+        self.frame_attr = frame_attr
+        self.open_method = open_method
+
+class ViewerRegistry:
+    """
+    Maps file types to viewers and builds each viewer the first time it is needed.
+
+    A viewer is registered with a factory that imports its backend and constructs
+    it, so neither the import nor the widget tree is paid for until a matching file
+    is opened. Only one viewer's frame is packed into the content frame at a time.
+    """
+    def __init__(self, parent, default=None):
+        self.parent = parent
+        self.default = default
+        self.specs = {}
+        self.by_extension = {}
+        self.by_mime_prefix = []
+        self.instances = {}
+        self.build_times = {}
+        self.active = None
+
+    def register(self, name, factory, frame_attr, open_method, extensions=(), mime_prefixes=()):
+        """Registers a viewer for the given file extensions and mime type prefixes."""
+        self.specs[name] = ViewerSpec(name, factory, frame_attr, open_method)
+        for extension in extensions:
+            self.by_extension[extension.lower()] = name
+        for prefix in mime_prefixes:
+            self.by_mime_prefix.append((prefix, name))
+
+    def viewer_for_path(self, path):
+        """Returns the name of the viewer for a file."""
+        extension = os.path.splitext(path)[1].lower()
+        if extension in self.by_extension:
+            return self.by_extension[extension]
+        if self.by_mime_prefix:
+            mime_type, _ = mimetypes.guess_type(path)
+            if mime_type:
+                for prefix, name in self.by_mime_prefix:
+                    if mime_type.startswith(prefix):
+                        return name
+        return self.default
+
+    def get(self, name):
+        """Returns the viewer, building it on first use."""
+        if name not in self.instances:
+            spec = self.specs[name]
+            start = time.perf_counter()
+            viewer = spec.factory(self.parent)
+            self.build_times[name] = time.perf_counter() - start
+            # Viewers pack themselves when built, they are only shown through show()
+            self.frame(name, viewer).pack_forget()
+            self.instances[name] = viewer
+        return self.instances[name]
+
+    def frame(self, name, viewer=None):
+        """Returns the top-level frame of a viewer."""
+        viewer = viewer or self.instances[name]
+        return getattr(viewer, self.specs[name].frame_attr)
+
+    def show(self, name):
+        """Shows the viewer and hides the other viewers. Returns the viewer."""
+        viewer = self.get(name)
+        if self.active != name:
+            if self.active is not None:
+                self.frame(self.active).pack_forget()
+            self.frame(name).pack(fill="both", expand=True)
+            self.active = name
+        return viewer
+
+    def open(self, name, path, **options):
+        """Shows the viewer and opens the file in it. options are passed to its open method."""
+        viewer = self.show(name)
+        getattr(viewer, self.specs[name].open_method)(path, **options)
+        return viewer
+
+    def is_active(self, name):
+        """Returns True if the viewer is the one currently shown."""
+        return self.active == name and name in self.instances
+
+    def built(self):
+        """Returns the viewers built so far."""
+        return list(self.instances.values())
+
+def create_text_editor(parent):
+    from texteditor import TextEditor
+    return TextEditor(parent)
+
+def create_image_viewer(parent):
+    from imageviewer import ImageViewer
+    return ImageViewer(parent)
+
+def create_pdf_viewer(parent):
+    from pdfviewer import PDFViewer
+    return PDFViewer(parent)
+
+def create_docx_viewer(parent):
+    from docxviewer import DocxViewer
+    return DocxViewer(parent)
+
+def create_hex_viewer(parent):
+    from hexviewer import HexViewer
+    return HexViewer(parent)
+
+def create_default_registry(parent):
+    """Returns a registry with the viewers of the application."""
+    registry = ViewerRegistry(parent, default="text")
+    registry.register("text", create_text_editor, "text_frame", "open_file")
+    registry.register("image", create_image_viewer, "image_frame", "open_image", mime_prefixes=["image/"])
+    registry.register("pdf", create_pdf_viewer, "pdf_frame", "open_pdf", extensions=[".pdf"])
+    registry.register("docx", create_docx_viewer, "docx_frame", "open_docx", extensions=[".docx", ".doc"])
+    # Files that sniff as binary are opened in the hex viewer by name
+    registry.register("hex", create_hex_viewer, "hex_frame", "open_file")
+    return registry
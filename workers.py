@@ -0,0 +1,51 @@
+import queue
+import time
+import tkinter as tk
+
+class MainThreadDispatcher:
+    """
+    Runs callbacks posted from worker threads on the Tk main thread.
+
+    Tk widgets may only be touched from the thread running the main loop, so
+    background workers post their results here and the dispatcher drains the
+    queue periodically through ``after``.
+    """
+    def __init__(self, widget, interval=15, time_budget=0.02):
+        self.widget = widget
+        self.interval = interval
+        self.time_budget = time_budget
+        self.queue = queue.Queue()
+        self.widget.after(self.interval, self.poll)
+
+    def post(self, callback, *args):
+        """Schedules callback(*args) to run on the main thread. Safe from any thread."""
+        self.queue.put((callback, args))
+
+    def poll(self):
+        """Runs pending callbacks until the queue is empty or the time budget is spent."""
+        deadline = time.monotonic() + self.time_budget
+        while time.monotonic() < deadline:
+            try:
+                callback, args = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                callback(*args)
+            except Exception as e:
+                print(f"Error in dispatched callback: {e}")
+        try:
+            # Come back immediately if we ran out of time with work still queued
+            delay = 1 if not self.queue.empty() else self.interval
+            self.widget.after(delay, self.poll)
+        except tk.TclError:
+            pass  # The widget has been destroyed
+
+_dispatchers = {}
+
+def dispatcher_for(widget):
+    """Returns the dispatcher shared by all widgets of the same Tk root."""
+    root = widget._root()
+    key = id(root)
+    if key not in _dispatchers:
+        _dispatchers[key] = MainThreadDispatcher(root)
+    return _dispatchers[key]